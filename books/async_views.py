@@ -0,0 +1,34 @@
+"""
+Async (ASGI) versions of the book list and detail endpoints.
+
+They run the same filters, pagination, permissions and throttles as
+``BookViewSet`` and return the same response shapes, but query through
+Django's async ORM instead of occupying a thread for the whole request.
+See ``utils.async_api``.
+"""
+
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from utils.async_api import async_action, paginated_rows
+
+from .models import Book
+from .serializers import book_detail_row
+from .views import BookViewSet
+
+
+@async_action(BookViewSet, "list")
+async def book_list(view, request):
+    """List books, filtered, ordered and paginated like ``BookViewSet.list``."""
+    queryset = view.filter_queryset(view.get_queryset())
+    return await paginated_rows(view, request, queryset, view.row_serializer)
+
+
+@async_action(BookViewSet, "retrieve")
+async def book_detail(view, request, pk):
+    """Retrieve a book like ``BookViewSet.retrieve``."""
+    queryset = view.filter_queryset(view.get_queryset())
+    try:
+        row = await queryset.values().aget(pk=pk)
+    except Book.DoesNotExist:
+        raise NotFound(f"No {Book._meta.object_name} matches the given query.")
+    return Response(book_detail_row(row))
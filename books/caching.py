@@ -0,0 +1,106 @@
+"""
+Versioned response cache for the book catalog.
+
+Cached responses are stored under a cache *version* equal to a generation
+number: one for the whole catalog (used by the list endpoint) and one per
+book (used by the detail endpoint). The Book/Review signals bump the
+generations on every write, so a cached response is never served after the
+data behind it has changed; stale entries simply expire.
+
+Hits and misses are counted in the cache as well, so the counters are shared
+by all workers when a shared cache backend is configured.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+CATALOG_GENERATION_KEY = "books:generation"
+HITS_KEY = "books:cache:hits"
+MISSES_KEY = "books:cache:misses"
+
+
+def _book_generation_key(book_id):
+    return f"books:generation:{book_id}"
+
+
+def _incr(key, initial=0):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # The counter does not exist yet (or was evicted)
+        cache.add(key, initial, None)
+        return cache.incr(key)
+
+
+def _get_generation(key):
+    generation = cache.get(key)
+    if generation is None:
+        # Start from the current time rather than 0, so a generation key that
+        # was evicted never restarts at a value older cached responses used.
+        cache.add(key, time.time_ns(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def _bump_generation(key):
+    _incr(key, initial=time.time_ns())
+
+
+def get_catalog_generation():
+    return _get_generation(CATALOG_GENERATION_KEY)
+
+
+def get_book_generation(book_id):
+    return _get_generation(_book_generation_key(book_id))
+
+
+def invalidate_book_cache(*book_ids):
+    """Invalidate the cached catalog pages and the detail pages of ``book_ids``."""
+    _bump_generation(CATALOG_GENERATION_KEY)
+    for book_id in book_ids:
+        _bump_generation(_book_generation_key(book_id))
+
+
+def list_cache_key(request):
+    """
+    Build the cache key of a list response.
+
+    The response depends on the query string, and its pagination links on the
+    host the request was made to.
+    """
+    query = "&".join(sorted(request.query_params.urlencode().split("&")))
+    url = request.build_absolute_uri(request.path) + "?" + query
+    return "books:list:" + hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+def detail_cache_key(book_id):
+    # v2: the response gained the rating histogram
+    return f"books:detail:v2:{book_id}"
+
+
+def get_cached(key, version):
+    """Return the cached response data for ``key``, counting the hit or miss."""
+    data = cache.get(key, version=version)
+    _incr(MISSES_KEY if data is None else HITS_KEY)
+    return data
+
+
+def set_cached(key, version, data, timeout=None):
+    if timeout is None:
+        timeout = settings.BOOKS_CACHE_TIMEOUT
+    cache.set(key, data, timeout, version=version)
+
+
+def get_stats():
+    """Return the hit/miss counters of the catalog response cache."""
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / lookups, 4) if lookups else None,
+    }
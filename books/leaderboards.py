@@ -0,0 +1,247 @@
+"""
+Top-rated and trending book leaderboards.
+
+Both are served from ``BookRanking``, one row per book, with an index on each
+score, so a top-N read is a single index range scan.
+
+- ``bayesian_rating`` is ``(C * m + rating_sum) / (C + rating_count)``: the
+  book's average rating pulled towards ``m``, the mean of all ratings, as if
+  it had ``C`` more reviews (``settings.LEADERBOARD_PRIOR_WEIGHT``). A single
+  5-star review no longer outranks hundreds of 4-star ones.
+- ``trending_score`` counts the book's reviews, each weighing half as much
+  every ``settings.LEADERBOARD_TRENDING_HALF_LIFE_DAYS``. It uses forward
+  decay: a review created at ``t`` adds ``2 ** ((t - EPOCH) / half-life)``,
+  which never changes afterwards, so a review write adds or removes a
+  constant, and the scores keep the order they would have if decayed to the
+  present. They are only scaled to the present when served (``decayed``).
+
+Review writes update the rankings of their books with one UPDATE, see
+``update_rankings``. ``refresh_rankings`` (``manage.py refresh_leaderboards``)
+recomputes every row, including those of books written without signals
+(bulk imports), and the prior mean ``m``. It stores ``m`` in every row, so
+that writes use it without computing it again.
+
+Forward-decayed scores double every half-life; with the default of 7 days,
+floats overflow some 19 years after EPOCH. Moving EPOCH forward, or changing
+the half-life, takes a refresh.
+"""
+
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Case, F, FloatField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.db.models.lookups import LessThan
+from django.utils import timezone
+from utils.bulk import batched
+
+from .models import Book, BookRanking
+
+EPOCH = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+
+# The prior mean until the first refresh, or while there are no ratings
+DEFAULT_PRIOR_MEAN = BookRanking._meta.get_field("prior_mean").default
+
+# Reviews older than this many half-lives weigh less than a millionth of a
+# new one, so they are left out of the trending scores
+TRENDING_HORIZON = 20
+# Trending scores below this share of a new review's weight are what float
+# rounding leaves of removed reviews, and count as 0
+TRENDING_NOISE = 1e-9
+
+
+def _half_life_seconds():
+    return settings.LEADERBOARD_TRENDING_HALF_LIFE_DAYS * 24 * 3600
+
+
+def trending_weight(created_at):
+    """The constant that a review created at ``created_at`` adds to ``trending_score``."""
+    return 2.0 ** ((created_at - EPOCH).total_seconds() / _half_life_seconds())
+
+
+def trending_delta(created_at, now=None):
+    """
+    The weight of a review created at ``created_at`` in ``trending_score``, or
+    0 past the horizon, where the refresh leaves it out as well.
+    """
+    now = now or timezone.now()
+    if (now - created_at).total_seconds() > TRENDING_HORIZON * _half_life_seconds():
+        return 0.0
+    return trending_weight(created_at)
+
+
+def decayed(trending_score, now=None):
+    """Scale a ``trending_score`` to ``now``, where a new review weighs 1."""
+    return max(trending_score / trending_weight(now or timezone.now()), 0.0)
+
+
+def compute_prior_mean():
+    """The mean rating of all reviews, from the books' rating aggregates."""
+    totals = Book.objects.aggregate(total=Sum("rating_sum"), count=Sum("rating_count"))
+    if not totals["count"]:
+        return DEFAULT_PRIOR_MEAN
+    return totals["total"] / totals["count"]
+
+
+def stored_prior_mean():
+    """The prior mean of the last refresh, read from any ranking."""
+    prior_mean = BookRanking.objects.values_list("prior_mean", flat=True).first()
+    return DEFAULT_PRIOR_MEAN if prior_mean is None else prior_mean
+
+
+def bayesian_rating(rating_sum, rating_count, prior_mean):
+    weight = settings.LEADERBOARD_PRIOR_WEIGHT
+    if not weight + rating_count:
+        return prior_mean
+    return (weight * prior_mean + rating_sum) / (weight + rating_count)
+
+
+def _bayesian_rating_expression():
+    """
+    ``bayesian_rating`` computed in SQL from the ranked book's aggregates and
+    the ranking's stored prior mean.
+    """
+    weight = float(settings.LEADERBOARD_PRIOR_WEIGHT)
+    book = Book.objects.filter(pk=OuterRef("book_id"))
+    rating_sum = Cast(Subquery(book.values("rating_sum")), FloatField())
+    rating_count = Cast(Subquery(book.values("rating_count")), FloatField())
+    return Coalesce(
+        (Value(weight) * F("prior_mean") + rating_sum)
+        / NullIf(Value(weight) + rating_count, 0.0),
+        F("prior_mean"),
+    )
+
+
+def update_rankings(trending_deltas):
+    """
+    Update the rankings of the books of ``trending_deltas``, a dict of
+    ``trending_score`` changes by book id: the Bayesian rating is recomputed
+    from the book's rating aggregates, the trending score changed in place.
+
+    Call it after the rating aggregates were updated. Trending scores that
+    drop below the noise are set to 0. The missing rankings of books added
+    since the last refresh are created, with a trending score of the change
+    only.
+    """
+    if not trending_deltas:
+        return
+
+    noise = trending_weight(timezone.now()) * TRENDING_NOISE
+
+    def trending_score(delta):
+        changed = F("trending_score") + delta
+        return Case(
+            When(LessThan(changed, noise), then=Value(0.0)),
+            default=changed,
+            output_field=FloatField(),
+        )
+
+    def update(book_ids):
+        return BookRanking.objects.filter(book_id__in=book_ids).update(
+            bayesian_rating=_bayesian_rating_expression(),
+            trending_score=Case(
+                *[
+                    When(book_id=book_id, then=trending_score(trending_deltas[book_id]))
+                    for book_id in book_ids
+                ],
+                default=F("trending_score"),
+                output_field=FloatField(),
+            ),
+        )
+
+    book_ids = list(trending_deltas)
+    updated = update(book_ids)
+    if updated < len(book_ids):
+        missing = book_ids
+        if updated:
+            existing = set(
+                BookRanking.objects.filter(book_id__in=book_ids).values_list(
+                    "book_id", flat=True
+                )
+            )
+            missing = [book_id for book_id in book_ids if book_id not in existing]
+        prior_mean = stored_prior_mean()
+        BookRanking.objects.bulk_create(
+            [
+                BookRanking(book_id=book_id, prior_mean=prior_mean)
+                for book_id in missing
+            ],
+            ignore_conflicts=True,
+        )
+        update(missing)
+
+
+def refresh_rankings(batch_size=1000, now=None, book_ids=None):
+    """
+    Recompute the prior mean and the ranking of every book, or only the
+    rankings of the books of ``book_ids`` with the current prior mean.
+
+    Reads the reviews of the last ``TRENDING_HORIZON`` half-lives, through
+    the ``created_at`` index, and writes the rankings with batched upserts.
+
+    Returns:
+        int: The number of rankings written.
+    """
+    Review = Book._meta.get_field("reviews").related_model
+    now = now or timezone.now()
+    books = Book.objects.all()
+    reviews = Review.objects.all()
+    if book_ids is None:
+        prior_mean = compute_prior_mean()
+    else:
+        prior_mean = stored_prior_mean()
+        books = books.filter(pk__in=book_ids)
+        reviews = reviews.filter(book_id__in=book_ids)
+
+    horizon = now - datetime.timedelta(seconds=TRENDING_HORIZON * _half_life_seconds())
+    trending = defaultdict(float)
+    recent = reviews.filter(created_at__gte=horizon).values_list(
+        "book_id", "created_at"
+    )
+    for book_id, created_at in recent.iterator(chunk_size=batch_size):
+        trending[book_id] += trending_weight(created_at)
+
+    rows = books.values_list("id", "rating_sum", "rating_count")
+    rankings = (
+        BookRanking(
+            book_id=book_id,
+            bayesian_rating=bayesian_rating(rating_sum, rating_count, prior_mean),
+            trending_score=trending[book_id],
+            prior_mean=prior_mean,
+            refreshed_at=now,
+        )
+        for book_id, rating_sum, rating_count in rows.iterator(chunk_size=batch_size)
+    )
+    written = 0
+    for batch in batched(rankings, batch_size):
+        BookRanking.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=["book"],
+            update_fields=[
+                "bayesian_rating",
+                "trending_score",
+                "prior_mean",
+                "refreshed_at",
+            ],
+        )
+        written += len(batch)
+    return written
+
+
+def top_rated(limit):
+    """The ``limit`` best rankings by Bayesian rating, with their books."""
+    return BookRanking.objects.select_related("book").order_by(
+        "-bayesian_rating", "book"
+    )[:limit]
+
+
+def trending(limit, now=None):
+    """The ``limit`` best rankings by trending score, with their books."""
+    noise = trending_weight(now or timezone.now()) * TRENDING_NOISE
+    return (
+        BookRanking.objects.select_related("book")
+        .filter(trending_score__gt=noise)
+        .order_by("-trending_score", "book")[:limit]
+    )
@@ -0,0 +1,158 @@
+import asyncio
+import statistics
+import time
+from collections import Counter
+from contextlib import ExitStack
+from unittest import mock
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from reviews.views import ReviewViewSet
+
+from books.models import Book
+from books.views import BookViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the sync and async read endpoints under concurrent load, "
+        "served in-process by the ASGI application, with an artificial "
+        "latency added to every database query to model slow I/O"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Number of requests per endpoint (default is 200)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=50,
+            help="Number of requests in flight at once (default is 50)",
+        )
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.02,
+            help="Seconds added to every database query (default is 0.02)",
+        )
+
+    def handle(self, *args, **kwargs):
+        book_id = Book.objects.order_by("id").values_list("id", flat=True).first()
+        if book_id is None:
+            raise CommandError("No books found, run populate_books first.")
+
+        endpoints = [
+            ("book list", "/api/books/", "/api/async/books/"),
+            ("book detail", f"/api/books/{book_id}/", f"/api/async/books/{book_id}/"),
+            (
+                "book reviews",
+                f"/api/books/{book_id}/reviews/",
+                f"/api/async/books/{book_id}/reviews/",
+            ),
+        ]
+
+        latency = kwargs["latency"]
+
+        def slow_query(execute, sql, params, many, context):
+            time.sleep(latency)
+            return execute(sql, params, many, context)
+
+        def add_latency(sender, connection, **kwargs):
+            connection.execute_wrappers.append(slow_query)
+
+        # Requests run in threads that open their own connections
+        connections.close_all()
+        connection_created.connect(add_latency)
+        with ExitStack() as stack:
+            stack.callback(connection_created.disconnect, add_latency)
+            # Measure the views rather than the response cache and rate limits
+            stack.enter_context(override_settings(BOOKS_CACHE_TIMEOUT=0))
+            for viewset in (BookViewSet, ReviewViewSet):
+                stack.enter_context(mock.patch.object(viewset, "throttle_classes", []))
+
+            application = get_asgi_application()
+            for name, sync_path, async_path in endpoints:
+                for mode, path in (("sync", sync_path), ("async", async_path)):
+                    result = asyncio.run(
+                        self.load(
+                            application, path, kwargs["requests"], kwargs["concurrency"]
+                        )
+                    )
+                    self.report(f"{name} ({mode})", *result)
+
+    async def load(self, application, path, total, concurrency):
+        """Send ``total`` GET requests to ``path``, ``concurrency`` at a time."""
+        latencies = []
+        statuses = Counter()
+        pending = iter(range(total))
+
+        async def worker():
+            for _ in pending:
+                status, elapsed = await self.request(application, path)
+                statuses[status] += 1
+                latencies.append(elapsed)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - started, latencies, statuses
+
+    @staticmethod
+    async def request(application, path):
+        host = next((h for h in settings.ALLOWED_HOSTS if h != "*"), "localhost")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", host.encode()), (b"accept", b"application/json")],
+            "client": ("127.0.0.1", 0),
+            "server": (host, 80),
+        }
+        body_sent = False
+        status = None
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # The client never disconnects
+            await asyncio.Future()
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        started = time.perf_counter()
+        await application(scope, receive, send)
+        return status, time.perf_counter() - started
+
+    def report(self, name, elapsed, latencies, statuses):
+        latencies.sort()
+        p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+        errors = sum(count for status, count in statuses.items() if status != 200)
+        line = (
+            f"{name:<22} {len(latencies) / elapsed:8.1f} req/s   "
+            f"p50 {statistics.median(latencies) * 1000:7.1f} ms   "
+            f"p95 {p95 * 1000:7.1f} ms"
+        )
+        if errors:
+            self.stdout.write(
+                self.style.WARNING(f"{line}   {errors} non-200: {dict(statuses)}")
+            )
+        else:
+            self.stdout.write(line)
@@ -0,0 +1,103 @@
+import datetime
+import random
+import timeit
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from reviews.models import Review
+from reviews.serializers import ReviewSerializer, review_rows
+
+from books.models import Book
+from books.serializers import BookSerializer, book_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the DRF ModelSerializer path with the values() row serializers "
+        "used by the book and review list endpoints"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=100,
+            help="Number of rows serialized per run, like ?page_size (default is 100)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=200,
+            help="Number of runs per serializer (default is 200)",
+        )
+
+    def handle(self, *args, **kwargs):
+        rows = kwargs["rows"]
+        repeat = kwargs["repeat"]
+
+        # Synthetic in-memory rows, so only serialization is measured
+        books = [self.make_book(i) for i in range(1, rows + 1)]
+        reviews = [self.make_review(i) for i in range(1, rows + 1)]
+
+        self.compare("Book", BookSerializer, book_rows, books, repeat)
+        self.compare("Review", ReviewSerializer, review_rows, reviews, repeat)
+
+    def compare(self, name, serializer_class, row_serializer, instances, repeat):
+        # values() rows hold the attnames, e.g. book_id rather than book
+        rows = [
+            {
+                field.attname: getattr(obj, field.attname)
+                for field in obj._meta.concrete_fields
+            }
+            for obj in instances
+        ]
+
+        expected = serializer_class(instances, many=True).data
+        if row_serializer.serialize(rows) != expected:
+            self.stdout.write(self.style.ERROR(f"{name}: outputs differ!"))
+            return
+
+        drf = min(
+            timeit.repeat(
+                lambda: serializer_class(instances, many=True).data,
+                number=1,
+                repeat=repeat,
+            )
+        )
+        fast = min(
+            timeit.repeat(
+                lambda: row_serializer.serialize(rows), number=1, repeat=repeat
+            )
+        )
+        self.stdout.write(
+            f"{name} x{len(rows)}: ModelSerializer {drf * 1000:.3f} ms, "
+            f"row serializer {fast * 1000:.3f} ms"
+        )
+        self.stdout.write(self.style.SUCCESS(f"{name}: {drf / fast:.1f}x faster"))
+
+    @staticmethod
+    def make_book(pk):
+        return Book(
+            id=pk,
+            title=f"Book {pk}",
+            author=f"Author {pk % 50}",
+            publishing_date=datetime.date(2000, 1, 1) + datetime.timedelta(days=pk),
+            category=random.choice(["Fiction", "Non-Fiction", "Science", "History"]),
+            url=f"http://example.com/books/{pk}",
+            created_at=timezone.now(),
+            updated_at=timezone.now(),
+            average_rating=Decimal(random.randint(100, 500)) / 100,
+        )
+
+    @staticmethod
+    def make_review(pk):
+        return Review(
+            id=pk,
+            book_id=pk % 100 + 1,
+            reviewer_id=pk % 1000 + 1,
+            rating=random.randint(1, 5),
+            comment="A fine book. " * 10,
+            created_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
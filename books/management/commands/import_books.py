@@ -0,0 +1,283 @@
+import csv
+import functools
+import io
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router, transaction
+from django.utils import timezone
+from utils.bulk import batched, db_values, insert_rows
+from utils.counting import invalidate_counts
+
+from books.caching import invalidate_book_cache
+from books.models import Book
+
+# The columns read from the feed; ratings are derived from reviews instead.
+IMPORT_FIELDS = ["title", "author", "publishing_date", "category", "url"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Import books from a CSV or NDJSON file, streamed in batches. Rows are "
+        "validated against the Book fields, invalid ones are reported and skipped"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", help="CSV or NDJSON file to import, or - for standard input"
+        )
+        parser.add_argument(
+            "--format",
+            choices=["csv", "ndjson"],
+            help="Input format (default is guessed from the file extension)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Number of rows written per statement and transaction (default is 2000)",
+        )
+        parser.add_argument(
+            "--upsert",
+            action="store_true",
+            help="Update the books matching the natural key instead of adding duplicates",
+        )
+        parser.add_argument(
+            "--key",
+            default="title,author",
+            help="Comma-separated natural key used by --upsert (default is title,author)",
+        )
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Use bulk_create even on PostgreSQL, where COPY is used by default",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help=(
+                "File recording the number of records imported so far. An "
+                "interrupted import run again with it resumes where it stopped. "
+                "It is written after each batch is committed, so an interruption "
+                "in between imports that batch again: use --upsert to not add "
+                "duplicates"
+            ),
+        )
+        parser.add_argument(
+            "--max-errors",
+            type=int,
+            default=20,
+            help="Number of invalid rows reported individually (default is 20)",
+        )
+
+    def handle(self, *args, **kwargs):
+        self.batch_size = kwargs["batch_size"]
+        self.max_errors = kwargs["max_errors"]
+        self.using = router.db_for_write(Book)
+        connection = connections[self.using]
+
+        key = [name.strip() for name in kwargs["key"].split(",") if name.strip()]
+        unknown = set(key) - set(IMPORT_FIELDS)
+        if not key or unknown:
+            raise CommandError(f"--key must be made of: {', '.join(IMPORT_FIELDS)}")
+        if self.batch_size < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        path = kwargs["path"]
+        input_format = kwargs["format"] or self.guess_format(path)
+
+        if kwargs["upsert"]:
+            write = functools.partial(self.upsert, key=key)
+            method = "upsert"
+        elif connection.vendor == "postgresql" and not kwargs["no_copy"]:
+            write = self.copy
+            method = "COPY"
+        else:
+            write = self.insert
+            method = "bulk_create"
+
+        checkpoint = kwargs["checkpoint"]
+        done = self.read_checkpoint(checkpoint)
+        if done:
+            self.stdout.write(f"Resuming after {done} records from {checkpoint}")
+
+        self.invalid = 0
+        written = 0
+        started = time.monotonic()
+        with self.open(path) as stream:
+            # The records imported by a previous run are read but skipped
+            records = self.read_records(stream, input_format)
+            for batch in batched(islice(records, done, None), self.batch_size):
+                books = [book for book in map(self.clean, batch) if book is not None]
+                with transaction.atomic(using=self.using):
+                    updated_ids = write(books)
+                # Bulk writes send no signals
+                if updated_ids:
+                    invalidate_book_cache(*updated_ids)
+                written += len(books)
+                done += len(batch)
+                # After the commit: an interruption in between imports this
+                # batch again, which only --upsert does without duplicates
+                self.write_checkpoint(checkpoint, done)
+
+                if kwargs["verbosity"] > 1:
+                    self.stdout.write(
+                        f"{done} records, {written / (time.monotonic() - started):,.0f} rows/s"
+                    )
+
+        # The catalog pages, whatever was written
+        invalidate_book_cache()
+        invalidate_counts(Book)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {written} books with {method} in {elapsed:.1f}s "
+                f"({written / elapsed if elapsed else 0:,.0f} rows/s), "
+                f"{self.invalid} invalid rows skipped."
+            )
+        )
+
+    @staticmethod
+    def guess_format(path):
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".csv":
+            return "csv"
+        if extension in (".ndjson", ".jsonl"):
+            return "ndjson"
+        raise CommandError("Cannot guess the input format, use --format.")
+
+    @staticmethod
+    def open(path):
+        if path == "-":
+            return io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+        try:
+            return open(path, encoding="utf-8", newline="")
+        except OSError as error:
+            raise CommandError(f"Cannot open {path}: {error}")
+
+    @staticmethod
+    def read_records(stream, input_format):
+        """Yield ``(line number, record dict or error message)`` for every record."""
+        if input_format == "csv":
+            reader = csv.DictReader(stream)
+            for record in reader:
+                yield reader.line_num, record
+            return
+
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as error:
+                yield line_number, f"invalid JSON: {error}"
+                continue
+            if not isinstance(record, dict):
+                yield line_number, "expected a JSON object"
+                continue
+            yield line_number, record
+
+    def clean(self, numbered_record):
+        """Validate a record against the Book fields; return a Book or None."""
+        line_number, record = numbered_record
+        if isinstance(record, str):
+            self.report(line_number, record)
+            return None
+
+        values = {}
+        errors = []
+        for name in IMPORT_FIELDS:
+            field = Book._meta.get_field(name)
+            raw = record.get(name)
+            if isinstance(raw, str):
+                raw = raw.strip()
+            try:
+                values[name] = field.clean(raw, None)
+            except ValidationError as error:
+                errors.append(f"{name}: {' '.join(error.messages)}")
+        if errors:
+            self.report(line_number, "; ".join(errors))
+            return None
+        return Book(**values)
+
+    def report(self, line_number, message):
+        self.invalid += 1
+        if self.invalid <= self.max_errors:
+            self.stderr.write(f"Line {line_number}: {message}")
+        elif self.invalid == self.max_errors + 1:
+            self.stderr.write("Further invalid rows are not reported.")
+
+    def insert(self, books):
+        """Insert ``books``, returning the ids of the updated books: none."""
+        Book.objects.using(self.using).bulk_create(books)
+        return []
+
+    def copy(self, books):
+        """Insert ``books`` with PostgreSQL's COPY, the fastest way in."""
+        connection = connections[self.using]
+        fields = [
+            field for field in Book._meta.concrete_fields if not field.primary_key
+        ]
+        rows = (db_values(book, fields, connection) for book in books)
+        insert_rows(Book, fields, rows, self.using)
+        return []
+
+    def upsert(self, books, key):
+        """
+        Update the books whose natural key already exists, insert the others.
+
+        Returns:
+            list: The ids of the updated books, whose cached details are stale.
+        """
+        by_key = {}
+        for book in books:
+            # The last occurrence of a key in the batch wins
+            by_key[tuple(getattr(book, name) for name in key)] = book
+
+        existing = Book.objects.using(self.using).filter(
+            **{f"{name}__in": {k[i] for k in by_key} for i, name in enumerate(key)}
+        )
+        existing_ids = {
+            tuple(row[1:]): row[0] for row in existing.values_list("id", *key)
+        }
+
+        now = timezone.now()
+        updates = []
+        for book_key, book in by_key.items():
+            if book_key in existing_ids:
+                book.pk = existing_ids[book_key]
+                book.updated_at = now
+                updates.append(book)
+
+        Book.objects.using(self.using).bulk_create(
+            [book for book in by_key.values() if book.pk is None]
+        )
+        Book.objects.using(self.using).bulk_update(
+            updates, IMPORT_FIELDS + ["updated_at"]
+        )
+        return [book.pk for book in updates]
+
+    @staticmethod
+    def read_checkpoint(path):
+        if not path or not os.path.exists(path):
+            return 0
+        try:
+            with open(path) as checkpoint:
+                return int(json.load(checkpoint)["records"])
+        except (ValueError, KeyError, TypeError) as error:
+            raise CommandError(f"Invalid checkpoint file {path}: {error}")
+
+    @staticmethod
+    def write_checkpoint(path, records):
+        if not path:
+            return
+        # Write then rename, so an interruption never leaves a partial file
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as checkpoint:
+            json.dump({"records": records}, checkpoint)
+        os.replace(temporary, path)
@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from books.rating_queue import run_worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the rating aggregates and rankings of the books queued by "
+        "review writes in deferred mode (RATING_RECOMPUTE_MODE=deferred), "
+        "once per book and pass, every RATING_RECOMPUTE_INTERVAL seconds"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help=(
+                "Seconds between passes, the bound on how stale the ratings "
+                "get (default is RATING_RECOMPUTE_INTERVAL)"
+            ),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Marks processed per transaction (default is 1000)",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Process the pending marks once and exit",
+        )
+
+    def handle(self, *args, **kwargs):
+        if kwargs["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+        interval = kwargs["interval"]
+        if interval is None:
+            interval = settings.RATING_RECOMPUTE_INTERVAL
+        if interval < 0:
+            raise CommandError("--interval must not be negative")
+
+        def log(marks, books, seconds):
+            self.stdout.write(
+                f"Recomputed {books} books for {marks} marks in {seconds:.2f}s"
+            )
+
+        try:
+            run_worker(
+                interval=interval,
+                batch_size=kwargs["batch_size"],
+                passes=1 if kwargs["once"] else None,
+                log=log,
+            )
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped.")
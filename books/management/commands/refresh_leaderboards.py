@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from books.leaderboards import refresh_rankings
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the top-rated and trending leaderboards of every book. "
+        "Review writes keep them up to date in between; run it periodically, "
+        "e.g. hourly, and after bulk imports"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rankings written per statement (default is 1000)",
+        )
+
+    def handle(self, *args, **kwargs):
+        if kwargs["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        started = time.monotonic()
+        written = refresh_rankings(batch_size=kwargs["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Refreshed the rankings of {written} books "
+                f"in {time.monotonic() - started:.1f}s"
+            )
+        )
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.16 on 2026-10-16 23:56
+
+from django.db import migrations, models
+from django.db.models import Count, FloatField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Book = apps.get_model("books", "Book")
+    Review = apps.get_model("reviews", "Review")
+
+    reviews = Review.objects.filter(book=OuterRef("pk")).order_by().values("book")
+    rating_count = Coalesce(
+        Subquery(reviews.annotate(count=Count("pk")).values("count")), 0
+    )
+    rating_sum = Coalesce(
+        Subquery(reviews.annotate(total=Sum("rating")).values("total")), 0
+    )
+    Book.objects.update(
+        rating_count=rating_count,
+        rating_sum=rating_sum,
+        average_rating=Coalesce(
+            Round(Cast(rating_sum, FloatField()) / NullIf(rating_count, 0), 2),
+            Value(0.0),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0001_initial"),
+        ("reviews", "0003_review_unique_book_reviewer"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="book",
+            name="rating_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
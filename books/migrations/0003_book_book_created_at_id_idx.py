@@ -0,0 +1,19 @@
+# Generated by Django 4.2.16 on 2026-10-16 23:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0002_book_rating_count_book_rating_sum"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                fields=["created_at", "id"], name="book_created_at_id_idx"
+            ),
+        ),
+    ]
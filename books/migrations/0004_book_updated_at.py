@@ -0,0 +1,26 @@
+# Generated by Django 4.2.16 on 2026-10-17 00:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0003_book_book_created_at_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="book",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(fields=["updated_at"], name="book_updated_at_idx"),
+        ),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 4.2.16 on 2026-10-17 00:45
+
+from django.db import migrations
+
+from books.search import install_search, uninstall_search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0004_book_updated_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.16 on 2026-10-17 00:51
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from books.search import install_search
+
+
+def backfill_rating_histogram(apps, schema_editor):
+    Book = apps.get_model("books", "Book")
+    Review = apps.get_model("reviews", "Review")
+
+    reviews = Review.objects.filter(book=OuterRef("pk")).order_by().values("book")
+    Book.objects.update(
+        **{
+            f"rating_{rating}_count": Coalesce(
+                Subquery(
+                    reviews.filter(rating=rating)
+                    .annotate(count=Count("pk"))
+                    .values("count")
+                ),
+                0,
+            )
+            for rating in range(1, 6)
+        }
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0006_catalog_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="book",
+            name="rating_1_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="rating_2_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="rating_3_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="rating_4_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="rating_5_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_histogram, migrations.RunPython.noop),
+        # Adding the columns rebuilt the table on SQLite, dropping the search
+        # triggers
+        migrations.RunPython(install_search, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.16 on 2026-10-17 00:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0007_book_rating_histogram"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookRanking",
+            fields=[
+                (
+                    "book",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="ranking",
+                        serialize=False,
+                        to="books.book",
+                    ),
+                ),
+                ("bayesian_rating", models.FloatField(default=0.0)),
+                ("trending_score", models.FloatField(default=0.0)),
+                ("refreshed_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["-bayesian_rating", "book"], name="ranking_bayesian_idx"
+                    ),
+                    models.Index(
+                        fields=["-trending_score", "book"], name="ranking_trending_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.16 on 2026-10-17 00:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0008_book_ranking"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RatingRecomputeMark",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("marked_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "book",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="books.book",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.16 on 2026-10-17 01:13
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_prior_mean(apps, schema_editor):
+    Book = apps.get_model("books", "Book")
+    BookRanking = apps.get_model("books", "BookRanking")
+
+    totals = Book.objects.aggregate(total=Sum("rating_sum"), count=Sum("rating_count"))
+    if totals["count"]:
+        BookRanking.objects.update(prior_mean=totals["total"] / totals["count"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0009_rating_recompute_mark"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bookranking",
+            name="prior_mean",
+            field=models.FloatField(default=3.0),
+        ),
+        migrations.RunPython(backfill_prior_mean, migrations.RunPython.noop),
+    ]
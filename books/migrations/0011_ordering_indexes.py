@@ -0,0 +1,67 @@
+# Generated by Django 4.2.16 on 2026-10-17 01:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0010_bookranking_prior_mean"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="book",
+            name="book_category_rating_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="book",
+            name="book_author_pubdate_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="book",
+            name="book_pubdate_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="book",
+            name="book_rating_idx",
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                fields=["category", "average_rating", "id"],
+                name="book_category_rating_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                fields=["author", "publishing_date", "id"],
+                name="book_author_pubdate_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                fields=["publishing_date", "id"], name="book_pubdate_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(fields=["average_rating", "id"], name="book_rating_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(fields=["title", "id"], name="book_title_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(fields=["author", "id"], name="book_author_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                fields=["rating_count", "id"], name="book_rating_count_idx"
+            ),
+        ),
+    ]
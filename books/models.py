@@ -1,5 +1,60 @@
 from django.db import models
-from django.db.models import Avg
+from django.db.models import Count, F, FloatField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
+from django.utils import timezone
+
+# The ratings a review can give, each with a counter on Book
+RATINGS = (1, 2, 3, 4, 5)
+
+
+def rating_bucket(rating):
+    """Name of the ``Book`` field counting the reviews with ``rating``."""
+    return f"rating_{rating}_count"
+
+
+def _average_rating_expression(rating_sum, rating_count):
+    """Build the SQL expression deriving ``average_rating`` from the sum and count."""
+    return Coalesce(
+        Round(Cast(rating_sum, FloatField()) / NullIf(rating_count, 0), 2),
+        Value(0.0),
+    )
+
+
+class BookQuerySet(models.QuerySet):
+    def recompute_ratings(self):
+        """
+        Recalculate the rating aggregates of every book in the queryset from its
+        reviews using a single set-based UPDATE.
+
+        Returns:
+            int: The number of books updated.
+        """
+        Review = self.model._meta.get_field("reviews").related_model
+        reviews = Review.objects.filter(book=OuterRef("pk")).order_by().values("book")
+        rating_count = Coalesce(
+            Subquery(reviews.annotate(count=Count("pk")).values("count")), 0
+        )
+        rating_sum = Coalesce(
+            Subquery(reviews.annotate(total=Sum("rating")).values("total")), 0
+        )
+        buckets = {
+            rating_bucket(rating): Coalesce(
+                Subquery(
+                    reviews.filter(rating=rating)
+                    .annotate(count=Count("pk"))
+                    .values("count")
+                ),
+                0,
+            )
+            for rating in RATINGS
+        }
+        return self.update(
+            rating_count=rating_count,
+            rating_sum=rating_sum,
+            average_rating=_average_rating_expression(rating_sum, rating_count),
+            updated_at=timezone.now(),
+            **buckets,
+        )
 
 
 class Book(models.Model):
@@ -13,13 +68,21 @@ class Book(models.Model):
         category (str): The category of the book, limited to 50 characters.
         url (str): A URL for the book (e.g., a link to its online page).
         created_at (datetime): The timestamp when the book entry was created.
+        updated_at (datetime): The timestamp of the last change to the book,
+            including changes to its rating aggregates.
         average_rating (Decimal): The cached average rating of the book,
             represented as a decimal with a maximum of 3 digits and 2 decimal places.
             Defaults to 0.00.
+        rating_count (int): The number of reviews of the book.
+        rating_sum (int): The sum of the ratings of all reviews of the book.
+        rating_1_count ... rating_5_count (int): The number of reviews giving
+            each rating, the book's rating histogram.
 
     Methods:
         update_average_rating():
             Recalculates and updates the average rating based on related reviews.
+        apply_rating_change(book_id, added=None, removed=None):
+            Atomically applies a single review's rating change to the aggregates.
 
     Example:
         book = Book(title="Example Book", author="Author Name", publishing_date="2024-01-01",
@@ -34,18 +97,154 @@ class Book(models.Model):
     category = models.CharField(max_length=50)
     url = models.URLField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     average_rating = models.DecimalField(
         max_digits=3, decimal_places=2, default=0.00
-    )  # Cached average rating
+    )  # Cached average rating, derived from rating_sum / rating_count
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+
+    objects = BookQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset (cursor) pagination
+            models.Index(fields=["created_at", "id"], name="book_created_at_id_idx"),
+            # MAX(updated_at) for conditional requests
+            models.Index(fields=["updated_at"], name="book_updated_at_idx"),
+            # Catalog filters and orderings, ending with the id tie-breaker of
+            # books.filters.BookOrderingFilter
+            models.Index(
+                fields=["category", "average_rating", "id"],
+                name="book_category_rating_idx",
+            ),
+            models.Index(
+                fields=["author", "publishing_date", "id"],
+                name="book_author_pubdate_idx",
+            ),
+            models.Index(fields=["publishing_date", "id"], name="book_pubdate_idx"),
+            models.Index(fields=["average_rating", "id"], name="book_rating_idx"),
+            models.Index(fields=["title", "id"], name="book_title_idx"),
+            models.Index(fields=["author", "id"], name="book_author_idx"),
+            models.Index(fields=["rating_count", "id"], name="book_rating_count_idx"),
+        ]
 
     def update_average_rating(self):
         """
         Recalculate and update the average rating based on related reviews.
+
+        Only the rating columns are written, so concurrent edits to other
+        fields of the book are not overwritten.
+        """
+        Book.objects.filter(pk=self.pk).recompute_ratings()
+        self.refresh_from_db(
+            fields=["rating_count", "rating_sum", "average_rating"]
+            + [rating_bucket(rating) for rating in RATINGS]
+        )
+
+    @classmethod
+    def apply_rating_change(cls, book_id, added=None, removed=None):
         """
-        reviews = self.reviews.all()
-        avg_rating = reviews.aggregate(Avg("rating"))["rating__avg"] or 0.00
-        self.average_rating = round(avg_rating, 2)
-        self.save()
+        Atomically apply a single review's rating change to the cached aggregates.
+
+        The counters, histogram buckets included, are updated in place with
+        F-expressions, so the cost does not depend on how many reviews the
+        book already has.
+
+        Args:
+            book_id (int): The primary key of the reviewed book.
+            added (int, optional): The rating of a review added to the book.
+            removed (int, optional): The rating of a review removed from the book.
+        """
+        count_delta = (added is not None) - (removed is not None)
+        sum_delta = (added or 0) - (removed or 0)
+        if added == removed:
+            return
+
+        buckets = {}
+        if added is not None:
+            buckets[rating_bucket(added)] = F(rating_bucket(added)) + 1
+        if removed is not None:
+            buckets[rating_bucket(removed)] = F(rating_bucket(removed)) - 1
+        rating_count = F("rating_count") + count_delta
+        rating_sum = F("rating_sum") + sum_delta
+        cls.objects.filter(pk=book_id).update(
+            rating_count=rating_count,
+            rating_sum=rating_sum,
+            average_rating=_average_rating_expression(rating_sum, rating_count),
+            updated_at=timezone.now(),
+            **buckets,
+        )
+
+    @property
+    def rating_histogram(self):
+        """The number of reviews giving each rating, by rating."""
+        return {rating: getattr(self, rating_bucket(rating)) for rating in RATINGS}
 
     def __str__(self):
         return self.title
+
+
+class BookRanking(models.Model):
+    """
+    Precomputed leaderboard scores of a book, see ``books.leaderboards``.
+
+    Attributes:
+        book (Book): The ranked book, also the primary key.
+        bayesian_rating (float): The average rating pulled towards the mean of
+            all ratings, by ``LEADERBOARD_PRIOR_WEIGHT`` virtual reviews.
+        trending_score (float): The number of reviews of the book, each
+            weighted by how recent it is, scaled to ``leaderboards.EPOCH``.
+        prior_mean (float): The mean of all ratings at the last refresh, the
+            rating ``bayesian_rating`` is pulled towards.
+        refreshed_at (datetime): The last batch refresh of the row.
+    """
+
+    book = models.OneToOneField(
+        Book, on_delete=models.CASCADE, primary_key=True, related_name="ranking"
+    )
+    bayesian_rating = models.FloatField(default=0.0)
+    trending_score = models.FloatField(default=0.0)
+    prior_mean = models.FloatField(default=3.0)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Top-N leaderboards, read as index range scans
+            models.Index(
+                fields=["-bayesian_rating", "book"], name="ranking_bayesian_idx"
+            ),
+            models.Index(
+                fields=["-trending_score", "book"], name="ranking_trending_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Ranking of book {self.book_id}"
+
+
+class RatingRecomputeMark(models.Model):
+    """
+    A book whose rating aggregates and rankings are to be recomputed, see
+    ``books.rating_queue``.
+
+    Marks are only ever inserted by review writes, never updated, so writers
+    do not contend with each other; repeated marks of a book are merged by
+    the worker.
+
+    Attributes:
+        book (Book): The book to recompute.
+        marked_at (datetime): When the book was marked.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name="+")
+    marked_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Recompute book {self.book_id}"
@@ -0,0 +1,103 @@
+"""
+Deferred recomputation of the rating aggregates and leaderboard rankings.
+
+With ``settings.RATING_RECOMPUTE_MODE = "deferred"``, review writes do not
+update the book: they insert a ``RatingRecomputeMark`` for it, taking no lock
+on the book or its ranking, so that concurrent reviews of a popular book do
+not queue up behind each other. A worker (``manage.py process_rating_queue``)
+takes the pending marks every ``settings.RATING_RECOMPUTE_INTERVAL`` seconds,
+merges the marks of each book, and recomputes each marked book once from its
+reviews.
+
+The rating aggregates, histogram and rankings of a book are thus at most the
+interval, plus the duration of a pass, behind its reviews. With the default
+``"sync"`` mode they are updated within the write, see ``books.signals``.
+"""
+
+import time
+
+from django.conf import settings
+from django.db import connections, router, transaction
+
+from .caching import invalidate_book_cache
+from .leaderboards import refresh_rankings
+from .models import Book, RatingRecomputeMark
+
+DEFERRED = "deferred"
+
+
+def is_deferred():
+    return settings.RATING_RECOMPUTE_MODE == DEFERRED
+
+
+def mark_books(*book_ids):
+    """Queue the books of ``book_ids`` for recomputation, with one INSERT."""
+    RatingRecomputeMark.objects.bulk_create(
+        [RatingRecomputeMark(book_id=book_id) for book_id in set(book_ids)]
+    )
+
+
+def process_batch(batch_size=1000):
+    """
+    Recompute the books of up to ``batch_size`` pending marks, then delete them.
+
+    Runs in one transaction. Where the database supports it, the marks are
+    locked with SKIP LOCKED, so that several workers share the queue instead
+    of recomputing the same books.
+
+    Returns:
+        tuple: The number of marks processed and of books recomputed.
+    """
+    using = router.db_for_write(RatingRecomputeMark)
+    marks = RatingRecomputeMark.objects.using(using).order_by("id")
+    if connections[using].features.has_select_for_update_skip_locked:
+        marks = marks.select_for_update(skip_locked=True)
+
+    with transaction.atomic(using=using):
+        pending = list(marks.values_list("id", "book_id")[:batch_size])
+        if not pending:
+            return 0, 0
+
+        book_ids = {book_id for _, book_id in pending}
+        Book.objects.filter(pk__in=book_ids).recompute_ratings()
+        refresh_rankings(book_ids=book_ids)
+        # Marks added in the meantime are left for the next batch
+        RatingRecomputeMark.objects.using(using).filter(
+            id__in=[mark_id for mark_id, _ in pending]
+        ).delete()
+
+    invalidate_book_cache(*book_ids)
+    return len(pending), len(book_ids)
+
+
+def process_queue(batch_size=1000):
+    """
+    Process batches until no marks are pending.
+
+    Returns:
+        tuple: The number of marks processed and of book recomputations.
+    """
+    marks = books = 0
+    while True:
+        batch_marks, batch_books = process_batch(batch_size)
+        if not batch_marks:
+            return marks, books
+        marks += batch_marks
+        books += batch_books
+
+
+def run_worker(interval=None, batch_size=1000, passes=None, log=None):
+    """
+    Process the queue every ``interval`` seconds (by default
+    ``settings.RATING_RECOMPUTE_INTERVAL``), ``passes`` times or forever.
+    """
+    interval = settings.RATING_RECOMPUTE_INTERVAL if interval is None else interval
+    done = 0
+    while passes is None or done < passes:
+        started = time.monotonic()
+        marks, books = process_queue(batch_size)
+        if log and marks:
+            log(marks, books, time.monotonic() - started)
+        done += 1
+        if passes is None or done < passes:
+            time.sleep(max(interval - (time.monotonic() - started), 0))
@@ -0,0 +1,147 @@
+"""
+Full-text search over book titles and authors.
+
+On Postgres, ``books_book.search_vector`` is a generated ``tsvector`` column
+(title weighted above author) with a GIN index, so the database keeps it up
+to date on every write, bulk ones included. On SQLite an FTS5 external-content
+table, ``books_book_fts``, is kept in sync by triggers. Other backends fall
+back to case-insensitive substring matching.
+
+The column, table and triggers are not part of the Django model state; they
+are created by migrations through ``install_search``.
+"""
+
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = "english"
+
+POSTGRES_INSTALL = [
+    f"""
+    ALTER TABLE books_book ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(author, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS book_search_vector_idx "
+    "ON books_book USING GIN (search_vector)",
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS book_search_vector_idx",
+    "ALTER TABLE books_book DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_INSTALL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS books_book_fts USING fts5("
+    "title, author, content='books_book', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS books_book_fts_insert AFTER INSERT ON books_book "
+    "BEGIN INSERT INTO books_book_fts(rowid, title, author) "
+    "VALUES (new.id, new.title, new.author); END",
+    "CREATE TRIGGER IF NOT EXISTS books_book_fts_delete AFTER DELETE ON books_book "
+    "BEGIN INSERT INTO books_book_fts(books_book_fts, rowid, title, author) "
+    "VALUES ('delete', old.id, old.title, old.author); END",
+    "CREATE TRIGGER IF NOT EXISTS books_book_fts_update "
+    "AFTER UPDATE OF title, author ON books_book "
+    "BEGIN INSERT INTO books_book_fts(books_book_fts, rowid, title, author) "
+    "VALUES ('delete', old.id, old.title, old.author); "
+    "INSERT INTO books_book_fts(rowid, title, author) "
+    "VALUES (new.id, new.title, new.author); END",
+    # Index the rows that already exist
+    "INSERT INTO books_book_fts(books_book_fts) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS books_book_fts_insert",
+    "DROP TRIGGER IF EXISTS books_book_fts_delete",
+    "DROP TRIGGER IF EXISTS books_book_fts_update",
+    "DROP TABLE IF EXISTS books_book_fts",
+]
+
+
+def install_search(apps, schema_editor):
+    """
+    Create the search column/table and its index or triggers.
+
+    Idempotent. On SQLite it must run again after any migration that rebuilds
+    the ``books_book`` table, since the triggers are dropped with it.
+    """
+    vendor = schema_editor.connection.vendor
+    statements = {"postgresql": POSTGRES_INSTALL, "sqlite": SQLITE_INSTALL}
+    for statement in statements.get(vendor, []):
+        schema_editor.execute(statement)
+
+
+def uninstall_search(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {"postgresql": POSTGRES_UNINSTALL, "sqlite": SQLITE_UNINSTALL}
+    for statement in statements.get(vendor, []):
+        schema_editor.execute(statement)
+
+
+def _fts5_query(text):
+    """
+    Turn free text into an FTS5 query matching every word as a prefix.
+
+    Each word is quoted, so FTS5 operators in user input are not interpreted.
+    """
+    words = re.findall(r"\w+", text)
+    return " ".join('"{}"*'.format(word) for word in words)
+
+
+def search_books(queryset, text):
+    """
+    Filter ``queryset`` to the books matching ``text``.
+
+    The matches are annotated with ``search_rank``, where higher means more
+    relevant.
+    """
+    vendor = connections[queryset.db].vendor
+
+    if vendor == "postgresql":
+        query = f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+        return queryset.annotate(
+            search_rank=RawSQL(
+                f'ts_rank("books_book"."search_vector", {query})',
+                (text,),
+                output_field=FloatField(),
+            )
+        ).filter(
+            RawSQL(
+                f'"books_book"."search_vector" @@ {query}',
+                (text,),
+                output_field=BooleanField(),
+            )
+        )
+
+    if vendor == "sqlite":
+        match = _fts5_query(text)
+        if not match:
+            return queryset.annotate(
+                search_rank=Value(0.0, output_field=FloatField())
+            ).none()
+        return queryset.annotate(
+            # bm25() is lower for better matches
+            search_rank=RawSQL(
+                "(SELECT -bm25(books_book_fts) FROM books_book_fts "
+                'WHERE books_book_fts MATCH %s AND rowid = "books_book"."id")',
+                (match,),
+                output_field=FloatField(),
+            )
+        ).filter(
+            RawSQL(
+                '"books_book"."id" IN (SELECT rowid FROM books_book_fts '
+                "WHERE books_book_fts MATCH %s)",
+                (match,),
+                output_field=BooleanField(),
+            )
+        )
+
+    matches = Q(title__icontains=text) | Q(author__icontains=text)
+    return queryset.filter(matches).annotate(
+        search_rank=Value(0.0, output_field=FloatField())
+    )
@@ -2,15 +2,28 @@
 This module contains serializers for the Book model.
 
 The BookSerializer handles serialization and deserialization of Book instances,
-including formatting the average rating to two decimal places.
+including formatting the average rating to two decimal places. The
+``book_rows`` serializer produces the same output from ``values()`` rows for
+the list endpoint. BookDetailSerializer adds the rating histogram for the
+detail endpoint, and ``book_detail_row`` does the same for a ``values()`` row.
 """
 
+from decimal import Decimal
+
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
+from utils.timing import TimedSerializerMixin
+from utils.ValuesRowSerializer import ValuesRowSerializer
+
+from .models import RATINGS, Book, rating_bucket
+
 
-from .models import Book
+def format_rating(value):
+    """Format a rating with two decimal places, e.g. '1.25'."""
+    return format(value, ".2f")
 
 
-class BookSerializer(serializers.ModelSerializer):
+class BookSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Book
         fields = [
@@ -23,10 +36,80 @@ class BookSerializer(serializers.ModelSerializer):
             "average_rating",
         ]
 
-        def to_representation(self, instance):
-            representation = super().to_representation(instance)
-            # Format average_rating to have two decimal place
-            representation["average_rating"] = format(
-                instance.average_rating, ".2f"
-            )  # Format as '1.25'
-            return representation
+    def to_representation(self, instance):
+        representation = super().to_representation(instance)
+        # Format average_rating to have two decimal place
+        representation["average_rating"] = format_rating(instance.average_rating)
+        return representation
+
+
+def format_histogram(counts):
+    """Format a ``{rating: count}`` histogram with string keys, as in JSON."""
+    return {str(rating): count for rating, count in counts.items()}
+
+
+class BookDetailSerializer(BookSerializer):
+    """A book with its rating histogram, read from counters kept on the book."""
+
+    rating_histogram = serializers.SerializerMethodField()
+
+    class Meta(BookSerializer.Meta):
+        fields = BookSerializer.Meta.fields + ["rating_histogram"]
+
+    @extend_schema_field(
+        {
+            "type": "object",
+            "description": "Number of reviews giving each rating, 1 to 5",
+            "additionalProperties": {"type": "integer"},
+            "example": {"1": 0, "2": 1, "3": 4, "4": 10, "5": 7},
+        }
+    )
+    def get_rating_histogram(self, instance):
+        return format_histogram(instance.rating_histogram)
+
+
+class LeaderboardEntrySerializer(BookSerializer):
+    """A book of a leaderboard, with the score it is ranked by."""
+
+    score = serializers.FloatField(read_only=True)
+
+    class Meta(BookSerializer.Meta):
+        fields = BookSerializer.Meta.fields + ["score"]
+
+
+class LeaderboardParamsSerializer(serializers.Serializer):
+    """Validates the query parameters of the leaderboards."""
+
+    limit = serializers.IntegerField(
+        required=False, default=10, min_value=1, max_value=100
+    )
+
+
+class BookFilterSerializer(serializers.Serializer):
+    """Validates the catalog filter query parameters of the book list."""
+
+    category = serializers.CharField(required=False, max_length=50)
+    author = serializers.CharField(required=False, max_length=50)
+    published_after = serializers.DateField(required=False)
+    published_before = serializers.DateField(required=False)
+    min_rating = serializers.DecimalField(
+        required=False,
+        max_digits=3,
+        decimal_places=2,
+        min_value=Decimal(0),
+        max_value=Decimal(5),
+    )
+
+
+book_rows = ValuesRowSerializer(
+    BookSerializer, formatters={"average_rating": format_rating}
+)
+
+
+def book_detail_row(row):
+    """Represent a ``values()`` row like BookDetailSerializer."""
+    data = book_rows.to_representation(row)
+    data["rating_histogram"] = format_histogram(
+        {rating: row[rating_bucket(rating)] for rating in RATINGS}
+    )
+    return data
@@ -1,9 +1,87 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from reviews.models import Review
+from utils.counting import invalidate_counts
 
+from books import rating_queue
+from books.caching import invalidate_book_cache
+from books.leaderboards import trending_delta, update_rankings
+from books.models import Book
 
+
+@receiver(post_save, sender=Review)
+def update_book_average_rating(sender, instance, created, **kwargs):
+    """
+    Update the rating aggregates and the leaderboard rankings of the book
+    whenever a review is created or updated, or queue the book for the
+    rating queue worker in deferred mode (see ``books.rating_queue``).
+    """
+    loaded = getattr(instance, "_loaded_values", None)
+    book_ids = [instance.book_id]
+    weight = trending_delta(instance.created_at)
+    if rating_queue.is_deferred():
+        # Only queue the books, the rating queue worker recomputes them.
+        if loaded and loaded.get("book_id", instance.book_id) != instance.book_id:
+            book_ids.append(loaded["book_id"])
+        if (
+            created
+            or not loaded
+            or loaded.get("rating") != instance.rating
+            or len(book_ids) > 1
+        ):
+            rating_queue.mark_books(*book_ids)
+    elif created:
+        Book.apply_rating_change(instance.book_id, added=instance.rating)
+        update_rankings({instance.book_id: weight})
+    elif loaded is None or "rating" not in loaded or "book_id" not in loaded:
+        # The previous rating is unknown, so fall back to a full recalculation.
+        Book.objects.filter(pk=instance.book_id).recompute_ratings()
+        update_rankings({instance.book_id: 0.0})
+    elif loaded["book_id"] == instance.book_id:
+        if loaded["rating"] != instance.rating:
+            Book.apply_rating_change(
+                instance.book_id, added=instance.rating, removed=loaded["rating"]
+            )
+            update_rankings({instance.book_id: 0.0})
+    else:
+        # The review was moved to another book.
+        Book.apply_rating_change(loaded["book_id"], removed=loaded["rating"])
+        Book.apply_rating_change(instance.book_id, added=instance.rating)
+        update_rankings({loaded["book_id"]: -weight, instance.book_id: weight})
+        book_ids.append(loaded["book_id"])
+
+    instance._loaded_values = {"book_id": instance.book_id, "rating": instance.rating}
+    invalidate_book_cache(*book_ids)
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_from_book_rating(sender, instance, origin=None, **kwargs):
+    """Remove a deleted review's rating from the aggregates and rankings of its book."""
+    if isinstance(origin, Book):
+        # The book itself is being deleted, there is nothing to update.
+        return
+
+    loaded = getattr(instance, "_loaded_values", None) or {}
+    book_id = loaded.get("book_id", instance.book_id)
+    if rating_queue.is_deferred():
+        rating_queue.mark_books(book_id)
+    else:
+        Book.apply_rating_change(book_id, removed=loaded.get("rating", instance.rating))
+        update_rankings({book_id: -trending_delta(instance.created_at)})
+    invalidate_book_cache(book_id)
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def invalidate_cached_book_responses(sender, instance, **kwargs):
+    """Invalidate the cached responses showing a book that was written."""
+    invalidate_book_cache(instance.pk)
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
 @receiver(post_save, sender=Review)
-def update_book_average_rating(sender, instance, **kwargs):
-    """Update the average rating of the book whenever a review is created or updated."""
-    instance.book.update_average_rating()
+@receiver(post_delete, sender=Review)
+def invalidate_cached_counts(sender, **kwargs):
+    """Invalidate the cached list counts of the model that was written."""
+    invalidate_counts(sender)
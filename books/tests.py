@@ -1,17 +1,39 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 from reviews.models import Review
 
-from books.models import Book
-from books.serializers import BookSerializer
+from books import caching, leaderboards, rating_queue
+from books.filters import BookOrderingFilter
+from books.models import Book, RatingRecomputeMark
+from books.serializers import (
+    BookDetailSerializer,
+    BookSerializer,
+    book_detail_row,
+    book_rows,
+)
 
 
 class BookViewTests(APITestCase):
 
     def setUp(self):
+        # Reset the throttle history shared through the cache
+        cache.clear()
+
         # Create a user for testing
         self.user = User.objects.create_user(
             username="testuser", password="testpassword"
@@ -66,6 +88,711 @@ class BookViewTests(APITestCase):
         self.assertEqual(response.data["title"], "Test Book")
         self.assertEqual(response.data["author"], "Test Author")
 
+    def test_list_books_cursor_pagination(self):
+        """Test that books can be listed with cursor pagination."""
+        newer_book = Book.objects.create(
+            title="Newer Book",
+            author="Test Author",
+            publishing_date="2024-01-01",
+            category="Fiction",
+            url="http://test.com",
+        )
+
+        response = self.client.get(
+            reverse("book-list") + "?paginate=cursor&page_size=1"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["id"], newer_book.id)
+        self.assertIsNotNone(response.data["links"]["next"])
+
+        response = self.client.get(response.data["links"]["next"])
+        self.assertEqual(response.data["results"][0]["id"], self.book.id)
+        self.assertIsNone(response.data["links"]["next"])
+
+
+class BookCountTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.book = Book.objects.create(
+            title="Test Book",
+            author="Test Author",
+            publishing_date="2024-01-01",
+            category="Fiction",
+            url="http://test.com",
+        )
+
+    def test_cached_total_count_is_invalidated_on_write(self):
+        """Test that the cached total_count is refreshed after a book is added."""
+        response = self.client.get(reverse("book-list"))
+        self.assertEqual(response.data["total_count"], 1)
+        self.assertFalse(response.data["total_count_approximate"])
+
+        # The second request is answered from the cache without a COUNT query
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("book-list"))
+        self.assertFalse(any("COUNT(" in q["sql"] for q in queries.captured_queries))
+
+        Book.objects.create(
+            title="Another Book",
+            author="Test Author",
+            publishing_date="2024-01-01",
+            category="Fiction",
+            url="http://test.com",
+        )
+        response = self.client.get(reverse("book-list"))
+        self.assertEqual(response.data["total_count"], 2)
+
+
+class BookResponseCacheTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.book = Book.objects.create(
+            title="Test Book",
+            author="Test Author",
+            publishing_date="2024-01-01",
+            category="Fiction",
+            url="http://test.com",
+        )
+        self.user = User.objects.create_user(username="testuser", password="pass")
+
+    def test_list_is_served_from_cache(self):
+        """Test that a repeated list request does not load any book rows."""
+        self.client.get(reverse("book-list"))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("book-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["title"], "Test Book")
+        # Only the conditional-request validator (MAX(updated_at)) is queried
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"title"', queries[0]["sql"])
+        self.assertEqual(caching.get_stats()["hits"], 1)
+        self.assertEqual(caching.get_stats()["misses"], 1)
+
+    def test_review_write_invalidates_list_and_detail(self):
+        """Test that a new review is reflected in cached list and detail responses."""
+        list_url = reverse("book-list")
+        detail_url = reverse("book-detail", args=[self.book.id])
+        self.client.get(list_url)
+        self.client.get(detail_url)
+
+        Review.objects.create(book=self.book, reviewer=self.user, rating=3, comment="")
+
+        self.assertEqual(
+            self.client.get(list_url).data["results"][0]["average_rating"], "3.00"
+        )
+        self.assertEqual(self.client.get(detail_url).data["average_rating"], "3.00")
+
+    def test_book_write_invalidates_detail(self):
+        """Test that editing a book is reflected in its cached detail response."""
+        detail_url = reverse("book-detail", args=[self.book.id])
+        self.client.get(detail_url)
+
+        self.book.title = "Renamed Book"
+        self.book.save()
+
+        self.assertEqual(self.client.get(detail_url).data["title"], "Renamed Book")
+
+    def test_padded_book_id_shares_the_detail_cache(self):
+        """Test that a zero-padded id is cached, and invalidated, as the book's id."""
+        padded_url = reverse("book-detail", args=[f"0{self.book.id}"])
+        self.assertEqual(self.client.get(padded_url).data["title"], "Test Book")
+
+        self.book.title = "Renamed Book"
+        self.book.save()
+
+        self.assertEqual(self.client.get(padded_url).data["title"], "Renamed Book")
+
+    def test_conditional_get_book_detail(self):
+        """Test that a current ETag gets 304 until the book's rating changes."""
+        detail_url = reverse("book-detail", args=[self.book.id])
+        etag = self.client.get(detail_url)["ETag"]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(len(queries), 1)
+
+        Review.objects.create(book=self.book, reviewer=self.user, rating=3, comment="")
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["average_rating"], "3.00")
+
+    def test_invalid_book_id_is_not_found(self):
+        """Test that a non-numeric book id gets a 404, not a server error."""
+        response = self.client.get(reverse("book-detail", args=["abc"]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_conditional_get_book_list(self):
+        """Test that the book list answers If-None-Match with 304."""
+        etag = self.client.get(reverse("book-list"))["ETag"]
+        response = self.client.get(reverse("book-list"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Another page is another representation
+        response = self.client.get(
+            reverse("book-list") + "?page_size=5", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_cache_stats_requires_admin(self):
+        """Test that only admins can read the cache counters."""
+        url = reverse("book-cache-stats")
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        admin = User.objects.create_superuser(username="admin", password="pass")
+        self.client.force_authenticate(admin)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {"hits", "misses", "hit_ratio"})
+
+
+class BookSearchTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        for title, author in [
+            ("The Hobbit", "J. R. R. Tolkien"),
+            ("The Silmarillion", "J. R. R. Tolkien"),
+            ("Tolkien: A Biography", "Humphrey Carpenter"),
+            ("Dune", "Frank Herbert"),
+        ]:
+            Book.objects.create(
+                title=title,
+                author=author,
+                publishing_date="2024-01-01",
+                category="Fiction",
+                url="http://test.com",
+            )
+
+    def search(self, text):
+        response = self.client.get(reverse("book-list"), {"search": text})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [book["title"] for book in response.data["results"]]
+
+    def test_search_matches_title_and_author(self):
+        """Test that search matches words in both the title and the author."""
+        self.assertEqual(self.search("dune"), ["Dune"])
+        self.assertEqual(self.search("frank"), ["Dune"])
+        self.assertEqual(len(self.search("tolkien")), 3)
+
+    def test_search_is_ranked_and_paginated(self):
+        """Test that search results are paginated like the rest of the list."""
+        response = self.client.get(
+            reverse("book-list"), {"search": "tolkien", "page_size": 2}
+        )
+        self.assertEqual(response.data["total_count"], 3)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNotNone(response.data["links"]["next"])
+
+    def test_search_sees_updates(self):
+        """Test that the search index follows edits and deletions."""
+        book = Book.objects.get(title="Dune")
+        book.title = "Dune Messiah"
+        book.save()
+        self.assertEqual(self.search("messiah"), ["Dune Messiah"])
+
+        book.delete()
+        self.assertEqual(self.search("dune"), [])
+
+    def test_search_ignores_query_syntax(self):
+        """Test that search operators in user input do not cause errors."""
+        self.assertEqual(self.search('"dune" OR NEAR(*'), [])
+        self.assertEqual(self.search("***"), [])
+
+
+class BookFilterTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        for title, author, category, published, rating in [
+            ("Dune", "Frank Herbert", "Fiction", "1965-08-01", "4.50"),
+            ("Children of Dune", "Frank Herbert", "Fiction", "1976-04-01", "3.80"),
+            ("Cosmos", "Carl Sagan", "Science", "1980-01-01", "4.20"),
+            ("Contact", "Carl Sagan", "Fiction", "1985-09-01", "3.90"),
+        ]:
+            Book.objects.create(
+                title=title,
+                author=author,
+                publishing_date=published,
+                category=category,
+                url="http://test.com",
+                average_rating=Decimal(rating),
+            )
+
+    def titles(self, params):
+        response = self.client.get(reverse("book-list"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [book["title"] for book in response.data["results"]]
+
+    def test_filter_by_category_and_author(self):
+        """Test filtering on exact category and author."""
+        self.assertEqual(self.titles({"category": "Science"}), ["Cosmos"])
+        self.assertEqual(
+            self.titles({"author": "Carl Sagan", "category": "Fiction"}), ["Contact"]
+        )
+
+    def test_filter_by_publishing_date_range(self):
+        """Test that the publishing date range is inclusive."""
+        self.assertEqual(
+            self.titles(
+                {"published_after": "1976-04-01", "published_before": "1980-01-01"}
+            ),
+            ["Children of Dune", "Cosmos"],
+        )
+
+    def test_filter_by_min_rating(self):
+        """Test filtering on a minimum average rating."""
+        self.assertEqual(self.titles({"min_rating": "4.2"}), ["Dune", "Cosmos"])
+
+    def test_invalid_filters_are_rejected(self):
+        """Test that malformed filter values return 400."""
+        for params in [
+            {"published_after": "yesterday"},
+            {"min_rating": "6"},
+            {"min_rating": "high"},
+        ]:
+            response = self.client.get(reverse("book-list"), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ordering(self):
+        """Test whitelisted ordering, combined with filters."""
+        self.assertEqual(
+            self.titles({"category": "Fiction", "ordering": "-average_rating"}),
+            ["Dune", "Contact", "Children of Dune"],
+        )
+        self.assertEqual(
+            self.titles({"ordering": "publishing_date"}),
+            ["Dune", "Children of Dune", "Cosmos", "Contact"],
+        )
+
+    def test_orderings_use_an_index(self):
+        """Test that every whitelisted ordering reads an index instead of sorting."""
+        fields = BookOrderingFilter.ordering_fields
+        for params in [
+            *({"ordering": field} for field in fields),
+            *({"ordering": f"-{field}"} for field in fields),
+            {"category": "Fiction", "ordering": "-average_rating"},
+            {"author": "Carl Sagan", "ordering": "publishing_date"},
+        ]:
+            with self.subTest(**params):
+                cache.clear()  # The throttle history and cached responses
+                with CaptureQueriesContext(connection) as queries:
+                    self.titles(params)
+                page = next(q["sql"] for q in queries if "ORDER BY" in q["sql"])
+                with connection.cursor() as cursor:
+                    cursor.execute("EXPLAIN QUERY PLAN " + page)
+                    plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+                self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_ordering_ignores_unknown_fields(self):
+        """Test that fields outside the whitelist fall back to the default order."""
+        self.assertEqual(
+            self.titles({"ordering": "url"}),
+            ["Dune", "Children of Dune", "Cosmos", "Contact"],
+        )
+
+    def test_explicit_ordering_overrides_search_rank(self):
+        """Test that ?ordering= wins over the relevance order of ?search=."""
+        self.assertEqual(
+            self.titles({"search": "dune", "ordering": "-publishing_date"}),
+            ["Children of Dune", "Dune"],
+        )
+
+
+class AsyncBookViewTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="reader", password="secret")
+        self.books = [
+            Book.objects.create(
+                title=f"Async Book {i}",
+                author="Async Author",
+                publishing_date="2024-01-01",
+                category="Science" if i % 2 else "Fiction",
+                url="http://test.com",
+            )
+            for i in range(3)
+        ]
+        Review.objects.create(
+            book=self.books[0], reviewer=self.user, rating=4, comment="Good"
+        )
+
+    def assertSameResponse(self, async_url, sync_url, params=None):
+        async_response = self.client.get(async_url, params)
+        sync_response = self.client.get(sync_url, params)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        # Pagination links point to the endpoint that was called
+        self.assertEqual(
+            json.loads(async_response.content.decode().replace("/api/async/", "/api/")),
+            sync_response.json(),
+        )
+        return async_response
+
+    def test_async_book_list_matches_sync(self):
+        """Test that the async list has the shape, filters and links of the sync one."""
+        response = self.assertSameResponse(
+            reverse("async-book-list"),
+            reverse("book-list"),
+            {"category": "Fiction", "page_size": 1, "ordering": "-id"},
+        )
+        self.assertEqual(response.json()["total_count"], 2)
+        self.assertIsNotNone(response.json()["links"]["next"])
+
+        response = self.client.get(reverse("async-book-list"), {"min_rating": "9"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_async_book_detail_matches_sync(self):
+        """Test that the async detail matches the sync one, including 404s."""
+        book = self.books[0]
+        response = self.assertSameResponse(
+            reverse("async-book-detail", args=[book.id]),
+            reverse("book-detail", args=[book.id]),
+        )
+        self.assertEqual(response.json()["rating_histogram"]["4"], 1)
+        self.assertSameResponse(
+            reverse("async-book-detail", args=[999]),
+            reverse("book-detail", args=[999]),
+        )
+
+    def test_async_book_reviews_matches_sync(self):
+        """Test the async per-book reviews endpoint, including invalid pages."""
+        book = self.books[0]
+        self.assertSameResponse(
+            reverse("async-book-reviews", args=[book.id]),
+            reverse("book-reviews", args=[book.id]),
+        )
+        self.assertSameResponse(
+            reverse("async-book-reviews", args=[999]),
+            reverse("book-reviews", args=[999]),
+        )
+        response = self.client.get(
+            reverse("async-book-reviews", args=[book.id]), {"page": 5}
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_async_endpoints_are_read_only_and_throttled(self):
+        """Test that writes are refused and the viewset throttles apply."""
+        url = reverse("async-book-list")
+        response = self.client.post(url, {})
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+        for _ in range(10):
+            self.client.get(url)
+        self.assertEqual(
+            self.client.get(url).status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+
+
+class LeaderboardTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.users = [
+            User.objects.create_user(username=f"reader{i}", password="secret")
+            for i in range(6)
+        ]
+        self.single, self.acclaimed, self.panned = [
+            Book.objects.create(
+                title=title,
+                author="Author",
+                publishing_date="2024-01-01",
+                category="Fiction",
+                url="http://test.com",
+            )
+            for title in ["Single", "Acclaimed", "Panned"]
+        ]
+
+    def review(self, book, rating, user=0):
+        return Review.objects.create(
+            book=book, reviewer=self.users[user], rating=rating, comment=""
+        )
+
+    def leaderboard(self, name, **params):
+        response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(entry["id"], entry["score"]) for entry in response.json()]
+
+    def test_top_rated_weighs_the_number_of_reviews(self):
+        """Test that a single 5-star review does not outrank many good reviews."""
+        self.review(self.single, 5)
+        for user, rating in enumerate([5, 5, 5, 5, 5, 4]):
+            self.review(self.acclaimed, rating, user)
+            self.review(self.panned, 1, user)
+        call_command("refresh_leaderboards", stdout=StringIO())
+
+        ranked = self.leaderboard("book-top-rated")
+        self.assertEqual(
+            [book_id for book_id, _ in ranked],
+            [self.acclaimed.id, self.single.id, self.panned.id],
+        )
+        # The prior mean is 40 / 13, worth 10 reviews
+        self.assertAlmostEqual(ranked[0][1], (400 / 13 + 29) / 16, places=4)
+        self.assertEqual(len(self.leaderboard("book-top-rated", limit=1)), 1)
+
+    def test_rankings_follow_review_writes(self):
+        """Test that review writes update the rankings without a refresh."""
+        first = self.review(self.single, 2)
+        self.review(self.single, 4, user=1)
+        first.rating = 5
+        first.save()
+        moved = self.review(self.single, 3, user=2)
+        moved.book = self.acclaimed
+        moved.save()
+        first.delete()
+
+        for book, reviews in [(self.single, 1), (self.acclaimed, 1)]:
+            book.refresh_from_db()
+            self.assertEqual(book.ranking.prior_mean, leaderboards.DEFAULT_PRIOR_MEAN)
+            self.assertAlmostEqual(
+                book.ranking.bayesian_rating,
+                leaderboards.bayesian_rating(
+                    book.rating_sum, book.rating_count, book.ranking.prior_mean
+                ),
+            )
+            self.assertAlmostEqual(
+                leaderboards.decayed(book.ranking.trending_score), reviews, places=3
+            )
+
+    def test_writes_use_the_refreshed_prior_mean(self):
+        """Test that rankings created by writes take the prior mean of the refresh."""
+        self.review(self.acclaimed, 5)
+        self.review(self.panned, 2)
+        call_command("refresh_leaderboards", stdout=StringIO())
+        self.review(self.single, 4)
+
+        self.single.refresh_from_db()
+        self.assertEqual(self.single.ranking.prior_mean, 3.5)
+        self.assertAlmostEqual(
+            self.single.ranking.bayesian_rating, (10 * 3.5 + 4) / 11, places=6
+        )
+
+    def test_deleted_reviews_leave_no_trending_score(self):
+        """Test that deleting reviews, even past the horizon, brings the score to 0."""
+        old = self.review(self.acclaimed, 5)
+        half_lives = leaderboards.TRENDING_HORIZON + 1
+        Review.objects.filter(pk=old.pk).update(
+            created_at=timezone.now() - timedelta(days=7 * half_lives)
+        )
+        call_command("refresh_leaderboards", stdout=StringIO())
+        reviews = [self.review(self.single, 5, user) for user in range(1, 4)]
+        for days, review in zip([3, 10, 1], reviews):
+            Review.objects.filter(pk=review.pk).update(
+                created_at=timezone.now() - timedelta(days=days)
+            )
+        call_command("refresh_leaderboards", stdout=StringIO())
+
+        Review.objects.get(pk=old.pk).delete()
+        for review in Review.objects.filter(book=self.single):
+            review.delete()
+
+        for book in [self.acclaimed, self.single]:
+            book.refresh_from_db()
+            self.assertEqual(book.ranking.trending_score, 0.0)
+        self.assertEqual(self.leaderboard("book-trending"), [])
+
+    def test_trending_favors_recent_reviews(self):
+        """Test that reviews weigh half as much every half-life."""
+        self.review(self.acclaimed, 5, user=0)
+        self.review(self.acclaimed, 5, user=1)
+        Review.objects.update(created_at=timezone.now() - timedelta(days=14))
+        self.review(self.single, 5)
+        call_command("refresh_leaderboards", stdout=StringIO())
+
+        ranked = self.leaderboard("book-trending")
+        self.assertEqual(
+            [book_id for book_id, _ in ranked], [self.single.id, self.acclaimed.id]
+        )
+        self.assertAlmostEqual(ranked[0][1], 1.0, places=3)
+        self.assertAlmostEqual(ranked[1][1], 0.5, places=3)
+
+    def test_invalid_limit_is_rejected(self):
+        """Test that the leaderboard size is bounded."""
+        for limit in ["0", "101", "ten"]:
+            response = self.client.get(reverse("book-trending"), {"limit": limit})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(RATING_RECOMPUTE_MODE="deferred")
+class RatingQueueTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.users = [
+            User.objects.create_user(username=f"reader{i}", password="secret")
+            for i in range(3)
+        ]
+        self.book, self.other_book = [
+            Book.objects.create(
+                title=title,
+                author="Author",
+                publishing_date="2024-01-01",
+                category="Fiction",
+                url="http://test.com",
+            )
+            for title in ["Queued", "Other"]
+        ]
+
+    def test_review_writes_only_mark_books(self):
+        """Test that deferred writes leave the book alone and queue it instead."""
+        reviews = [
+            Review.objects.create(
+                book=self.book, reviewer=user, rating=rating, comment=""
+            )
+            for user, rating in zip(self.users, [5, 4, 1])
+        ]
+        reviews[0].rating = 3
+        reviews[0].save()
+        reviews[1].save()  # Unchanged, not queued
+        reviews[2].delete()
+
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.rating_count, 0)
+        self.assertEqual(
+            list(RatingRecomputeMark.objects.values_list("book_id", flat=True)),
+            [self.book.id] * 5,
+        )
+
+    def test_worker_recomputes_each_book_once(self):
+        """Test that the marks of a book are merged into one recomputation."""
+        for user, rating in zip(self.users, [5, 4, 1]):
+            Review.objects.create(
+                book=self.book, reviewer=user, rating=rating, comment=""
+            )
+        moved = Review.objects.get(rating=1)
+        moved.book = self.other_book
+        moved.save()
+
+        self.assertEqual(rating_queue.process_batch(), (5, 2))
+        self.assertFalse(RatingRecomputeMark.objects.exists())
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.rating_count, 2)
+        self.assertEqual(self.book.average_rating, Decimal("4.50"))
+        self.assertEqual(self.book.rating_histogram, {1: 0, 2: 0, 3: 0, 4: 1, 5: 1})
+        self.assertAlmostEqual(
+            leaderboards.decayed(self.book.ranking.trending_score), 2, places=3
+        )
+        self.other_book.refresh_from_db()
+        self.assertEqual(self.other_book.rating_sum, 1)
+        self.assertEqual(rating_queue.process_batch(), (0, 0))
+
+    def test_process_rating_queue_command(self):
+        """Test that the worker command processes the queue and can run once."""
+        Review.objects.create(book=self.book, reviewer=self.users[0], rating=2)
+        stdout = StringIO()
+        call_command("process_rating_queue", "--once", stdout=stdout)
+        self.assertIn("Recomputed 1 books for 1 marks", stdout.getvalue())
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.rating_sum, 2)
+
+
+class ImportBooksCommandTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w", encoding="utf-8") as feed:
+            feed.write(content)
+        return path
+
+    def run_import(self, *args):
+        stdout, stderr = StringIO(), StringIO()
+        call_command("import_books", *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_import_csv_in_batches(self):
+        """Test that valid rows are imported in batches and invalid ones reported."""
+        path = self.write(
+            "books.csv",
+            "title,author,publishing_date,category,url\n"
+            "Dune,Frank Herbert,1965-08-01,Fiction,http://example.com/dune\n"
+            "Cosmos,Carl Sagan,1980-01-01,Science,http://example.com/cosmos\n"
+            "Bad Date,Someone,someday,Fiction,http://example.com/bad\n"
+            f"{'x' * 101},Someone,1990-01-01,Fiction,http://example.com/long\n"
+            "Contact,Carl Sagan,1985-09-01,Fiction,http://example.com/contact\n",
+        )
+        stdout, stderr = self.run_import(path, "--batch-size", "2")
+
+        self.assertEqual(
+            list(Book.objects.order_by("id").values_list("title", flat=True)),
+            ["Dune", "Cosmos", "Contact"],
+        )
+        self.assertIn("Imported 3 books", stdout)
+        self.assertIn("2 invalid rows skipped", stdout)
+        self.assertIn("Line 4: publishing_date", stderr)
+        self.assertIn("Line 5: title", stderr)
+
+    def test_import_ndjson_upsert(self):
+        """Test that --upsert updates books matching the natural key."""
+        cache.clear()
+        old = Book.objects.create(
+            title="Dune",
+            author="Frank Herbert",
+            publishing_date="1965-01-01",
+            category="Unknown",
+            url="http://example.com/old",
+        )
+        detail_url = reverse("book-detail", args=[old.id])
+        self.assertEqual(self.client.get(detail_url).json()["category"], "Unknown")
+        records = [
+            {
+                "title": "Dune",
+                "author": "Frank Herbert",
+                "publishing_date": "1965-08-01",
+                "category": "Fiction",
+                "url": "http://example.com/dune",
+            },
+            {
+                "title": "Cosmos",
+                "author": "Carl Sagan",
+                "publishing_date": "1980-01-01",
+                "category": "Science",
+                "url": "http://example.com/cosmos",
+            },
+        ]
+        path = self.write(
+            "books.ndjson", "\n".join(json.dumps(record) for record in records)
+        )
+        self.run_import(path, "--upsert")
+
+        self.assertEqual(Book.objects.count(), 2)
+        dune = Book.objects.get(title="Dune")
+        self.assertEqual(dune.category, "Fiction")
+        self.assertEqual(str(dune.publishing_date), "1965-08-01")
+        # The cached detail of the updated book is invalidated
+        self.assertEqual(self.client.get(detail_url).json()["category"], "Fiction")
+
+    def test_resume_from_checkpoint(self):
+        """Test that an import resumes after the records in its checkpoint."""
+        path = self.write(
+            "books.csv",
+            "title,author,publishing_date,category,url\n"
+            + "".join(
+                f"Book {i},Author,2000-01-01,Fiction,http://example.com/{i}\n"
+                for i in range(5)
+            ),
+        )
+        checkpoint = self.write("import.checkpoint", json.dumps({"records": 3}))
+
+        stdout, _ = self.run_import(path, "--checkpoint", checkpoint)
+
+        self.assertIn("Resuming after 3 records", stdout)
+        self.assertEqual(
+            list(Book.objects.order_by("id").values_list("title", flat=True)),
+            ["Book 3", "Book 4"],
+        )
+        with open(checkpoint) as saved:
+            self.assertEqual(json.load(saved), {"records": 5})
+
 
 class BookModelTests(TestCase):
 
@@ -113,6 +840,119 @@ class BookModelTests(TestCase):
         self.assertEqual(str(self.book), "Test Book")
 
 
+class BookRatingAggregateTests(TestCase):
+
+    def setUp(self):
+        self.book = Book.objects.create(
+            title="Test Book",
+            author="Test Author",
+            publishing_date="2024-01-01",
+            category="Fiction",
+            url="http://test.com",
+        )
+        self.other_book = Book.objects.create(
+            title="Other Book",
+            author="Other Author",
+            publishing_date="2024-01-01",
+            category="Fiction",
+            url="http://other.com",
+        )
+        self.user = User.objects.create_user(username="testuser", password="pass")
+        self.second_user = User.objects.create_user(
+            username="seconduser", password="pass"
+        )
+
+    def assertAggregates(self, book, count, total, average):
+        book.refresh_from_db()
+        self.assertEqual(book.rating_count, count)
+        self.assertEqual(book.rating_sum, total)
+        self.assertEqual(book.average_rating, Decimal(average))
+
+    def assertHistogram(self, book, *counts):
+        book.refresh_from_db()
+        self.assertEqual(book.rating_histogram, dict(zip(range(1, 6), counts)))
+
+    def test_create_review_updates_aggregates(self):
+        """Test that creating reviews increments the count and sum."""
+        Review.objects.create(book=self.book, reviewer=self.user, rating=4, comment="")
+        Review.objects.create(
+            book=self.book, reviewer=self.second_user, rating=3, comment=""
+        )
+        self.assertAggregates(self.book, 2, 7, "3.50")
+
+    def test_update_review_applies_rating_delta(self):
+        """Test that updating a review applies only the old to new rating delta."""
+        review = Review.objects.create(
+            book=self.book, reviewer=self.user, rating=2, comment=""
+        )
+        review = Review.objects.get(pk=review.pk)
+        review.rating = 5
+        review.save()
+        self.assertAggregates(self.book, 1, 5, "5.00")
+
+        # Saving again without changes must not count the review twice
+        review.save()
+        self.assertAggregates(self.book, 1, 5, "5.00")
+
+    def test_moving_review_to_another_book(self):
+        """Test that a review moved to another book updates both books."""
+        review = Review.objects.create(
+            book=self.book, reviewer=self.user, rating=4, comment=""
+        )
+        review.book = self.other_book
+        review.save()
+        self.assertAggregates(self.book, 0, 0, "0.00")
+        self.assertAggregates(self.other_book, 1, 4, "4.00")
+
+    def test_delete_review_updates_aggregates(self):
+        """Test that deleting a review removes its rating from the aggregates."""
+        review = Review.objects.create(
+            book=self.book, reviewer=self.user, rating=4, comment=""
+        )
+        Review.objects.create(
+            book=self.book, reviewer=self.second_user, rating=1, comment=""
+        )
+        review.delete()
+        self.assertAggregates(self.book, 1, 1, "1.00")
+
+    def test_recompute_ratings_repairs_drift(self):
+        """Test that recompute_ratings rebuilds the aggregates from the reviews."""
+        Review.objects.create(book=self.book, reviewer=self.user, rating=4, comment="")
+        Book.objects.update(
+            rating_count=10, rating_sum=3, average_rating=0.3, rating_2_count=7
+        )
+
+        Book.objects.all().recompute_ratings()
+
+        self.assertAggregates(self.book, 1, 4, "4.00")
+        self.assertAggregates(self.other_book, 0, 0, "0.00")
+        self.assertHistogram(self.book, 0, 0, 0, 1, 0)
+        self.assertHistogram(self.other_book, 0, 0, 0, 0, 0)
+
+    def test_rating_histogram_follows_review_writes(self):
+        """Test that the histogram buckets follow review creates, updates, moves and deletes."""
+        review = Review.objects.create(
+            book=self.book, reviewer=self.user, rating=4, comment=""
+        )
+        Review.objects.create(
+            book=self.book, reviewer=self.second_user, rating=4, comment=""
+        )
+        self.assertHistogram(self.book, 0, 0, 0, 2, 0)
+
+        review.rating = 1
+        review.save()
+        self.assertHistogram(self.book, 1, 0, 0, 1, 0)
+
+        review.book = self.other_book
+        review.rating = 5
+        review.save()
+        self.assertHistogram(self.book, 0, 0, 0, 1, 0)
+        self.assertHistogram(self.other_book, 0, 0, 0, 0, 1)
+
+        review.delete()
+        self.assertHistogram(self.other_book, 0, 0, 0, 0, 0)
+
+
 class BookSerializerTests(TestCase):
 
     def setUp(self):
@@ -139,6 +979,26 @@ class BookSerializerTests(TestCase):
             data["average_rating"], format(float(self.book.average_rating), ".2f")
         )  # Compare to formatted average_rating
 
+    def test_row_serializer_matches_model_serializer(self):
+        """Test that the values() row serializer produces the DRF output."""
+        self.book.average_rating = Decimal("3.5")
+        self.book.save()
+
+        expected = BookSerializer(Book.objects.all(), many=True).data
+        self.assertEqual(book_rows.serialize(Book.objects.values()), expected)
+        self.assertEqual(expected[0]["average_rating"], "3.50")
+
+    def test_detail_serializer_adds_rating_histogram(self):
+        """Test the rating histogram of the detail serializer and its row version."""
+        Book.objects.filter(pk=self.book.pk).update(rating_2_count=1, rating_5_count=3)
+        book = Book.objects.get(pk=self.book.pk)
+
+        data = BookDetailSerializer(book).data
+        self.assertEqual(
+            data["rating_histogram"], {"1": 0, "2": 1, "3": 0, "4": 0, "5": 3}
+        )
+        self.assertEqual(book_detail_row(Book.objects.values().get()), data)
+
     def test_serializer_validation(self):
         """Test that the serializer rejects invalid data."""
         invalid_data = {
@@ -4,16 +4,34 @@ This module contains viewsets for the Book model.
 It provides a read-only interface for retrieving book information, allowing
 authenticated users to access all books while permitting unauthenticated users
 to read only. The viewset includes pagination support and customizable
-parameters for pagination via the OpenAPI schema.
+parameters for pagination via the OpenAPI schema. List and detail responses
+are served from a versioned cache, see ``books.caching``.
 """
 
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.utils import timezone
 from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import viewsets
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser, IsAuthenticatedOrReadOnly
+from rest_framework.response import Response
+from utils import conditional, counting
 from utils.CustomPageNumberPagination import CustomPageNumberPagination
+from utils.db import routers
+from utils.SelectablePaginationMixin import SelectablePaginationMixin
+from utils.ValuesRowSerializer import ValuesListMixin
 
+from . import caching, leaderboards
+from .filters import BookFieldFilter, BookOrderingFilter, BookSearchFilter
 from .models import Book
-from .serializers import BookSerializer
+from .serializers import (
+    BookDetailSerializer,
+    BookSerializer,
+    LeaderboardEntrySerializer,
+    LeaderboardParamsSerializer,
+    book_rows,
+)
 
 
 @extend_schema(
@@ -31,28 +49,207 @@ from .serializers import BookSerializer
             required=False,
             type=int,
         ),
+        OpenApiParameter(
+            name="paginate",
+            description="Pagination style: 'page' (default) or 'cursor'",
+            required=False,
+            type=str,
+            enum=["page", "cursor"],
+        ),
+        OpenApiParameter(
+            name="cursor",
+            description="Opaque cursor from the previous response (cursor pagination only)",
+            required=False,
+            type=str,
+        ),
     ],
 )
-class BookViewSet(viewsets.ReadOnlyModelViewSet):
+class BookViewSet(
+    routers.ReplicaReadMixin,
+    ValuesListMixin,
+    SelectablePaginationMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """
     A viewset for viewing books.
 
     This viewset provides a read-only endpoint for retrieving a list of
     books and detailed views of individual books. It supports pagination
     and requires authentication for certain operations while allowing
-    public access to view book information.
+    public access to view book information. Reads are served from a
+    replica when any are configured, see ``utils.db.routers``.
 
     Attributes:
         queryset (QuerySet): A queryset of all Book instances.
         serializer_class (Serializer): The serializer for converting
-        Book instances to and from JSON.
+        Book instances to and from JSON. The detail action uses
+        BookDetailSerializer, which adds the rating histogram.
+        row_serializer (ValuesRowSerializer): The fast serializer producing
+        the same output from ``values()`` rows for the list action.
+        filter_backends (list): Filters on category, author, publishing date
+        range and minimum rating, whitelisted ``?ordering=`` and ``?search=``
+        full-text search over title and author, ranked by relevance.
+        ordering (list): The default ordering of the list.
         permission_classes (list): The list of permission classes to
         determine access rights.
         pagination_class (Pagination): The pagination class for
-        controlling how results are paginated.
+        controlling how results are paginated. Clients can switch to
+        keyset pagination with ``?paginate=cursor``.
+        count_mode (str): How ``total_count`` is computed, see
+        ``utils.counting``. Exact counts are cached until the next Book or
+        Review write.
+
+    Methods:
+        list(request):
+            List books, served from the cache until the catalog changes.
+            Supports conditional requests (ETag / Last-Modified).
+        retrieve(request, pk=None):
+            Retrieve a book, served from the cache until that book changes.
+            Supports conditional requests (ETag / Last-Modified).
+        top_rated(request):
+            The books with the best Bayesian rating, see ``books.leaderboards``.
+        trending(request):
+            The books with the most recent reviews, see ``books.leaderboards``.
+        cache_stats(request):
+            Report the hit/miss counters of the response cache (admins only).
     """
 
     queryset = Book.objects.all()
     serializer_class = BookSerializer
+    row_serializer = book_rows
+    filter_backends = [BookFieldFilter, BookOrderingFilter, BookSearchFilter]
+    ordering = ["id"]
     permission_classes = [IsAuthenticatedOrReadOnly]
     pagination_class = CustomPageNumberPagination
+    count_mode = counting.COUNT_CACHED
+
+    def get_serializer_class(self):
+        if self.action == "retrieve":
+            return BookDetailSerializer
+        return super().get_serializer_class()
+
+    def list(self, request, *args, **kwargs):
+        validators = conditional.queryset_validators(
+            request, self.filter_queryset(self.get_queryset())
+        )
+        return conditional.conditional_response(
+            request,
+            validators,
+            lambda: self._cached_response(
+                caching.list_cache_key(request),
+                caching.get_catalog_generation(),
+                super(BookViewSet, self).list,
+                request,
+                *args,
+                **kwargs,
+            ),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            # Cached under the integer pk that the signals invalidate, so
+            # that e.g. /api/books/07/ is not cached apart from /api/books/7/
+            book_id = Book._meta.pk.to_python(kwargs[self.lookup_field])
+        except ValidationError:
+            # Not a book id, get_object() answers 404
+            return super().retrieve(request, *args, **kwargs)
+        validators = conditional.object_validators(
+            request, self.get_queryset(), book_id
+        )
+        return conditional.conditional_response(
+            request,
+            validators,
+            lambda: self._cached_response(
+                caching.detail_cache_key(book_id),
+                caching.get_book_generation(book_id),
+                super(BookViewSet, self).retrieve,
+                request,
+                *args,
+                **kwargs,
+            ),
+        )
+
+    def _cached_response(self, key, generation, view, request, *args, **kwargs):
+        """Serve ``view`` from the cache, storing successful responses."""
+        data = caching.get_cached(key, generation)
+        if data is not None:
+            return Response(data)
+
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200:
+            timeout = None
+            if routers.get_read_database() is not None:
+                # A lagging replica may have served data older than the
+                # generation, so such entries only live as long as the lag.
+                timeout = settings.DATABASE_REPLICA_STICKY_SECONDS
+            caching.set_cached(key, generation, response.data, timeout)
+        return response
+
+    def leaderboard(self, request, rankings, score):
+        """Serialize the books of the ``rankings(limit)`` leaderboard, scored by ``score(ranking)``."""
+        params = LeaderboardParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        books = []
+        for ranking in rankings(params.validated_data["limit"]):
+            book = ranking.book
+            book.score = round(score(ranking), 4)
+            books.append(book)
+        return Response(LeaderboardEntrySerializer(books, many=True).data)
+
+    @extend_schema(
+        operation_id="books_top_rated",
+        description=(
+            "The best rated books. Books are ranked by their average rating "
+            "pulled towards the mean of all ratings, so that books with few "
+            "reviews do not outrank books with many good ones."
+        ),
+        parameters=[LeaderboardParamsSerializer],
+        responses={200: LeaderboardEntrySerializer(many=True)},
+    )
+    @action(
+        detail=False,
+        url_path="top-rated",
+        filter_backends=[],
+        pagination_class=None,
+    )
+    def top_rated(self, request):
+        return self.leaderboard(
+            request, leaderboards.top_rated, lambda ranking: ranking.bayesian_rating
+        )
+
+    @extend_schema(
+        operation_id="books_trending",
+        description=(
+            "The books reviewed the most lately. Each review counts for 1 when "
+            "new, then half as much every half-life (7 days by default)."
+        ),
+        parameters=[LeaderboardParamsSerializer],
+        responses={200: LeaderboardEntrySerializer(many=True)},
+    )
+    @action(
+        detail=False,
+        filter_backends=[],
+        pagination_class=None,
+    )
+    def trending(self, request):
+        now = timezone.now()
+        return self.leaderboard(
+            request,
+            leaderboards.trending,
+            lambda ranking: leaderboards.decayed(ranking.trending_score, now),
+        )
+
+    @extend_schema(
+        operation_id="books_cache_stats",
+        description="Hit/miss counters of the book response cache (admins only).",
+        parameters=[],
+        responses={200: {"description": "Cache counters"}},
+    )
+    @action(
+        detail=False,
+        url_path="cache-stats",
+        permission_classes=[IsAdminUser],
+        pagination_class=None,
+    )
+    def cache_stats(self, request):
+        return Response(caching.get_stats())
@@ -2,9 +2,14 @@ from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from books.views import BookViewSet
+from books.async_views import book_detail, book_list
 from reviews.views import ReviewViewSet
+from reviews.async_views import reviews_for_book
 from jwt_auth.views import RegisterView, CustomTokenObtainPairView, CustomTokenRefreshView
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
+from drf_spectacular.views import SpectacularSwaggerView, SpectacularRedocView
+from utils.db.views import PoolStatsView
+from utils.metrics import metrics_view
+from utils.schema import schema_view
 
 # Initialize the DefaultRouter
 router = DefaultRouter()
@@ -13,14 +18,21 @@ router.register(r'reviews', ReviewViewSet, basename='review')
 
 urlpatterns = [
     path('api/books/<int:book_id>/reviews/', ReviewViewSet.as_view({'get': 'reviews_for_book_by_id'}), name='book-reviews'),
+    # Native async versions of the read endpoints, for ASGI deployments
+    path('api/async/books/', book_list, name='async-book-list'),
+    path('api/async/books/<int:pk>/', book_detail, name='async-book-detail'),
+    path('api/async/books/<int:book_id>/reviews/', reviews_for_book, name='async-book-reviews'),
     path('admin/', admin.site.urls),
     path('api/', include(router.urls)),
     path('api/auth/register/', RegisterView.as_view(), name='register'),
     path('api/auth/login/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/auth/token/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
+    path('api/db/pool-stats/', PoolStatsView.as_view(), name='db-pool-stats'),
+    # Prometheus scrape endpoint
+    path('metrics', metrics_view, name='metrics'),
 
     # Spectacular API and documentation URLs
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
+    path('api/schema/', schema_view, name='schema'),
     path('', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('api/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
 ]
@@ -0,0 +1,116 @@
+"""
+JWT authentication without a user query on read-only requests.
+
+Access tokens carry the ``username`` and ``is_staff`` of their user as signed
+claims (see ``CustomTokenObtainPairSerializer``). For safe methods these claims
+are trusted and ``request.user`` is a ``TokenUser`` built from the token, so
+no query is made. Other methods get the full ``User``, loaded lazily on first
+use through a small in-process TTL cache.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+# Claims a token needs for its user to be rebuilt without a query. Tokens
+# issued before they were added fall back to loading the user.
+USER_CLAIMS = ("username", "is_staff")
+
+
+class UserCache:
+    """
+    Thread-safe in-process cache of users by id, with a TTL and a maximum size.
+
+    Each process has its own copy; entries of a changed user are evicted in the
+    process making the change (see ``jwt_auth.signals``) and expire after the
+    TTL elsewhere.
+
+    Attributes:
+        max_size (int): Maximum number of users kept; the oldest are evicted first.
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return None
+            expires, user = entry
+            if expires < time.monotonic():
+                del self._users[user_id]
+                return None
+        # A copy, so changes made while handling a request do not leak
+        return copy.copy(user)
+
+    def set(self, user_id, user, ttl):
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._users.pop(user_id, None)
+            self._users[user_id] = (time.monotonic() + ttl, copy.copy(user))
+            while len(self._users) > self.max_size:
+                self._users.popitem(last=False)
+
+    def evict(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache()
+
+
+class StatelessReadJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` that skips the user query on read-only requests.
+
+    Safe methods are authenticated with a ``TokenUser`` (id, username,
+    is_staff, is_active) built from the validated token. Other methods get a
+    lazily loaded ``User``, cached for ``settings.JWT_USER_CACHE_TTL`` seconds.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+
+        if request.method in SAFE_METHODS and all(
+            claim in validated_token for claim in USER_CLAIMS
+        ):
+            return TokenUser(validated_token), validated_token
+
+        return (
+            SimpleLazyObject(lambda: self.get_cached_user(validated_token)),
+            validated_token,
+        )
+
+    def get_cached_user(self, validated_token):
+        """Return the user of ``validated_token``, from the cache if possible."""
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        user = user_cache.get(user_id)
+        if user is None:
+            # Also checks that the user exists and is active
+            user = self.get_user(validated_token)
+            user_cache.set(user_id, user, settings.JWT_USER_CACHE_TTL)
+        return user
@@ -0,0 +1,7 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class StatelessReadJWTScheme(SimpleJWTScheme):
+    """Documents ``StatelessReadJWTAuthentication`` like simplejwt's own authenticator."""
+
+    target_class = "jwt_auth.authentication.StatelessReadJWTAuthentication"
@@ -1,3 +1,111 @@
-from django.test import TestCase
+from books.models import Book
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from jwt_auth.authentication import user_cache
+
+
+class StatelessReadJWTAuthenticationTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.user = User.objects.create_user(username="reader", password="secret")
+        self.admin = User.objects.create_user(
+            username="admin", password="secret", is_staff=True
+        )
+        self.book = Book.objects.create(
+            title="Test Book",
+            author="Test Author",
+            publishing_date="2024-01-01",
+            category="Fiction",
+            url="http://test.com",
+        )
+
+    def login(self, username):
+        response = self.client.post(
+            reverse("token_obtain_pair"), {"username": username, "password": "secret"}
+        )
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + response.data["access"])
+        return response.data
+
+    def user_queries(self, method, url, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data, format="json")
+        return response, [q["sql"] for q in queries if "auth_user" in q["sql"]]
+
+    def test_tokens_carry_user_claims(self):
+        """Test that obtained and refreshed access tokens carry the user claims."""
+        tokens = self.login("admin")
+        access = AccessToken(tokens["access"])
+        self.assertEqual(access["username"], "admin")
+        self.assertTrue(access["is_staff"])
+
+        response = self.client.post(
+            reverse("token_refresh"), {"refresh": tokens["refresh"]}
+        )
+        self.assertEqual(AccessToken(response.data["access"])["username"], "admin")
+
+    def test_reads_do_not_query_the_user(self):
+        """Test that safe requests are authenticated from the token alone."""
+        self.login("admin")
+        response, queries = self.user_queries("get", reverse("book-cache-stats"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(queries, [])
+
+        self.login("reader")
+        response, queries = self.user_queries("get", reverse("book-cache-stats"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(queries, [])
+
+    def test_tokens_without_claims_load_the_user(self):
+        """Test that tokens issued before the claims were added still work."""
+        token = AccessToken.for_user(self.admin)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        response, queries = self.user_queries("get", reverse("book-cache-stats"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+
+    def test_writes_use_cached_user(self):
+        """Test that writes get the full user, loaded once and then cached."""
+        self.login("reader")
+        url = reverse("review-list")
+        response, queries = self.user_queries(
+            "post", url, {"book": self.book.id, "rating": 5, "comment": "Great"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["reviewer"], self.user.id)
+        self.assertEqual(len(queries), 1)
+
+        other_book = Book.objects.create(
+            title="Other Book",
+            author="Test Author",
+            publishing_date="2024-01-01",
+            category="Fiction",
+            url="http://test.com",
+        )
+        response, queries = self.user_queries(
+            "post", url, {"book": other_book.id, "rating": 3, "comment": "Fine"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(queries, [])
+
+    def test_changed_user_is_evicted(self):
+        """Test that a deactivated user can no longer write."""
+        self.login("reader")
+        self.user_queries(
+            "post",
+            reverse("review-list"),
+            {"book": self.book.id, "rating": 5, "comment": "Great"},
+        )
+
+        self.user.is_active = False
+        self.user.save()
+        response, _ = self.user_queries("delete", reverse("review-list") + "1/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -3,9 +3,10 @@ from drf_spectacular.utils import extend_schema
 from rest_framework import generics, status
 from rest_framework.permissions import AllowAny
 from rest_framework.serializers import ModelSerializer
-from rest_framework.throttling import AnonRateThrottle
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.views import (TokenObtainPairView,
                                             TokenRefreshView)
+from utils.throttling import SlidingWindowAnonRateThrottle
 
 # Serializer for registering new users
 class RegisterSerializer(ModelSerializer):
@@ -72,7 +73,24 @@ class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = (AllowAny,)
     serializer_class = RegisterSerializer
-    throttle_classes = [AnonRateThrottle]
+    throttle_classes = [SlidingWindowAnonRateThrottle]
+
+
+# Serializer adding user claims to the tokens
+class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Serializer for obtaining JWT tokens carrying the user's username and staff status.
+
+    The claims let read-only requests be authenticated without loading the user,
+    see jwt_auth.authentication. Access tokens obtained by refreshing copy them.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token["username"] = user.get_username()
+        token["is_staff"] = user.is_staff
+        return token
 
 
 @extend_schema(tags=["Auth"])
@@ -82,7 +100,8 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     API view for obtaining JWT tokens.
 
     This view allows users to obtain access and refresh tokens for authentication.
-    It overrides the default TokenObtainPairView to allow customization if needed.
+    It overrides the default TokenObtainPairView to add the username and staff
+    status claims to the tokens.
 
     Example:
         POST /api/auth/token/
@@ -91,7 +110,8 @@ class CustomTokenObtainPairView(TokenObtainPairView):
             "password": "password123"
         }
     """
-    pass
+
+    serializer_class = CustomTokenObtainPairSerializer
 
 
 @extend_schema(tags=["Auth"])
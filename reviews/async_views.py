@@ -0,0 +1,23 @@
+"""
+Async (ASGI) version of the per-book reviews endpoint.
+
+It runs the same pagination, permissions and throttles as
+``ReviewViewSet.reviews_for_book_by_id`` and returns the same response
+shape, but queries through Django's async ORM. Streaming (``?stream=``) is
+only available on the sync endpoint. See ``utils.async_api``.
+"""
+
+from books.models import Book
+from rest_framework.exceptions import NotFound
+from utils.async_api import async_action, paginated_rows
+
+from .views import ReviewViewSet
+
+
+@async_action(ReviewViewSet, "reviews_for_book_by_id")
+async def reviews_for_book(view, request, book_id):
+    """List the reviews of a book, oldest first, paginated."""
+    if not await Book.objects.filter(id=book_id).aexists():
+        raise NotFound()
+    reviews = view.get_reviews_for_book(book_id)
+    return await paginated_rows(view, request, reviews, view.row_serializer)
@@ -1,15 +1,87 @@
+import math
 import random
+import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor
 
+import django
+from books.caching import invalidate_book_cache
+from books.leaderboards import refresh_rankings
 from books.models import Book
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router, transaction
+from django.utils import timezone
 from faker import Faker
+from utils.bulk import batched, insert_rows
+from utils.counting import invalidate_counts
 
 from reviews.models import Review
 
+# Faker is slow per call, so comments are drawn from a pool generated up front.
+COMMENT_POOL_SIZE = 500
+
+
+def insert_reviews(pairs, book_ids, user_ids, comments, batch_size, seed=None):
+    """
+    Insert one review per ``(book, reviewer)`` pair index.
+
+    A pair index ``i`` stands for ``book_ids[i // len(user_ids)]`` reviewed by
+    ``user_ids[i % len(user_ids)]``. Rows are written with
+    ``utils.bulk.insert_rows``, as building and compiling a model instance
+    per review would dominate the run time. Module level, so it can run in a
+    worker process.
+
+    Returns:
+        int: The number of reviews inserted.
+    """
+    using = router.db_for_write(Review)
+    fields = [
+        Review._meta.get_field(name)
+        for name in [
+            "book",
+            "reviewer",
+            "rating",
+            "comment",
+            "created_at",
+            "updated_at",
+        ]
+    ]
+    now = fields[-1].get_db_prep_save(timezone.now(), connections[using])
+
+    generator = random.Random(seed)
+    num_users = len(user_ids)
+    rows = (
+        (
+            book_ids[pair // num_users],
+            user_ids[pair % num_users],
+            generator.randint(1, 5),
+            generator.choice(comments),
+            now,
+            now,
+        )
+        for pair in pairs
+    )
+    inserted = 0
+    for batch in batched(rows, batch_size):
+        with transaction.atomic(using=using):
+            insert_rows(Review, fields, batch, using)
+        inserted += len(batch)
+    return inserted
+
+
+def _setup_worker():
+    # Needed when worker processes are spawned rather than forked
+    django.setup()
+
 
 class Command(BaseCommand):
-    help = "Populate the Review model with fake data"
+    help = (
+        "Populate the Review model with fake data. Distinct (book, reviewer) "
+        "pairs are sampled in memory and inserted in batches, then the book "
+        "ratings are recomputed once"
+    )
 
     def add_arguments(self, parser):
         # Adding an optional argument for the number of reviews
@@ -19,79 +91,150 @@ class Command(BaseCommand):
             default=10,
             help="Number of fake reviews to create (default is 10)",
         )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of rows inserted per statement (default is 5000)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of processes inserting reviews (default is 1, ignored on SQLite)",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            help="Seed of the random generators, for reproducible datasets",
+        )
 
     def handle(self, *args, **kwargs):
+        num_reviews = kwargs["num_reviews"]
+        batch_size = kwargs["batch_size"]
+        workers = kwargs["workers"]
+        seed = kwargs["seed"]
+        if batch_size < 1 or workers < 1:
+            raise CommandError("--batch-size and --workers must be at least 1")
+
         fake = Faker()
-        books = Book.objects.all()  # Fetch all books to assign reviews
-        num_books = books.count()
+        if seed is not None:
+            Faker.seed(seed)
+            random.seed(seed)
 
-        if num_books == 0:
+        book_ids = list(Book.objects.order_by("id").values_list("id", flat=True))
+        if not book_ids:
             self.stdout.write(
                 self.style.ERROR("No books found in the database. Exiting.")
             )
             return
 
-        # Get the number of reviews from the command-line argument
-        num_reviews = kwargs["num_reviews"]
+        started = time.monotonic()
 
-        # Calculate the minimum number of users needed based on the number of reviews and books
-        users_needed = (num_reviews // num_books) + 1
+        # Every user can review every book once, so this many users are needed
+        existing_reviews = Review.objects.count()
+        users_needed = math.ceil((existing_reviews + num_reviews) / len(book_ids))
+        self.create_users(users_needed - User.objects.count(), batch_size)
+        user_ids = list(User.objects.order_by("id").values_list("id", flat=True))
 
-        # Check how many users exist
-        existing_users = User.objects.count()
+        pairs = self.sample_pairs(book_ids, user_ids, num_reviews)
+        comments = [fake.text(max_nb_chars=200) for _ in range(COMMENT_POOL_SIZE)]
 
-        # Create additional users if needed
-        if existing_users < users_needed:
-            users_to_create = users_needed - existing_users
-            self.stdout.write(
-                self.style.WARNING(
-                    f"Creating {users_to_create} additional users to meet the review demand."
-                )
+        if connections[router.db_for_write(Review)].vendor == "sqlite":
+            # SQLite has a single writer, more processes would only contend
+            workers = 1
+        if workers == 1:
+            created = insert_reviews(
+                pairs, book_ids, user_ids, comments, batch_size, seed
             )
-
-            for _ in range(users_to_create):
-                username = fake.unique.user_name()
-                email = fake.unique.email()
-                password = fake.password()
-                User.objects.create_user(
-                    username=username, email=email, password=password
-                )
-            self.stdout.write(
-                self.style.SUCCESS(f"Successfully created {users_to_create} users.")
+        else:
+            created = self.insert_in_workers(
+                pairs, book_ids, user_ids, comments, batch_size, workers, seed
             )
 
-        # Fetch all users again after creation
-        users = User.objects.all()
-
-        reviews_created = 0
-        for _ in range(num_reviews):
-            book = random.choice(books)  # Randomly select a book
-            user = random.choice(users)  # Randomly select a user as reviewer
+        # bulk_create sends no signals, so the aggregates and the leaderboard
+        # rankings are computed once here
+        Book.objects.recompute_ratings()
+        refresh_rankings()
+        invalidate_book_cache()
+        invalidate_counts(Review)
+        invalidate_counts(Book)
 
-            # Check if this user has already reviewed the selected book
-            if Review.objects.filter(book=book, reviewer=user).exists():
-                self.stdout.write(
-                    self.style.WARNING(
-                        f"Skipping: {user.username} has already reviewed {book.title}"
-                    )
-                )
-                continue  # Skip to the next iteration if a review already exists
-
-            # Create and save the review if no review exists for this user-book pair
-            review = Review(
-                book=book,
-                reviewer=user,
-                rating=random.randint(1, 5),  # Random rating between 1 and 5
-                comment=fake.text(max_nb_chars=200),  # Fake comment text
-            )
-            review.save()
-            reviews_created += 1
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f"Successfully created review for {review.book.title} by {review.reviewer.username}"
-                )
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Total reviews created: {created} in {elapsed:.1f}s "
+                f"({created / elapsed if elapsed else 0:,.0f} reviews/s)"
             )
+        )
+
+    def create_users(self, count, batch_size):
+        """Bulk-create ``count`` reviewers sharing one hashed password."""
+        if count <= 0:
+            return
 
         self.stdout.write(
-            self.style.SUCCESS(f"Total reviews created: {reviews_created}")
+            self.style.WARNING(
+                f"Creating {count} additional users to meet the review demand."
+            )
+        )
+        # Hashing is deliberately slow, so it is done once for every user
+        password = make_password(secrets.token_urlsafe())
+        prefix = f"reviewer-{secrets.token_hex(4)}"
+        users = (
+            User(
+                username=f"{prefix}-{i}",
+                email=f"{prefix}-{i}@example.com",
+                password=password,
+            )
+            for i in range(count)
         )
+        for batch in batched(users, batch_size):
+            User.objects.bulk_create(batch)
+        self.stdout.write(self.style.SUCCESS(f"Successfully created {count} users."))
+
+    @staticmethod
+    def sample_pairs(book_ids, user_ids, count):
+        """
+        Sample ``count`` distinct ``(book, reviewer)`` pair indexes that have
+        no review yet, see ``insert_reviews``.
+        """
+        num_users = len(user_ids)
+        user_index = {user_id: index for index, user_id in enumerate(user_ids)}
+        book_index = {book_id: index for index, book_id in enumerate(book_ids)}
+        existing = {
+            book_index[book_id] * num_users + user_index[reviewer_id]
+            for book_id, reviewer_id in Review.objects.values_list(
+                "book_id", "reviewer_id"
+            ).iterator()
+        }
+
+        # Sampling from a range does not materialize it
+        sampled = random.sample(range(len(book_ids) * num_users), count + len(existing))
+        pairs = [pair for pair in sampled if pair not in existing][:count]
+        # Inserting in (book, reviewer) order keeps index updates local
+        pairs.sort()
+        return pairs
+
+    @staticmethod
+    def insert_in_workers(
+        pairs, book_ids, user_ids, comments, batch_size, workers, seed
+    ):
+        chunk_size = math.ceil(len(pairs) / workers)
+        chunks = [pairs[i : i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+        # Forked workers must not share the parent's database connections
+        connections.close_all()
+        with ProcessPoolExecutor(workers, initializer=_setup_worker) as executor:
+            futures = [
+                executor.submit(
+                    insert_reviews,
+                    chunk,
+                    book_ids,
+                    user_ids,
+                    comments,
+                    batch_size,
+                    None if seed is None else seed + index,
+                )
+                for index, chunk in enumerate(chunks)
+            ]
+            return sum(future.result() for future in futures)
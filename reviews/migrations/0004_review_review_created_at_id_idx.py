@@ -0,0 +1,19 @@
+# Generated by Django 4.2.16 on 2026-10-16 23:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0003_review_unique_book_reviewer"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["created_at", "id"], name="review_created_at_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.16 on 2026-10-17 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0004_review_review_created_at_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["book", "created_at", "id"], name="review_book_created_id_idx"
+            ),
+        ),
+    ]
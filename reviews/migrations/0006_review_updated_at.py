@@ -0,0 +1,32 @@
+# Generated by Django 4.2.16 on 2026-10-17 00:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0005_review_review_book_created_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="review",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(fields=["updated_at"], name="review_updated_at_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["book", "updated_at"], name="review_book_updated_at_idx"
+            ),
+        ),
+    ]
@@ -17,9 +17,12 @@ class Review(models.Model):
         rating (IntegerField): The rating given to the book, restricted to values between 1 and 5.
         comment (TextField): The text of the review.
         created_at (DateTimeField): Timestamp for when the review was created, automatically set on creation.
+        updated_at (DateTimeField): Timestamp of the last change to the review, automatically set on save.
 
     Meta:
         constraints (UniqueConstraint): Ensures that a user can only leave one review per book.
+        indexes (Index): Support keyset pagination over (created_at, id), globally and per book,
+            and MAX(updated_at) lookups for conditional requests.
     """
 
     book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name="reviews")
@@ -32,6 +35,7 @@ class Review(models.Model):
     )
     comment = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         constraints = [
@@ -39,6 +43,31 @@ class Review(models.Model):
                 fields=["book", "reviewer"], name="unique_book_reviewer"
             )
         ]
+        indexes = [
+            # Keyset (cursor) pagination
+            models.Index(fields=["created_at", "id"], name="review_created_at_id_idx"),
+            # Paginated reviews of a single book
+            models.Index(
+                fields=["book", "created_at", "id"], name="review_book_created_id_idx"
+            ),
+            # MAX(updated_at) for conditional requests
+            models.Index(fields=["updated_at"], name="review_updated_at_idx"),
+            models.Index(
+                fields=["book", "updated_at"], name="review_book_updated_at_idx"
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remember the values loaded from the database.
+
+        The rating signal handlers compare them with the saved values to apply
+        only the change to the book's rating aggregates.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
 
     def __str__(self):
         """
@@ -0,0 +1,24 @@
+from rest_framework import permissions
+
+DENIED_MESSAGES = {
+    "destroy": "You do not have permission to delete this review.",
+}
+
+
+class IsReviewerOrReadOnly(permissions.BasePermission):
+    """
+    Object permission letting only the reviewer change or delete a review.
+
+    Compares ``reviewer_id`` with the user's id, so the reviewer is never
+    loaded, and runs within ``get_object()``, so the review is fetched once.
+    """
+
+    message = "You do not have permission to edit this review."
+
+    def has_object_permission(self, request, view, obj):
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        if obj.reviewer_id == request.user.id:
+            return True
+        self.message = DENIED_MESSAGES.get(view.action, self.message)
+        return False
@@ -1,9 +1,11 @@
 from rest_framework import serializers
+from utils.timing import TimedSerializerMixin
+from utils.ValuesRowSerializer import ValuesRowSerializer
 
 from .models import Review
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for the Review model.
 
@@ -36,3 +38,7 @@ class ReviewSerializer(serializers.ModelSerializer):
             "reviewer",
             "created_at",
         ]  # Ensure these are read-only
+
+
+# Fast serializer for values() rows of the list endpoint, same output as ReviewSerializer
+review_rows = ValuesRowSerializer(ReviewSerializer)
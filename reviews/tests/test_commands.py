@@ -0,0 +1,47 @@
+# tests/test_commands.py
+
+from io import StringIO
+
+from books.models import Book
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db.models import Avg, Count, Sum
+from django.test import TestCase
+
+from reviews.models import Review
+
+
+class PopulateCommandTests(TestCase):
+
+    def call(self, *args):
+        call_command(*args, stdout=StringIO())
+
+    def test_populate_books_and_reviews(self):
+        """Test that the generators create distinct reviews and consistent ratings."""
+        self.call("populate_books", "--num-books", "7", "--batch-size", "3")
+        self.assertEqual(Book.objects.count(), 7)
+
+        self.call("populate_reviews", "--num-reviews", "40", "--batch-size", "9")
+        self.assertEqual(Review.objects.count(), 40)
+        # 40 reviews over 7 books need at least 6 reviewers
+        self.assertGreaterEqual(User.objects.count(), 6)
+
+        # A second run adds reviews without duplicating (book, reviewer) pairs
+        self.call("populate_reviews", "--num-reviews", "20")
+        self.assertEqual(Review.objects.count(), 60)
+
+        for book in Book.objects.annotate(
+            count=Count("reviews"),
+            total=Sum("reviews__rating"),
+            avg=Avg("reviews__rating"),
+        ):
+            self.assertEqual(book.rating_count, book.count)
+            self.assertEqual(book.rating_sum, book.total or 0)
+            self.assertAlmostEqual(float(book.average_rating), book.avg or 0, places=2)
+
+    def test_populate_reviews_without_books(self):
+        """Test that no reviews or users are created when there are no books."""
+        out = StringIO()
+        call_command("populate_reviews", "--num-reviews", "5", stdout=out)
+        self.assertIn("No books found", out.getvalue())
+        self.assertFalse(User.objects.exists())
@@ -4,7 +4,7 @@ from django.test import TestCase
 from rest_framework.exceptions import ValidationError
 
 from reviews.models import Review
-from reviews.serializers import ReviewSerializer
+from reviews.serializers import ReviewSerializer, review_rows
 
 
 class ReviewSerializerTests(TestCase):
@@ -61,3 +61,8 @@ class ReviewSerializerTests(TestCase):
         self.assertIsNotNone(
             serializer.data["created_at"]
         )  # created_at should be populated
+
+    def test_review_row_serializer_matches_model_serializer(self):
+        """Test that the values() row serializer produces the DRF output."""
+        expected = ReviewSerializer(Review.objects.all(), many=True).data
+        self.assertEqual(review_rows.serialize(Review.objects.values()), expected)
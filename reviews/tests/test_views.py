@@ -1,17 +1,27 @@
 # tests/test_views.py
 
+import json
+from unittest.mock import patch
+
 from books.models import Book
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 from reviews.models import Review
+from reviews.views import ReviewViewSet
 
 
 class ReviewViewSetTests(APITestCase):
 
     def setUp(self):
+        # Reset the throttle history shared through the cache
+        cache.clear()
+
         # Create a user for testing
         self.user = User.objects.create_user(
             username="testuser", password="testpassword"
@@ -187,3 +197,292 @@ class ReviewViewSetTests(APITestCase):
         self.assertEqual(response.data["results"][0]["comment"], "Good book!")
         self.assertEqual(response.data["results"][0]["rating"], 4)
         self.assertEqual(response.data["results"][0]["book"], self.book.id)
+
+    def test_list_reviews_cursor_pagination(self):
+        """Test that cursor pagination walks every review exactly once in both directions."""
+        users = [self.user, self.second_user] + [
+            User.objects.create_user(username=f"user{i}", password="testpassword")
+            for i in range(3)
+        ]
+        for user in users:
+            Review.objects.create(
+                book=self.book, reviewer=user, rating=4, comment=user.username
+            )
+
+        url = reverse("review-list") + "?paginate=cursor&page_size=2"
+        seen = []
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("total_count", response.data)
+            pages.append(response.data)
+            seen.extend(review["id"] for review in response.data["results"])
+            url = response.data["links"]["next"]
+
+        # Newest first, without gaps or duplicates
+        expected = list(
+            Review.objects.order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0]["links"]["previous"])
+
+        # Going back from the last page returns the previous page
+        response = self.client.get(pages[-1]["links"]["previous"])
+        self.assertEqual(response.data["results"], pages[-2]["results"])
+
+    def test_list_reviews_invalid_cursor(self):
+        """Test that a malformed cursor returns 404."""
+        response = self.client.get(
+            reverse("review-list") + "?paginate=cursor&cursor=not-a-cursor"
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_reviews_unknown_pagination_mode(self):
+        """Test that an unknown pagination mode is rejected."""
+        response = self.client.get(reverse("review-list") + "?paginate=offset")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_reviews_estimated_count(self):
+        """Test that large review tables report an approximate total_count."""
+        Review.objects.create(book=self.book, reviewer=self.user, rating=4, comment="")
+
+        with patch("utils.counting.ESTIMATE_EXACT_THRESHOLD", 0):
+            response = self.client.get(reverse("review-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["total_count_approximate"])
+        self.assertGreaterEqual(response.data["total_count"], 1)
+
+    def test_list_reviews_without_count(self):
+        """Test that the 'none' count mode skips the count and still links pages."""
+        for user in (self.user, self.second_user):
+            Review.objects.create(book=self.book, reviewer=user, rating=4, comment="")
+
+        with patch.object(ReviewViewSet, "count_mode", "none"):
+            first = self.client.get(reverse("review-list") + "?page_size=1")
+            second = self.client.get(first.data["links"]["next"])
+            beyond = self.client.get(reverse("review-list") + "?page_size=1&page=3")
+
+        self.assertIsNone(first.data["total_count"])
+        self.assertIsNotNone(first.data["links"]["next"])
+        self.assertIsNone(second.data["links"]["next"])
+        self.assertIsNotNone(second.data["links"]["previous"])
+        self.assertEqual(beyond.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_get_reviews_for_book_paginated(self):
+        """Test that the per-book reviews endpoint is paginated by default."""
+        for user in (self.user, self.second_user):
+            Review.objects.create(book=self.book, reviewer=user, rating=4, comment="")
+
+        response = self.client.get(
+            reverse("book-reviews", args=[self.book.id]) + "?page_size=1"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total_count"], 2)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertIsNotNone(response.data["links"]["next"])
+
+    def test_stream_reviews_for_book(self):
+        """Test that the reviews of a book can be streamed as JSON and NDJSON."""
+        for user in (self.user, self.second_user):
+            Review.objects.create(
+                book=self.book, reviewer=user, rating=4, comment=f"By {user}"
+            )
+        url = reverse("book-reviews", args=[self.book.id])
+        expected = self.client.get(url).json()["results"]
+
+        response = self.client.get(url + "?stream=json")
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(json.loads(b"".join(response.streaming_content)), expected)
+
+        response = self.client.get(url + "?stream=ndjson")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], expected)
+
+    def test_stream_reviews_for_book_without_reviews(self):
+        """Test that streaming a book without reviews returns an empty array."""
+        response = self.client.get(
+            reverse("book-reviews", args=[self.book.id]) + "?stream=json"
+        )
+        self.assertEqual(json.loads(b"".join(response.streaming_content)), [])
+
+    def test_stream_reviews_invalid_format(self):
+        """Test that an unknown stream format is rejected."""
+        response = self.client.get(
+            reverse("book-reviews", args=[self.book.id]) + "?stream=xml"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_conditional_get_review_list(self):
+        """Test that a current ETag gets 304 and a new review invalidates it."""
+        review = Review.objects.create(
+            book=self.book, reviewer=self.user, rating=4, comment="Good book!"
+        )
+        url = reverse("book-reviews", args=[self.book.id])
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertIn("Last-Modified", response)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+
+        review.comment = "Changed my mind"
+        review.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+        # Deleting a review bumps the count generation, and therefore the ETag
+        etag = response["ETag"]
+        review.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_conditional_get_review_list_does_not_count(self):
+        """Test that list validators take no COUNT, even right after a write."""
+        older = Review.objects.create(
+            book=self.book, reviewer=self.user, rating=4, comment=""
+        )
+        Review.objects.create(
+            book=self.book, reviewer=self.second_user, rating=2, comment=""
+        )
+        url = reverse("review-list")
+        etag = self.client.get(url)["ETag"]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertFalse(any("COUNT(" in query["sql"] for query in queries))
+
+        # Deleting a review other than the latest one still changes the ETag,
+        # and the list is counted by its estimate only
+        older.delete()
+        with patch("utils.counting.ESTIMATE_EXACT_THRESHOLD", 0):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["total_count_approximate"])
+        self.assertFalse(any("COUNT(" in query["sql"] for query in queries))
+
+    def test_invalid_review_id_is_not_found(self):
+        """Test that a non-numeric review id gets a 404, not a server error."""
+        response = self.client.get(reverse("review-detail", args=["abc"]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_conditional_get_review_detail(self):
+        """Test that review details honour If-None-Match and If-Modified-Since."""
+        review = Review.objects.create(
+            book=self.book, reviewer=self.user, rating=4, comment="Good book!"
+        )
+        url = reverse("review-detail", args=[review.id])
+        response = self.client.get(url)
+
+        for headers in (
+            {"HTTP_IF_NONE_MATCH": response["ETag"]},
+            {"HTTP_IF_MODIFIED_SINCE": response["Last-Modified"]},
+        ):
+            self.assertEqual(
+                self.client.get(url, **headers).status_code,
+                status.HTTP_304_NOT_MODIFIED,
+            )
+        self.assertEqual(
+            self.client.get(reverse("review-list"), HTTP_IF_NONE_MATCH="*").status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+
+    def create_books(self, count):
+        return [
+            Book.objects.create(
+                title=f"Bulk Book {i}",
+                author="Test Author",
+                publishing_date="2024-01-01",
+                category="Fiction",
+                url="http://test.com",
+            )
+            for i in range(count)
+        ]
+
+    def test_bulk_create_reviews(self):
+        """Test that a batch of reviews is created with one rating update per book."""
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.token)
+        books = self.create_books(3)
+        payload = [
+            {"book": book.id, "rating": rating, "comment": "Bulk review"}
+            for book, rating in zip(books, [1, 4, 5])
+        ]
+
+        with patch("books.models.BookQuerySet.recompute_ratings") as recompute:
+            response = self.client.post(
+                reverse("review-bulk-create"), payload, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(recompute.call_count, 1)
+        self.assertEqual(
+            [review["book"] for review in response.data], [b.id for b in books]
+        )
+        self.assertTrue(
+            all(review["reviewer"] == self.user.id for review in response.data)
+        )
+
+        response = self.client.post(
+            reverse("review-bulk-create"),
+            [{"book": self.book.id, "rating": 2, "comment": "Bulk review"}],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.rating_count, 1)
+        self.assertEqual(self.book.average_rating, 2)
+
+    def test_bulk_create_reports_conflicts_per_item(self):
+        """Test that existing and duplicated reviews are reported and nothing is created."""
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.token)
+        other_book = self.create_books(1)[0]
+        Review.objects.create(
+            book=self.book, reviewer=self.user, rating=4, comment="Good book!"
+        )
+
+        response = self.client.post(
+            reverse("review-bulk-create"),
+            [
+                {"book": other_book.id, "rating": 3, "comment": "Fine"},
+                {"book": self.book.id, "rating": 5, "comment": "Again"},
+                {"book": other_book.id, "rating": 1, "comment": "Twice"},
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn("already reviewed", str(response.data[1]["book"]))
+        self.assertIn("item 0", str(response.data[2]["book"]))
+        self.assertEqual(Review.objects.count(), 1)
+
+    def test_bulk_create_validation_errors(self):
+        """Test that invalid items and payloads are rejected."""
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.token)
+        url = reverse("review-bulk-create")
+
+        response = self.client.post(
+            url,
+            [
+                {"book": self.book.id, "rating": 5, "comment": "Fine"},
+                {"book": self.book.id, "rating": 9, "comment": "Too high"},
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("rating", response.data[1])
+        self.assertFalse(Review.objects.exists())
+
+        response = self.client.post(url, {"book": self.book.id}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.credentials()
+        response = self.client.post(url, [], format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -1,13 +1,32 @@
+from collections import defaultdict
+
+from books import rating_queue
+from books.caching import invalidate_book_cache
+from books.leaderboards import trending_weight, update_rankings
 from books.models import Book
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
 from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import permissions, status, viewsets
-from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
-from rest_framework.throttling import UserRateThrottle
+from rest_framework.utils.encoders import JSONEncoder
+from utils import conditional, counting
 from utils.CustomPageNumberPagination import CustomPageNumberPagination
+from utils.db.routers import ReplicaReadMixin
+from utils.SelectablePaginationMixin import SelectablePaginationMixin
+from utils.throttling import SlidingWindowUserRateThrottle
+from utils.ValuesRowSerializer import ValuesListMixin
 
 from .models import Review
-from .serializers import ReviewSerializer
+from .permissions import IsReviewerOrReadOnly
+from .serializers import ReviewSerializer, review_rows
+
+STREAM_CONTENT_TYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+}
 
 
 @extend_schema(
@@ -25,32 +44,65 @@ from .serializers import ReviewSerializer
             required=False,
             type=int,
         ),
+        OpenApiParameter(
+            name="paginate",
+            description="Pagination style: 'page' (default) or 'cursor'",
+            required=False,
+            type=str,
+            enum=["page", "cursor"],
+        ),
+        OpenApiParameter(
+            name="cursor",
+            description="Opaque cursor from the previous response (cursor pagination only)",
+            required=False,
+            type=str,
+        ),
     ],
 )
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(
+    ReplicaReadMixin, ValuesListMixin, SelectablePaginationMixin, viewsets.ModelViewSet
+):
     """
     ViewSet for handling review actions such as listing, retrieving, creating, updating, and deleting reviews.
 
     This ViewSet provides the standard actions for managing reviews, including the ability to filter reviews
     by book, as well as restrict access to creating, updating, and deleting reviews based on user permissions.
+    Safe requests read from a replica when any are configured, and a user's requests stick to the primary for a
+    while after they write, see ``utils.db.routers``.
 
     Attributes:
         queryset (QuerySet): A QuerySet containing all review instances.
         serializer_class (Type[ReviewSerializer]): The serializer class for validating and serializing review data.
+        row_serializer (ValuesRowSerializer): Fast serializer with the same output, used by the list action.
         permission_classes (list): Permissions that dictate access to the ViewSet actions.
         pagination_class (Type[CustomPageNumberPagination]): Custom pagination class for handling paginated responses.
+            Clients can switch to keyset pagination with ``?paginate=cursor``.
+        count_mode (str): How ``total_count`` is computed, see ``utils.counting``. Large review
+            tables use the planner estimate and flag the count as approximate.
         throttle_classes (list): Rate limiting applied to the ViewSet actions.
+        stream_chunk_size (int): Rows fetched per database round trip and written per chunk when streaming.
+        bulk_max_size (int): Maximum number of reviews accepted by a single bulk request.
 
     Methods:
+        list(request) / retrieve(request, pk=None):
+            Standard actions, returning 304 Not Modified when the client's ETag or Last-Modified is current.
+
         get_reviews_for_book(book_id):
             Retrieves reviews for a specific book identified by book_id.
 
         reviews_for_book_by_id(request, book_id=None):
-            List all reviews for a specific book if book_id is provided.
+            List all reviews for a specific book if book_id is provided. The list is paginated,
+            or streamed as a JSON array or NDJSON with ``?stream=json|ndjson``.
+
+        stream_reviews(reviews, stream_format):
+            Yield the serialized reviews in chunks of ``stream_chunk_size`` rows.
 
         perform_create(serializer):
             Create a review, ensuring a user can only review a book once.
 
+        bulk_create(request):
+            Create a list of reviews in one transaction, reporting errors and conflicts per item.
+
         update(request, *args, **kwargs):
             Update a review if the logged-in user is the owner.
 
@@ -60,11 +112,38 @@ class ReviewViewSet(viewsets.ModelViewSet):
 
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
+    row_serializer = review_rows
     permission_classes = [
-        permissions.IsAuthenticatedOrReadOnly
-    ]  # Allow read-only for unauthenticated users
+        permissions.IsAuthenticatedOrReadOnly,
+        IsReviewerOrReadOnly,
+    ]  # Allow read-only for unauthenticated users, changes for the reviewer
     pagination_class = CustomPageNumberPagination
-    throttle_classes = [UserRateThrottle]
+    count_mode = counting.COUNT_ESTIMATE
+    stream_chunk_size = 1000
+    bulk_max_size = 500
+    throttle_classes = [SlidingWindowUserRateThrottle]
+
+    def list(self, request, *args, **kwargs):
+        """List reviews, answering conditional requests without serializing."""
+        validators = conditional.queryset_validators(
+            request, self.filter_queryset(self.get_queryset())
+        )
+        return conditional.conditional_response(
+            request,
+            validators,
+            lambda: super(ReviewViewSet, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve a review, answering conditional requests without serializing."""
+        validators = conditional.object_validators(
+            request, self.get_queryset(), kwargs[self.lookup_field]
+        )
+        return conditional.conditional_response(
+            request,
+            validators,
+            lambda: super(ReviewViewSet, self).retrieve(request, *args, **kwargs),
+        )
 
     @extend_schema(
         operation_id="list_reviews_for_book",
@@ -83,20 +162,30 @@ class ReviewViewSet(viewsets.ModelViewSet):
         },
     )
     def get_reviews_for_book(self, book_id):
-        """Retrieves reviews for a specific book."""
-        reviews = self.queryset.filter(book_id=book_id)
+        """Retrieves reviews for a specific book, oldest first."""
+        reviews = self.queryset.filter(book_id=book_id).order_by("created_at", "id")
         return reviews
 
     @extend_schema(
         operation_id="list_reviews",
-        description="List all reviews, or filter by book ID.",
+        description=(
+            "List the reviews of a book, paginated. With `stream=json` or "
+            "`stream=ndjson` every review is streamed instead, without pagination."
+        ),
         parameters=[
             OpenApiParameter(
                 name="book_id",
                 description="ID of the book to filter reviews by",
                 required=False,
                 type=int,
-            )
+            ),
+            OpenApiParameter(
+                name="stream",
+                description="Stream all reviews as a chunked JSON array or NDJSON",
+                required=False,
+                type=str,
+                enum=tuple(STREAM_CONTENT_TYPES),
+            ),
         ],
         responses={
             200: ReviewSerializer(many=True),
@@ -104,15 +193,63 @@ class ReviewViewSet(viewsets.ModelViewSet):
     )
     def reviews_for_book_by_id(self, request, book_id=None):
         """List all reviews for a specific book if `book_id` is provided."""
-        try:
-            # Check if the book exists
-            book = Book.objects.get(id=book_id)
-        except Book.DoesNotExist:
+        # Check if the book exists
+        if not Book.objects.filter(id=book_id).exists():
             return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
 
         reviews = self.get_reviews_for_book(book_id)
-        serializer = self.get_serializer(reviews, many=True)
-        return Response(serializer.data)
+        return conditional.conditional_response(
+            request,
+            conditional.queryset_validators(request, reviews),
+            lambda: self._reviews_for_book_response(request, reviews),
+        )
+
+    def _reviews_for_book_response(self, request, reviews):
+        stream_format = request.query_params.get("stream")
+        if stream_format is not None:
+            if stream_format not in STREAM_CONTENT_TYPES:
+                raise ValidationError(
+                    {"stream": f"Expected one of: {', '.join(STREAM_CONTENT_TYPES)}."}
+                )
+            return StreamingHttpResponse(
+                self.stream_reviews(reviews, stream_format),
+                content_type=STREAM_CONTENT_TYPES[stream_format],
+            )
+
+        page = self.paginate_queryset(reviews)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def stream_reviews(self, reviews, stream_format):
+        """
+        Yield the serialized reviews as a JSON array or as NDJSON.
+
+        Rows are fetched with a server-side iterator and written out one chunk
+        at a time, so memory use does not depend on the number of reviews.
+        """
+        serializer = self.get_serializer()
+        encoder = JSONEncoder(ensure_ascii=False)
+        ndjson = stream_format == "ndjson"
+
+        if not ndjson:
+            yield "["
+        separator = "" if ndjson else ","
+        chunk = []
+        first = True
+        for review in reviews.iterator(chunk_size=self.stream_chunk_size):
+            item = encoder.encode(serializer.to_representation(review))
+            if ndjson:
+                chunk.append(item + "\n")
+            else:
+                chunk.append(item if first else separator + item)
+            first = False
+            if len(chunk) >= self.stream_chunk_size:
+                yield "".join(chunk)
+                chunk = []
+        if chunk:
+            yield "".join(chunk)
+        if not ndjson:
+            yield "]"
 
     @extend_schema(
         operation_id="create_review",
@@ -135,6 +272,93 @@ class ReviewViewSet(viewsets.ModelViewSet):
         # Automatically set the reviewer as the logged-in user
         serializer.save(reviewer=user)
 
+    @extend_schema(
+        operation_id="bulk_create_reviews",
+        description=(
+            "Create several reviews in one request. Either every review is "
+            "created or none is: on error the response lists the errors of each "
+            "item, in order, with an empty object for the valid ones."
+        ),
+        request=ReviewSerializer(many=True),
+        responses={
+            201: ReviewSerializer(many=True),
+            400: {"description": "Validation errors or conflicts, per item"},
+        },
+    )
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk_create(self, request):
+        """Create a list of reviews in one transaction, one rating update per book."""
+        if not isinstance(request.data, list):
+            raise ValidationError({"detail": "Expected a list of reviews."})
+        if len(request.data) > self.bulk_max_size:
+            raise ValidationError(
+                {"detail": f"At most {self.bulk_max_size} reviews per request."}
+            )
+
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        user = request.user
+        reviews = [Review(reviewer=user, **item) for item in serializer.validated_data]
+        errors = self.bulk_conflicts(user, reviews)
+        if any(errors):
+            raise ValidationError(errors)
+
+        try:
+            with transaction.atomic():
+                Review.objects.bulk_create(reviews)
+                book_ids = {review.book_id for review in reviews}
+                # bulk_create sends no signals, so the rating aggregates are
+                # recomputed here, once per book for the whole batch, then the
+                # leaderboard rankings; or the books queued in deferred mode.
+                if rating_queue.is_deferred():
+                    rating_queue.mark_books(*book_ids)
+                else:
+                    Book.objects.filter(pk__in=book_ids).recompute_ratings()
+                    trending = defaultdict(float)
+                    for review in reviews:
+                        trending[review.book_id] += trending_weight(review.created_at)
+                    update_rankings(trending)
+        except IntegrityError:
+            # A concurrent request created one of the reviews in the meantime
+            raise ValidationError(self.bulk_conflicts(user, reviews))
+
+        invalidate_book_cache(*book_ids)
+        counting.invalidate_counts(Review)
+        return Response(
+            self.get_serializer(reviews, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    @staticmethod
+    def bulk_conflicts(user, reviews):
+        """
+        Return the ``unique_book_reviewer`` conflicts of ``reviews``, one error
+        dict per review (empty when there is none).
+        """
+        existing = set(
+            Review.objects.filter(
+                reviewer=user, book_id__in={review.book_id for review in reviews}
+            ).values_list("book_id", flat=True)
+        )
+        seen = {}
+        errors = []
+        for index, review in enumerate(reviews):
+            if review.book_id in existing:
+                errors.append({"book": ["You have already reviewed this book."]})
+            elif review.book_id in seen:
+                errors.append(
+                    {
+                        "book": [
+                            f"Duplicate of item {seen[review.book_id]} in this request."
+                        ]
+                    }
+                )
+            else:
+                errors.append({})
+                seen[review.book_id] = index
+        return errors
+
     @extend_schema(
         operation_id="update_review",
         description="Update a review. Only the owner can edit their review.",
@@ -146,13 +370,7 @@ class ReviewViewSet(viewsets.ModelViewSet):
         },
     )
     def update(self, request, *args, **kwargs):
-        """Update a review if the logged-in user is the owner."""
-        review = self.get_object()  # Get the review instance
-
-        # Check if the logged-in user is the owner of the review
-        if review.reviewer != request.user:
-            raise PermissionDenied("You do not have permission to edit this review.")
-
+        """Update a review if the logged-in user is the owner (see ``IsReviewerOrReadOnly``)."""
         return super().update(request, *args, **kwargs)
 
     @extend_schema(
@@ -165,11 +383,5 @@ class ReviewViewSet(viewsets.ModelViewSet):
         },
     )
     def destroy(self, request, *args, **kwargs):
-        """Delete a review if the logged-in user is the owner."""
-        review = self.get_object()  # Get the review instance
-
-        # Check if the logged-in user is the owner of the review
-        if review.reviewer != request.user:
-            raise PermissionDenied("You do not have permission to delete this review.")
-
+        """Delete a review if the logged-in user is the owner (see ``IsReviewerOrReadOnly``)."""
         return super().destroy(request, *args, **kwargs)
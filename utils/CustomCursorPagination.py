@@ -0,0 +1,120 @@
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.response import Response
+
+
+class CustomCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the indexed ``(created_at, id)`` pair.
+
+    Unlike offset pagination, every page is fetched with a range condition on
+    the ordering columns, so page N costs the same as page 1 and no COUNT(*)
+    is needed. The cursors are opaque to clients and encode the composite
+    position of the first/last row of the current page, so rows sharing the
+    same ``created_at`` are never skipped or repeated.
+    """
+
+    page_size = 10  # Default page size
+    page_size_query_param = 'page_size'  # Name of the query param that allows users to set page size
+    max_page_size = 100  # Maximum allowed page size
+    ordering = ('-created_at', '-id')
+    template = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        ordering = self._reverse(self.ordering) if reverse else self.ordering
+
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            queryset = queryset.filter(self._keyset_filter(ordering, self.cursor.position))
+
+        # Fetch one extra row to know whether there is a page following this one.
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following = len(results) > len(self.page)
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = self.cursor is not None
+
+        return self.page
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None:
+            return None
+
+        try:
+            position = json.loads(cursor.position)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        return Cursor(offset=0, reverse=cursor.reverse, position=position)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        position = self._get_position_from_instance(self.page[-1], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        position = self._get_position_from_instance(self.page[0], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'links': {
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link()
+            },
+            'page_size': self.page_size,
+            'results': data
+        })
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            field_name = order.lstrip('-')
+            if isinstance(instance, dict):
+                value = instance[field_name]
+            else:
+                value = getattr(instance, field_name)
+            values.append(value if isinstance(value, int) else str(value))
+        return json.dumps(values)
+
+    @staticmethod
+    def _reverse(ordering):
+        return tuple(order[1:] if order.startswith('-') else '-' + order for order in ordering)
+
+    @staticmethod
+    def _keyset_filter(ordering, position):
+        """
+        Build the condition selecting the rows strictly after ``position``.
+
+        For an ordering ``(a, b)`` this is ``a > x OR (a = x AND b > y)``, with the
+        comparisons flipped for descending fields.
+        """
+        condition = Q()
+        equal = Q()
+        for order, value in zip(ordering, position):
+            field_name = order.lstrip('-')
+            lookup = '__lt' if order.startswith('-') else '__gt'
+            condition |= equal & Q(**{field_name + lookup: value})
+            equal &= Q(**{field_name: value})
+        return condition
@@ -1,11 +1,124 @@
+from functools import partial
+
+from django.core.paginator import EmptyPage, InvalidPage, Page, PageNotAnInteger, Paginator
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
+from utils import counting
+
+
+class CountingPaginator(Paginator):
+    """A Django paginator that obtains its count from a counting strategy."""
+
+    def __init__(self, object_list, per_page, count_function=counting.exact_count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_function = count_function
+        self.count_is_approximate = False
+
+    @cached_property
+    def count(self):
+        count, self.count_is_approximate = self.count_function(self.object_list)
+        return count
+
+
+class UncountedPage(Page):
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+
+class UncountedPaginator(Paginator):
+    """
+    A Django paginator that never counts the rows.
+
+    One extra row is fetched to know whether a following page exists.
+    """
+
+    count = None
+    num_pages = None
+    count_is_approximate = False
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('That page contains no results')
+        return UncountedPage(
+            rows[:self.per_page], number, self, has_next=len(rows) > self.per_page
+        )
+
+
 class CustomPageNumberPagination(PageNumberPagination):
     page_size = 10  # Default page size
     page_size_query_param = 'page_size'  # Name of the query param that allows users to set page size
     max_page_size = 100  # Maximum allowed page size
 
+    # How total_count is obtained, see utils.counting. Viewsets can override
+    # both values with `count_mode` and `count_cache_timeout` attributes.
+    count_mode = counting.COUNT_EXACT
+    count_cache_timeout = counting.DEFAULT_CACHE_TIMEOUT
+
+    def get_paginator(self, queryset, page_size):
+        if self.count_mode == counting.COUNT_NONE:
+            return UncountedPaginator(queryset, page_size)
+
+        if self.count_mode == counting.COUNT_CACHED:
+            count_function = partial(counting.cached_count, timeout=self.count_cache_timeout)
+        elif self.count_mode == counting.COUNT_ESTIMATE:
+            count_function = partial(counting.estimated_count, timeout=self.count_cache_timeout)
+        else:
+            count_function = counting.exact_count
+        return CountingPaginator(queryset, page_size, count_function=count_function)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_mode = getattr(view, 'count_mode', self.count_mode)
+        self.count_cache_timeout = getattr(view, 'count_cache_timeout', self.count_cache_timeout)
+        assert self.count_mode in counting.COUNT_MODES, (
+            'Unknown count mode {!r}'.format(self.count_mode)
+        )
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.get_paginator(queryset, page_size)
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+            raise NotFound(msg)
+
+        if paginator.num_pages and paginator.num_pages > 1 and self.template is not None:
+            # The controls could be displayed in the browsable API
+            self.display_page_controls = True
+
+        return list(self.page)
+
     def get_paginated_response(self, data):
         return Response({
             'links': {
@@ -13,6 +126,7 @@ class CustomPageNumberPagination(PageNumberPagination):
                 'previous': self.get_previous_link()
             },
             'total_count': self.page.paginator.count,
+            'total_count_approximate': self.page.paginator.count_is_approximate,
             'page_size': self.get_page_size(self.request),
             'results': data
         })
@@ -0,0 +1,42 @@
+from rest_framework.exceptions import ValidationError
+
+from utils.CustomCursorPagination import CustomCursorPagination
+from utils.CustomPageNumberPagination import CustomPageNumberPagination
+
+
+class SelectablePaginationMixin:
+    """
+    Lets clients choose the pagination style of a viewset per request.
+
+    ``?paginate=page`` (the default) uses numbered pages with a total count,
+    ``?paginate=cursor`` uses keyset pagination whose cost does not grow with
+    the depth of the page.
+    """
+
+    pagination_query_param = 'paginate'
+    pagination_classes = {
+        'page': CustomPageNumberPagination,
+        'cursor': CustomCursorPagination,
+    }
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            request = getattr(self, 'request', None)
+            mode = None
+            if request is not None and hasattr(request, 'query_params'):
+                mode = request.query_params.get(self.pagination_query_param)
+
+            if mode is None:
+                pagination_class = self.pagination_class
+            elif mode in self.pagination_classes:
+                pagination_class = self.pagination_classes[mode]
+            else:
+                raise ValidationError({
+                    self.pagination_query_param: 'Expected one of: {}.'.format(
+                        ', '.join(self.pagination_classes)
+                    )
+                })
+
+            self._paginator = pagination_class() if pagination_class else None
+        return self._paginator
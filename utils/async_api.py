@@ -0,0 +1,129 @@
+"""
+Native async (ASGI) read endpoints built on the existing DRF viewsets.
+
+``async_action`` turns a coroutine into an async Django view that behaves like
+an action of a viewset: the viewset's authentication, permission and throttle
+checks, content negotiation and exception handling all apply, and the response
+is a DRF ``Response``. Only the checks, which may touch the cache or the
+database, run in a thread; the handler itself queries with the async ORM.
+
+Conditional GET and the book response cache are not applied on these routes.
+"""
+
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import MethodNotAllowed, NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from utils import counting
+
+SAFE_METHODS = ('get', 'head')
+
+
+def async_action(viewset_class, action):
+    """
+    Decorator for ``async def handler(view, request, **kwargs)``, where
+    ``view`` is an initialized ``viewset_class`` instance for ``action`` and
+    ``request`` the DRF request. The handler returns a ``Response``.
+
+    Example:
+        @async_action(BookViewSet, 'retrieve')
+        async def book_detail(view, request, pk):
+            ...
+    """
+
+    def decorator(handler):
+        async def async_view(request, *args, **kwargs):
+            view = viewset_class(
+                action_map={method: action for method in SAFE_METHODS},
+                args=args,
+                kwargs=kwargs,
+                format_kwarg=None,
+            )
+            request = view.initialize_request(request, *args, **kwargs)
+            view.request = request
+            view.headers = view.default_response_headers
+
+            try:
+                if request.method.lower() not in SAFE_METHODS:
+                    raise MethodNotAllowed(request.method)
+                await sync_to_async(view.initial)(request, *args, **kwargs)
+                response = await handler(view, request, *args, **kwargs)
+            except Exception as exc:
+                response = await sync_to_async(view.handle_exception)(exc)
+            return view.finalize_response(request, response, *args, **kwargs)
+
+        async_view.__name__ = handler.__name__
+        async_view.__doc__ = handler.__doc__
+        return async_view
+
+    return decorator
+
+
+async def acount(view, queryset):
+    """Async counterpart of the paginators' counting, see ``utils.counting``."""
+    count_mode = getattr(view, 'count_mode', counting.COUNT_EXACT)
+    timeout = getattr(view, 'count_cache_timeout', counting.DEFAULT_CACHE_TIMEOUT)
+    if count_mode == counting.COUNT_NONE:
+        return None, False
+    if count_mode == counting.COUNT_EXACT:
+        return await queryset.acount(), False
+    if count_mode == counting.COUNT_CACHED:
+        count_function = counting.cached_count
+    else:
+        count_function = counting.estimated_count
+    # These go through the cache, whose async API is not native either
+    return await sync_to_async(count_function)(queryset, timeout=timeout)
+
+
+async def paginated_rows(view, request, queryset, row_serializer):
+    """
+    Serialize one page of ``queryset`` through ``row_serializer``, in the
+    envelope of ``CustomPageNumberPagination``.
+    """
+    pagination = view.pagination_class()
+    page_size = pagination.get_page_size(request)
+    page_number = request.query_params.get(pagination.page_query_param) or 1
+    try:
+        number = int(page_number)
+        if number < 1:
+            raise ValueError
+    except ValueError:
+        raise NotFound(
+            pagination.invalid_page_message.format(
+                page_number=page_number, message='That page number is not valid'
+            )
+        )
+
+    # One extra row tells whether there is a next page
+    bottom = (number - 1) * page_size
+    window = queryset.values()[bottom:bottom + page_size + 1]
+    rows = [row async for row in window.aiterator()]
+    if not rows and number > 1:
+        raise NotFound(
+            pagination.invalid_page_message.format(
+                page_number=page_number, message='That page contains no results'
+            )
+        )
+    count, approximate = await acount(view, queryset)
+
+    url = request.build_absolute_uri()
+    next_link = None
+    if len(rows) > page_size:
+        next_link = replace_query_param(url, pagination.page_query_param, number + 1)
+    previous_link = None
+    if number == 2:
+        previous_link = remove_query_param(url, pagination.page_query_param)
+    elif number > 2:
+        previous_link = replace_query_param(url, pagination.page_query_param, number - 1)
+
+    return Response({
+        'links': {
+            'next': next_link,
+            'previous': previous_link,
+        },
+        'total_count': count,
+        'total_count_approximate': approximate,
+        'page_size': page_size,
+        'results': row_serializer.serialize(rows[:page_size]),
+    })
@@ -0,0 +1,62 @@
+"""
+Helpers for batched bulk writes.
+"""
+
+from itertools import islice
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def batched(iterable, size):
+    """
+    Yield lists of up to ``size`` items from ``iterable``.
+
+    Only one batch is held in memory at a time, so arbitrarily long iterables
+    (files, generators) can be written in constant memory.
+    """
+    if size < 1:
+        raise ValueError('size must be at least 1')
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def db_values(instance, fields, connection):
+    """
+    Return the database values of ``fields`` for a new, unsaved ``instance``,
+    as ``bulk_create`` would write them (``auto_now`` dates, defaults and
+    backend-specific conversions included).
+    """
+    return [
+        field.get_db_prep_save(field.pre_save(instance, True), connection)
+        for field in fields
+    ]
+
+
+def insert_rows(model, fields, rows, using=DEFAULT_DB_ALIAS):
+    """
+    Insert ``rows`` of database values (in the order of ``fields``) into the
+    table of ``model``, bypassing the ORM's per-row SQL compilation.
+
+    Uses ``COPY`` on PostgreSQL and ``executemany`` elsewhere. Values must be
+    prepared already, e.g. with ``db_values``; no signals are sent.
+    """
+    connection = connections[using]
+    quote_name = connection.ops.quote_name
+    table = quote_name(model._meta.db_table)
+    columns = ', '.join(quote_name(field.column) for field in fields)
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # The psycopg cursor underneath Django's wrapper
+            with cursor.cursor.copy(f'COPY {table} ({columns}) FROM STDIN') as copy:
+                for row in rows:
+                    copy.write_row(row)
+        else:
+            placeholders = ', '.join(['%s'] * len(fields))
+            cursor.executemany(
+                f'INSERT INTO {table} ({columns}) VALUES ({placeholders})', rows
+            )
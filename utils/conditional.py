@@ -0,0 +1,80 @@
+"""
+Conditional GET (ETag / Last-Modified) support for list and detail endpoints.
+
+Validators are computed from cheap queries: ``MAX(updated_at)`` and
+``MAX(id)`` plus the model's count generation (bumped by every write, see
+``utils.counting.invalidate_counts``) for lists, without counting the rows,
+and the ``updated_at`` of a single row for details. When the client's copy is current a ``304 Not Modified`` is returned
+before anything is serialized.
+"""
+
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from utils import counting
+
+
+def _make_etag(request, *parts):
+    # The representation depends on the URL (filters, pagination) and on the
+    # negotiated format, so both are part of the validator.
+    source = '|'.join(
+        [request.get_full_path(), request.META.get('HTTP_ACCEPT', '')]
+        + [str(part) for part in parts]
+    )
+    return quote_etag(hashlib.sha1(source.encode('utf-8')).hexdigest())
+
+
+def queryset_validators(request, queryset, field='updated_at'):
+    """
+    Return the ``(etag, last_modified)`` validators of a list of rows.
+
+    Edits move ``MAX(updated_at)`` and additions ``MAX(id)``; deletions, which
+    may move neither, bump the count generation.
+    """
+    latest = queryset.order_by().aggregate(last_modified=Max(field), last_id=Max('pk'))
+    generation = counting.count_generation(queryset.model)
+    etag = _make_etag(request, latest['last_modified'], latest['last_id'], generation)
+    return etag, latest['last_modified']
+
+
+def object_validators(request, queryset, pk, field='updated_at'):
+    """
+    Return the ``(etag, last_modified)`` validators of a single row.
+
+    Returns ``(None, None)`` if the row does not exist, including when ``pk``
+    is not a valid primary key, so that the view answers 404 as usual.
+    """
+    try:
+        pk = queryset.model._meta.pk.to_python(pk)
+    except (TypeError, ValueError, ValidationError):
+        return None, None
+    last_modified = queryset.filter(pk=pk).values_list(field, flat=True).first()
+    if last_modified is None:
+        return None, None
+    return _make_etag(request, pk, last_modified), last_modified
+
+
+def conditional_response(request, validators, get_response):
+    """
+    Answer ``request`` with ``304 Not Modified`` if the client's copy matches
+    ``validators``; otherwise call ``get_response`` and add the validators to it.
+    """
+    etag, last_modified = validators
+    if etag is None:
+        return get_response()
+
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = get_response()
+        if response.status_code != 200:
+            return response
+
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    return response
@@ -0,0 +1,124 @@
+"""
+Counting strategies for paginated list endpoints.
+
+Every strategy takes a queryset and returns a ``(count, approximate)`` tuple:
+
+- ``exact``: a plain ``COUNT(*)``.
+- ``cached``: an exact count kept in the cache for a TTL. Cached counts of a
+  model are invalidated as a whole by ``invalidate_counts`` (wired to the
+  Book/Review signals), so they never outlive a write.
+- ``estimate``: the query planner's row estimate (``pg_class.reltuples`` or
+  ``EXPLAIN`` on Postgres, ``MAX(rowid)`` on SQLite). Small results, and
+  filtered querysets on backends without a planner estimate, fall back to a
+  cached exact count.
+- ``none``: no count at all.
+"""
+
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+
+COUNT_EXACT = 'exact'
+COUNT_CACHED = 'cached'
+COUNT_ESTIMATE = 'estimate'
+COUNT_NONE = 'none'
+
+COUNT_MODES = (COUNT_EXACT, COUNT_CACHED, COUNT_ESTIMATE, COUNT_NONE)
+
+# Below this many rows an exact count is cheap, so estimates are not used.
+ESTIMATE_EXACT_THRESHOLD = 10000
+
+DEFAULT_CACHE_TIMEOUT = 300  # seconds
+
+
+def _generation_key(model):
+    return 'count-generation:{}'.format(model._meta.label_lower)
+
+
+def invalidate_counts(model):
+    """Invalidate every cached count of ``model`` by bumping its generation."""
+    key = _generation_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def count_generation(model):
+    """Return the generation of ``model``, bumped by every ``invalidate_counts``."""
+    return cache.get(_generation_key(model), 0)
+
+
+def exact_count(queryset):
+    return queryset.count(), False
+
+
+def cached_count(queryset, timeout=DEFAULT_CACHE_TIMEOUT):
+    try:
+        # Ordering and the selected columns do not change the count, so they
+        # are left out of the cache key.
+        sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    except EmptyResultSet:
+        return 0, False
+
+    generation = count_generation(queryset.model)
+    digest = hashlib.sha1((sql + repr(params)).encode('utf-8')).hexdigest()
+    key = 'count:{}:{}:{}'.format(queryset.model._meta.label_lower, generation, digest)
+
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, timeout)
+    return count, False
+
+
+def estimated_count(queryset, timeout=DEFAULT_CACHE_TIMEOUT):
+    estimate = _planner_estimate(queryset)
+    if estimate is None or estimate < ESTIMATE_EXACT_THRESHOLD:
+        return cached_count(queryset, timeout)
+    return estimate, True
+
+
+def _planner_estimate(queryset):
+    """Return the backend's row estimate for ``queryset``, or None if unavailable."""
+    query = queryset.query
+    if query.is_empty():
+        return 0
+    unfiltered = not query.where and not query.distinct and not query.is_sliced
+
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            if unfiltered:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                    [connection.ops.quote_name(table)],
+                )
+            else:
+                try:
+                    sql, params = query.sql_with_params()
+                except EmptyResultSet:
+                    return 0
+                cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return int(plan[0]['Plan']['Plan Rows'])
+        elif connection.vendor == 'sqlite' and unfiltered:
+            # SQLite has no planner statistics by default; the largest rowid is
+            # an index lookup and an upper bound of the row count.
+            cursor.execute(
+                'SELECT MAX(_rowid_) FROM {}'.format(connection.ops.quote_name(table))
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+
+    if row is None or row[0] is None or row[0] < 0:
+        # A never-analyzed Postgres table reports -1 tuples.
+        return None
+    return int(row[0])
@@ -0,0 +1,81 @@
+"""
+PostgreSQL backend taking its connections from a psycopg connection pool.
+
+Configured like ``django.db.backends.postgresql``, plus an optional ``POOL``
+dict of ``psycopg_pool.ConnectionPool`` options (see
+``utils.db.pool.POOL_DEFAULTS``). Use it with ``CONN_MAX_AGE = 0``: closing
+the connection at the end of each request puts it back in the pool.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base, creation
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+from django.utils.asyncio import async_unsafe
+
+from utils.db import pool
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    # Idle pooled connections would keep the databases in use
+
+    def _create_test_db(self, verbosity, autoclobber, keepdb=False):
+        self.connection.close_pool()
+        return super()._create_test_db(verbosity, autoclobber, keepdb)
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        self.connection.close_pool()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool = None
+
+    @property
+    def pooled(self):
+        # Connections to the maintenance database (test setup) are not pooled
+        return self.alias != NO_DB_ALIAS
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        if not self.pooled:
+            return super().get_new_connection(conn_params)
+
+        options = self.settings_dict['OPTIONS']
+        if 'isolation_level' in options:
+            try:
+                self.isolation_level = IsolationLevel(options['isolation_level'])
+            except ValueError:
+                raise ImproperlyConfigured(
+                    f"Invalid transaction isolation level {options['isolation_level']} "
+                    f"specified. Use one of the psycopg.IsolationLevel values."
+                )
+        else:
+            self.isolation_level = IsolationLevel.READ_COMMITTED
+
+        # Checked with a round trip before being handed out
+        self._pool = pool.get_pool(self.alias, self.settings_dict, conn_params)
+        connection = self._pool.getconn()
+        if 'isolation_level' in options:
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self):
+        if self._pool is None or self.connection is None:
+            return super()._close()
+        # The pool rolls back an unfinished transaction and discards broken connections
+        connection, self.connection = self.connection, None
+        with self.wrap_database_errors:
+            # Not kept when closed inside atomic(): another thread may get it next
+            self._pool.putconn(connection)
+
+    def close_pool(self):
+        """Close the pool this connection's settings currently point to."""
+        self.close()
+        if self.pooled:
+            pool.close_pool(self.alias, self.get_connection_params())
+        self._pool = None
@@ -0,0 +1,135 @@
+"""
+Process-wide psycopg connection pools, used by the
+``utils.db.backends.postgresql_pool`` database backend.
+
+Each database gets one ``psycopg_pool.ConnectionPool`` per process, shared by
+all its threads. Django checks a connection out when it would open one and
+puts it back when it would close it, so with ``CONN_MAX_AGE = 0`` a request
+holds a connection only while it runs. The pool checks every connection
+before handing it out and replaces connections older than ``max_lifetime``
+or idle for longer than ``max_idle``.
+
+``pool_stats()`` reports the size, utilization and wait times of the pools of
+this process.
+"""
+
+import os
+import threading
+
+# Options of psycopg_pool.ConnectionPool, overridden by the POOL dict of the
+# database settings.
+POOL_DEFAULTS = {
+    'min_size': 2,
+    'max_size': 10,
+    'timeout': 30.0,  # Seconds to wait for a connection before giving up
+    'max_lifetime': 3600.0,  # Seconds before a connection is replaced
+    'max_idle': 600.0,  # Seconds an unused connection above min_size is kept
+}
+
+_lock = threading.Lock()
+_pools = {}
+# Pools inherited through fork(), see _forget_pools()
+_inherited = []
+
+
+def _pool_key(alias, conn_params):
+    # The test runner renames the database of an alias, which needs a new pool
+    return (
+        alias,
+        conn_params.get('dbname'),
+        conn_params.get('host'),
+        conn_params.get('port'),
+        conn_params.get('user'),
+    )
+
+
+def get_pool(alias, settings_dict, conn_params):
+    """Return the pool of ``alias`` connecting with ``conn_params``, opening it on first use."""
+    key = _pool_key(alias, conn_params)
+    pool = _pools.get(key)
+    if pool is None:
+        with _lock:
+            pool = _pools.get(key)
+            if pool is None:
+                from psycopg_pool import ConnectionPool
+
+                options = {**POOL_DEFAULTS, **settings_dict.get('POOL', {})}
+                pool = ConnectionPool(
+                    kwargs=conn_params,
+                    check=ConnectionPool.check_connection,
+                    name=alias,
+                    open=True,
+                    **options,
+                )
+                _pools[key] = pool
+    return pool
+
+
+def close_pool(alias, conn_params):
+    """Close the pool of ``alias`` for ``conn_params``, if it was opened."""
+    with _lock:
+        pool = _pools.pop(_pool_key(alias, conn_params), None)
+    if pool is not None:
+        pool.close()
+
+
+def close_pools():
+    """Close every pool of this process."""
+    with _lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+def _forget_pools():
+    # A forked child shares the sockets of the parent's pools but not their
+    # worker threads. Closing them would end the parent's sessions, so they
+    # are only set aside (and kept referenced, so they are never finalized).
+    global _lock
+    _lock = threading.Lock()
+    _inherited.extend(_pools.values())
+    _pools.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_pools)
+
+
+def summarize_pool_stats(stats):
+    """
+    Turn the counters of ``ConnectionPool.get_stats()`` into pool metrics.
+
+    ``utilization`` is the share of ``max_size`` checked out right now. Wait
+    times cover every checkout since the pool was opened; ``requests_queued``
+    counts those that found no idle connection.
+    """
+    size = stats.get('pool_size', 0)
+    max_size = stats.get('pool_max', 0)
+    in_use = size - stats.get('pool_available', 0)
+    requests = stats.get('requests_num', 0)
+    wait_ms = stats.get('requests_wait_ms', 0)
+    return {
+        'min_size': stats.get('pool_min', 0),
+        'max_size': max_size,
+        'size': size,
+        'in_use': in_use,
+        'idle': stats.get('pool_available', 0),
+        'utilization': round(in_use / max_size, 3) if max_size else 0.0,
+        'requests': requests,
+        'requests_queued': stats.get('requests_queued', 0),
+        'requests_waiting': stats.get('requests_waiting', 0),
+        'requests_timed_out': stats.get('requests_errors', 0),
+        'wait_ms_total': wait_ms,
+        'wait_ms_avg': round(wait_ms / requests, 3) if requests else 0.0,
+        'connections_opened': stats.get('connections_num', 0),
+        'connections_lost': stats.get('connections_lost', 0),
+        'connections_bad_on_return': stats.get('returns_bad', 0),
+    }
+
+
+def pool_stats():
+    """Return the metrics of every pool of this process by database alias."""
+    with _lock:
+        pools = list(_pools.items())
+    return {key[0]: summarize_pool_stats(pool.get_stats()) for key, pool in pools}
@@ -0,0 +1,91 @@
+"""
+Read-replica routing with read-your-writes stickiness.
+
+Viewsets using ``ReplicaReadMixin`` send the queries of safe requests to one
+of ``settings.DATABASE_REPLICAS``, chosen at random per request, through a
+context variable read by ``ReplicaRouter``. Everything else, including every
+write, uses the primary (``default``).
+
+When a user writes through such a viewset, their requests stick to the
+primary for ``settings.DATABASE_REPLICA_STICKY_SECONDS``, so they see their
+own changes despite replication lag. The marker is kept in the default cache,
+so it is shared by all workers when the cache is.
+"""
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+_read_database = ContextVar('read_database', default=None)
+
+
+def get_read_database():
+    """Return the alias reads are routed to in this context, None for the primary."""
+    return _read_database.get()
+
+
+def _sticky_key(user):
+    return 'db:sticky:{}'.format(user.pk)
+
+
+def stick_to_primary(user):
+    """Route ``user``'s requests to the primary for the sticky window."""
+    cache.set(_sticky_key(user), True, settings.DATABASE_REPLICA_STICKY_SECONDS)
+
+
+def is_sticky(user):
+    return bool(user and user.is_authenticated and cache.get(_sticky_key(user)))
+
+
+class ReplicaRouter:
+    """Routes reads to the replica selected for the current request, if any."""
+
+    def db_for_read(self, model, **hints):
+        return _read_database.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaReadMixin:
+    """
+    Viewset mixin reading from a replica on safe requests, unless the user
+    wrote recently. Successful writes start the user's sticky window.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        # Whatever initial() selects is undone when the request is over
+        token = _read_database.set(None)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            _read_database.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        # Authenticates the user first, stickiness depends on them
+        super().initial(request, *args, **kwargs)
+        replicas = settings.DATABASE_REPLICAS
+        if request.method in SAFE_METHODS and replicas and not is_sticky(request.user):
+            _read_database.set(random.choice(replicas))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            stick_to_primary(request.user)
+        return response
@@ -0,0 +1,22 @@
+from drf_spectacular.utils import extend_schema
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from utils.db.pool import pool_stats
+
+
+class PoolStatsView(APIView):
+    """
+    Metrics of this process's database connection pools, by database alias.
+    Empty unless the pooled backend is in use (admins only).
+    """
+
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        operation_id='db_pool_stats',
+        responses={200: {'description': 'Pool size, utilization and wait times by database'}},
+    )
+    def get(self, request):
+        return Response(pool_stats())
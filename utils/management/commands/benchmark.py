@@ -0,0 +1,340 @@
+import json
+import math
+import random
+import tempfile
+import time
+from contextlib import ExitStack
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from django.urls import reverse
+from rest_framework.views import APIView
+
+from books.models import Book
+from reviews.models import Review
+from utils.CustomPageNumberPagination import CustomPageNumberPagination
+from utils.timing import RequestTimings
+
+BENCHMARK_USERNAME = 'benchmark-user'
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+# Compared with the baseline: latencies may vary within the tolerance. Query
+# counts only vary with what the caches hold, so half a query more per
+# request is a regression.
+COMPARED_LATENCIES = ('p50_ms', 'p95_ms', 'p99_ms')
+QUERIES_TOLERANCE = 0.5
+
+
+def percentile(sorted_values, share):
+    """Nearest-rank percentile of a sorted list."""
+    return sorted_values[max(math.ceil(share * len(sorted_values)) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database with books and reviews, drive every API '
+        'route in-process and report latency percentiles, throughput and '
+        'queries per request. Results can be saved as a JSON baseline and '
+        'compared with one, failing on regressions'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--books',
+            type=int,
+            default=10000,
+            help='Number of books in the dataset (default is 10000)',
+        )
+        parser.add_argument(
+            '--reviews',
+            type=int,
+            default=1000000,
+            help='Number of reviews in the dataset (default is 1000000)',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Measured requests per route (default is 200; writes are capped by --books)',
+        )
+        parser.add_argument(
+            '--login-requests',
+            type=int,
+            default=20,
+            help='Measured logins, slow by design of password hashing (default is 20)',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=5,
+            help='Unmeasured requests sent to each read route first (default is 5)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Seed of the dataset and of the requests (default is 0)',
+        )
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Keep the test database, and its dataset, for the next run',
+        )
+        parser.add_argument(
+            '--no-test-database',
+            action='store_true',
+            help='Seed and benchmark the configured database instead of a test database',
+        )
+        parser.add_argument(
+            '--with-cache',
+            action='store_true',
+            help='Keep the book response cache on (by default the views are measured)',
+        )
+        parser.add_argument(
+            '--save-baseline',
+            type=Path,
+            help='Write the results to this JSON file',
+        )
+        parser.add_argument(
+            '--baseline',
+            type=Path,
+            help='Compare the results with this JSON file and fail on regressions',
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.25,
+            help='Allowed relative latency increase over the baseline (default is 0.25)',
+        )
+
+    def handle(self, *args, **kwargs):
+        if min(kwargs['books'], kwargs['requests'], kwargs['login_requests']) < 1:
+            raise CommandError('--books, --requests and --login-requests must be at least 1')
+        baseline = None
+        if kwargs['baseline']:
+            try:
+                baseline = json.loads(kwargs['baseline'].read_text())
+            except (OSError, ValueError) as error:
+                raise CommandError(f'Could not read the baseline: {error}')
+
+        verbosity = kwargs['verbosity']
+        with ExitStack() as stack:
+            if not kwargs['no_test_database']:
+                old_config = setup_databases(
+                    verbosity=max(verbosity - 1, 0), interactive=False, keepdb=kwargs['keepdb']
+                )
+                stack.callback(
+                    teardown_databases,
+                    old_config,
+                    verbosity=max(verbosity - 1, 0),
+                    keepdb=kwargs['keepdb'],
+                )
+            # Measure the views, not the rate limits, and keep the sampled
+            # timings and the metrics of the service out of it
+            stack.enter_context(mock.patch.object(APIView, 'get_throttles', lambda view: []))
+            metrics_dir = stack.enter_context(tempfile.TemporaryDirectory())
+            stack.enter_context(
+                override_settings(METRICS_DIR=Path(metrics_dir), REQUEST_TIMING_SAMPLE_RATE=0)
+            )
+            if not kwargs['with_cache']:
+                stack.enter_context(override_settings(BOOKS_CACHE_TIMEOUT=0))
+
+            self.seed(kwargs['books'], kwargs['reviews'], kwargs['seed'])
+            results = self.run(kwargs)
+
+        self.report(results)
+        dataset = {'books': kwargs['books'], 'reviews': kwargs['reviews']}
+        if kwargs['save_baseline']:
+            kwargs['save_baseline'].write_text(
+                json.dumps({'dataset': dataset, 'routes': results}, indent=2) + '\n'
+            )
+            self.stdout.write(self.style.SUCCESS(f'Baseline saved to {kwargs["save_baseline"]}'))
+        if baseline is not None:
+            regressions = self.compare(baseline, dataset, results, kwargs['tolerance'])
+            if regressions:
+                raise CommandError(
+                    f'{regressions} regression(s) against {kwargs["baseline"]}'
+                )
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+
+    def seed(self, num_books, num_reviews, seed):
+        """Top the dataset up to ``num_books`` books and ``num_reviews`` reviews."""
+        quiet = {'stdout': StringIO(), 'seed': seed}
+        started = time.monotonic()
+        missing_books = num_books - Book.objects.count()
+        if missing_books > 0:
+            call_command('populate_books', num_books=missing_books, **quiet)
+        missing_reviews = num_reviews - Review.objects.count()
+        if missing_reviews > 0:
+            call_command('populate_reviews', num_reviews=missing_reviews, **quiet)
+        if missing_books > 0 or missing_reviews > 0:
+            self.stdout.write(f'Seeded the dataset in {time.monotonic() - started:.1f}s')
+
+        user = User.objects.filter(username=BENCHMARK_USERNAME).first()
+        if user is None:
+            User.objects.create_user(BENCHMARK_USERNAME, password=BENCHMARK_PASSWORD)
+        else:
+            # Left over by an interrupted run on a kept database
+            Review.objects.filter(reviewer=user).delete()
+
+    def run(self, kwargs):
+        """Drive every route, returning the results by route name."""
+        generator = random.Random(kwargs['seed'])
+        book_ids = list(Book.objects.values_list('id', flat=True))
+        requests = kwargs['requests']
+        host = next((h for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost')
+        client = Client(HTTP_HOST=host)
+
+        def access_token():
+            response = client.post(
+                reverse('token_obtain_pair'),
+                {'username': BENCHMARK_USERNAME, 'password': BENCHMARK_PASSWORD},
+            )
+            return 'Bearer ' + response.json()['access']
+
+        # The first pages, where most traffic goes
+        pages = max(1, min(20, len(book_ids) // CustomPageNumberPagination.page_size))
+        routes = [
+            ('book-list', lambda: f'{reverse("book-list")}?page={generator.randint(1, pages)}'),
+            ('book-detail', lambda: reverse('book-detail', args=[generator.choice(book_ids)])),
+            ('book-reviews', lambda: reverse('book-reviews', args=[generator.choice(book_ids)])),
+        ]
+        results = {}
+        for route, url in routes:
+            for _ in range(kwargs['warmup']):
+                client.get(url())
+            results[route] = self.measure(requests, lambda: client.get(url()))
+
+        # One write per book, as a user reviews a book once; tokens last minutes
+        written = generator.sample(book_ids, min(requests, len(book_ids)))
+        created = []
+        authorization = access_token()
+
+        def create():
+            response = client.post(
+                reverse('review-list'),
+                {
+                    'book': written[len(created)],
+                    'rating': generator.randint(1, 5),
+                    'comment': 'Benchmark',
+                },
+                content_type='application/json',
+                HTTP_AUTHORIZATION=authorization,
+            )
+            created.append(response.json().get('id'))
+            return response
+
+        results['review-create'] = self.measure(len(written), create)
+
+        authorization = access_token()
+        updates = iter(zip(created, written))
+
+        def update():
+            review_id, book_id = next(updates)
+            return client.put(
+                reverse('review-detail', args=[review_id]),
+                {'book': book_id, 'rating': generator.randint(1, 5), 'comment': 'Updated'},
+                content_type='application/json',
+                HTTP_AUTHORIZATION=authorization,
+            )
+
+        results['review-update'] = self.measure(len(created), update)
+
+        authorization = access_token()
+        deletes = iter(created)
+        results['review-delete'] = self.measure(
+            len(created),
+            lambda: client.delete(
+                reverse('review-detail', args=[next(deletes)]),
+                HTTP_AUTHORIZATION=authorization,
+            ),
+        )
+
+        results['login'] = self.measure(
+            kwargs['login_requests'],
+            lambda: client.post(
+                reverse('token_obtain_pair'),
+                {'username': BENCHMARK_USERNAME, 'password': BENCHMARK_PASSWORD},
+            ),
+        )
+        return results
+
+    def measure(self, count, send):
+        """Send ``count`` requests with ``send()``, counting their queries."""
+        latencies = []
+        queries = 0
+        db_time = 0.0
+        errors = 0
+        for _ in range(count):
+            timings = RequestTimings()
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                started = time.perf_counter()
+                response = send()
+                latencies.append(time.perf_counter() - started)
+            queries += timings.queries
+            db_time += timings.db
+            errors += response.status_code >= 400
+
+        latencies.sort()
+        elapsed = sum(latencies)
+        return {
+            'requests': count,
+            'errors': errors,
+            'throughput': round(count / elapsed, 1) if elapsed else 0.0,
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+            'queries_per_request': round(queries / count, 2),
+            'db_ms_per_request': round(db_time * 1000 / count, 2),
+        }
+
+    def report(self, results):
+        self.stdout.write(
+            f'{"route":<15} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} '
+            f'{"queries":>8} {"db ms":>8}'
+        )
+        for route, result in results.items():
+            line = (
+                f'{route:<15} {result["throughput"]:8.1f} {result["p50_ms"]:8.2f} '
+                f'{result["p95_ms"]:8.2f} {result["p99_ms"]:8.2f} '
+                f'{result["queries_per_request"]:8.2f} {result["db_ms_per_request"]:8.2f}'
+            )
+            if result['errors']:
+                self.stdout.write(self.style.WARNING(f'{line}   {result["errors"]} errors'))
+            else:
+                self.stdout.write(line)
+
+    def compare(self, baseline, dataset, results, tolerance):
+        """Report the results that regressed from ``baseline``, returning how many."""
+        if baseline.get('dataset') != dataset:
+            self.stdout.write(self.style.WARNING(
+                f'The baseline was measured on another dataset: {baseline.get("dataset")}'
+            ))
+        regressions = 0
+        for route, result in results.items():
+            previous = baseline.get('routes', {}).get(route)
+            if previous is None:
+                continue
+            problems = [
+                f'{key} {previous[key]} -> {result[key]}'
+                for key in COMPARED_LATENCIES
+                if result[key] > previous[key] * (1 + tolerance)
+            ]
+            if result['queries_per_request'] >= previous['queries_per_request'] + QUERIES_TOLERANCE:
+                problems.append(
+                    f'queries {previous["queries_per_request"]} -> {result["queries_per_request"]}'
+                )
+            if problems:
+                regressions += 1
+                self.stdout.write(self.style.ERROR(f'{route}: {", ".join(problems)}'))
+        return regressions
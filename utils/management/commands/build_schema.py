@@ -0,0 +1,26 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from utils.schema import clear_schema_cache, write_schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the OpenAPI schema served at /api/schema/ (YAML and JSON, "
+        "plain and gzipped), so it is not generated at run time"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output-dir',
+            type=Path,
+            help='Directory to write to (default is settings.SCHEMA_DIR)',
+        )
+
+    def handle(self, *args, **kwargs):
+        directory = kwargs['output_dir'] or settings.SCHEMA_DIR
+        for path in write_schema(directory):
+            self.stdout.write(self.style.SUCCESS(f'Wrote {path} and {path.name}.gz'))
+        clear_schema_cache()
@@ -0,0 +1,275 @@
+"""
+Request metrics: per-route request counts by status class and latency
+histograms, aggregated over every worker process and served in the
+Prometheus text format at /metrics.
+
+Each process adds to the values of its own memory-mapped file in
+``settings.METRICS_DIR`` (see ``MmapValues``), so recording a request takes
+no lock shared with other processes and no system call. The scrape view sums
+the files of all processes, including exited ones so that counters never go
+backwards; empty the directory when the service is deployed.
+
+Routes are the URL names (``book-list``, ``token_obtain_pair``, ...), so the
+number of series stays bounded.
+"""
+
+import bisect
+import hmac
+import mmap
+import os
+import struct
+import threading
+from collections import defaultdict
+from pathlib import Path
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import require_safe
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_BUCKET_LABELS = tuple(repr(bound) for bound in LATENCY_BUCKETS) + ('+Inf',)
+
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_HEADER = struct.Struct('<I4x')  # Bytes in use
+_KEY_LENGTH = struct.Struct('<I')
+_VALUE = struct.Struct('<d')
+
+
+def _entries(data, used):
+    """Yield the ``(key, value, value position)`` entries of a values file."""
+    position = _HEADER.size
+    while position < used:
+        (length,) = _KEY_LENGTH.unpack_from(data, position)
+        key = bytes(data[position + 4:position + 4 + length]).decode('utf-8')
+        value_position = position + _value_offset(length)
+        (value,) = _VALUE.unpack_from(data, value_position)
+        yield key, value, value_position
+        position = value_position + _VALUE.size
+
+
+def _value_offset(key_length):
+    # Values are 8-byte aligned
+    return (_KEY_LENGTH.size + key_length + 7) // 8 * 8
+
+
+class MmapValues:
+    """
+    Float values by key in a memory-mapped file, written by a single process.
+
+    Entries (key length, key, value) are only ever appended, then updated in
+    place; the header, holding the number of bytes in use, is written last so
+    that readers never see a partial entry. A file left by an earlier process
+    with the same pid is carried on.
+    """
+
+    INITIAL_SIZE = 64 * 1024
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a+b')
+        if os.fstat(self._file.fileno()).st_size < _HEADER.size:
+            self._file.truncate(self.INITIAL_SIZE)
+        self._map()
+        self._used = _HEADER.unpack_from(self._mmap, 0)[0] or _HEADER.size
+        self._positions = {
+            key: position for key, _, position in _entries(self._mmap, self._used)
+        }
+
+    def _map(self):
+        self._capacity = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), self._capacity)
+
+    def _append(self, key):
+        encoded = key.encode('utf-8')
+        value_position = self._used + _value_offset(len(encoded))
+        end = value_position + _VALUE.size
+        if end > self._capacity:
+            capacity = self._capacity
+            while end > capacity:
+                capacity *= 2
+            self._mmap.close()
+            self._file.truncate(capacity)
+            self._map()
+
+        _KEY_LENGTH.pack_into(self._mmap, self._used, len(encoded))
+        self._mmap[self._used + 4:self._used + 4 + len(encoded)] = encoded
+        _VALUE.pack_into(self._mmap, value_position, 0.0)
+        self._used = end
+        _HEADER.pack_into(self._mmap, 0, end)
+        self._positions[key] = value_position
+        return value_position
+
+    def incr(self, key, amount=1.0):
+        position = self._positions.get(key)
+        if position is None:
+            position = self._append(key)
+        (value,) = _VALUE.unpack_from(self._mmap, position)
+        _VALUE.pack_into(self._mmap, position, value + amount)
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+
+def read_values(path):
+    """Return the ``(key, value)`` entries of a values file written by any process."""
+    data = Path(path).read_bytes()
+    if len(data) < _HEADER.size:
+        return []
+    (used,) = _HEADER.unpack_from(data, 0)
+    return [(key, value) for key, value, _ in _entries(data, min(used, len(data)))]
+
+
+_lock = threading.Lock()
+_values = {}
+
+
+def get_values():
+    """Return this process's ``MmapValues`` in ``settings.METRICS_DIR``."""
+    directory = settings.METRICS_DIR
+    values = _values.get(directory)
+    if values is None:
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        values = MmapValues(path / 'metrics_{}.db'.format(os.getpid()))
+        _values[directory] = values
+    return values
+
+
+def _forget_values():
+    # The child writes to a file of its own; the parent's mapping is left alone
+    global _lock
+    _lock = threading.Lock()
+    _values.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_values)
+
+
+def observe_request(route, method, status, seconds):
+    """Count a request to ``route`` and add its latency to the histogram."""
+    labels = '{}|{}'.format(route, method if method in METHODS else 'other')
+    bucket = _BUCKET_LABELS[bisect.bisect_left(LATENCY_BUCKETS, seconds)]
+    with _lock:
+        values = get_values()
+        values.incr('requests|{}|{}xx'.format(labels, status // 100))
+        values.incr('latency_bucket|{}|{}'.format(labels, bucket))
+        values.incr('latency_sum|' + labels, seconds)
+
+
+def collect():
+    """Return the sum of every process's values, by key."""
+    totals = defaultdict(float)
+    for path in Path(settings.METRICS_DIR).glob('metrics_*.db'):
+        for key, value in read_values(path):
+            totals[key] += value
+    return totals
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return ','.join('{}="{}"'.format(name, _escape(value)) for name, value in labels.items())
+
+
+def render_metrics(totals):
+    """Render collected values in the Prometheus text exposition format."""
+    requests = []
+    buckets = defaultdict(dict)
+    sums = {}
+    for key, value in totals.items():
+        kind, route, method, last = (key.split('|') + [None])[:4]
+        if kind == 'requests':
+            requests.append(((route, method, last), value))
+        elif kind == 'latency_bucket':
+            buckets[route, method][last] = value
+        elif kind == 'latency_sum':
+            sums[route, method] = value
+
+    lines = [
+        '# HELP http_requests_total Requests by route, method and status class.',
+        '# TYPE http_requests_total counter',
+    ]
+    for (route, method, status), value in sorted(requests):
+        lines.append('http_requests_total{{{}}} {!r}'.format(
+            _labels(route=route, method=method, status=status), value,
+        ))
+
+    lines += [
+        '# HELP http_request_duration_seconds Request latency by route and method.',
+        '# TYPE http_request_duration_seconds histogram',
+    ]
+    for (route, method), counts in sorted(buckets.items()):
+        cumulative = 0.0
+        for bucket in _BUCKET_LABELS:
+            cumulative += counts.get(bucket, 0.0)
+            lines.append('http_request_duration_seconds_bucket{{{}}} {!r}'.format(
+                _labels(route=route, method=method, le=bucket), cumulative,
+            ))
+        series = _labels(route=route, method=method)
+        lines.append('http_request_duration_seconds_sum{{{}}} {!r}'.format(
+            series, sums.get((route, method), 0.0),
+        ))
+        lines.append('http_request_duration_seconds_count{{{}}} {!r}'.format(series, cumulative))
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """
+    Records the route, status and latency of every request. Best placed first
+    in ``MIDDLEWARE``. Runs natively under both WSGI and ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = perf_counter()
+        response = self.get_response(request)
+        self.observe(request, response, start)
+        return response
+
+    async def __acall__(self, request):
+        start = perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, response, start)
+        return response
+
+    def observe(self, request, response, start):
+        match = request.resolver_match
+        if match is None:
+            route = 'unmatched'
+        else:
+            route = match.url_name or match.route or 'unnamed'
+        observe_request(route, request.method, response.status_code, perf_counter() - start)
+
+
+@require_safe
+def metrics_view(request):
+    """
+    Serve the metrics of all workers. Requires an ``Authorization: Bearer``
+    header with ``settings.METRICS_TOKEN`` when it is set.
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        expected = 'Bearer {}'.format(token).encode('utf-8')
+        provided = request.headers.get('Authorization', '').encode('utf-8')
+        if not hmac.compare_digest(provided, expected):
+            return HttpResponse(status=401, headers={'WWW-Authenticate': 'Bearer'})
+    return HttpResponse(render_metrics(collect()), content_type=CONTENT_TYPE)
@@ -0,0 +1,111 @@
+"""
+Query budgets: the most SQL queries each API route may run per request.
+
+``QUERY_BUDGETS`` declares them by URL name and HTTP method.
+``QueryBudgetMixin`` gives test cases ``assertQueryBudget``, which sends a
+request at several dataset sizes, with cold caches, and fails when it goes
+over budget or when its query count grows with the dataset, the signature of
+an N+1 pattern.
+"""
+
+from contextlib import ExitStack
+
+from django.core.cache import cache
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+# (URL name, method): queries. Cold caches, so cached lookups count.
+QUERY_BUDGETS = {
+    # BookViewSet
+    ('book-list', 'GET'): 3,
+    ('book-detail', 'GET'): 2,
+    ('book-top-rated', 'GET'): 1,
+    ('book-trending', 'GET'): 1,
+    # ReviewViewSet
+    ('review-list', 'GET'): 4,
+    ('review-list', 'POST'): 6,
+    ('review-detail', 'GET'): 2,
+    ('review-detail', 'PUT'): 6,
+    ('review-detail', 'PATCH'): 6,
+    ('review-detail', 'DELETE'): 5,
+    # Three items, each validated on its own
+    ('review-bulk-create', 'POST'): 10,
+    ('book-reviews', 'GET'): 4,
+    # Authentication
+    ('register', 'POST'): 2,
+    ('token_obtain_pair', 'POST'): 1,
+    ('token_refresh', 'POST'): 0,
+}
+
+
+class QueryCounter:
+    """Captures the queries run on every database connection within a ``with`` block."""
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        self._contexts = [
+            self._stack.enter_context(CaptureQueriesContext(connections[alias]))
+            for alias in connections
+        ]
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    @property
+    def queries(self):
+        return [query['sql'] for context in self._contexts for query in context.captured_queries]
+
+    def __len__(self):
+        return len(self.queries)
+
+
+class QueryBudgetMixin:
+    """
+    Test case mixin checking requests against ``QUERY_BUDGETS``.
+
+    Subclasses implement ``grow_dataset(size)``, called with each of
+    ``dataset_sizes`` in turn.
+    """
+
+    query_budgets = QUERY_BUDGETS
+    dataset_sizes = (1, 10, 30)
+
+    def grow_dataset(self, size):
+        raise NotImplementedError
+
+    def clear_caches(self):
+        """Start each measured request from cold caches, the worst case."""
+        cache.clear()
+
+    def assertQueryBudget(self, route, method, send, setup=None):
+        """
+        Check ``send(*setup())``, a request to ``route`` with ``method``, at
+        each dataset size. ``setup`` prepares what the request needs, outside
+        of the count.
+        """
+        budget = self.query_budgets[route, method]
+        counts = {}
+        for size in self.dataset_sizes:
+            self.grow_dataset(size)
+            args = setup() if setup else ()
+            self.clear_caches()
+            with QueryCounter() as counter:
+                response = send(*args)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            self.assertLess(response.status_code, 400, f'{method} {route}: {response.status_code}')
+            queries = counter.queries
+            self.assertLessEqual(
+                len(queries),
+                budget,
+                '{} {} ran {} queries for a budget of {} (dataset size {}):\n{}'.format(
+                    method, route, len(queries), budget, size, '\n'.join(queries)
+                ),
+            )
+            counts[size] = len(queries)
+        self.assertEqual(
+            len(set(counts.values())),
+            1,
+            f'{method} {route}: queries grow with the dataset size: {counts}',
+        )
@@ -0,0 +1,145 @@
+"""
+Precomputed OpenAPI schema.
+
+Generating the schema walks every viewset and ``extend_schema`` decorator, so
+it is done once: at build time by ``manage.py build_schema``, which writes the
+YAML and JSON renderings plus gzipped copies to ``settings.SCHEMA_DIR``, or
+otherwise on the first request of each process. ``schema_view`` then serves
+the stored bytes with an ETag, compressed when the client accepts gzip.
+"""
+
+import gzip
+import hashlib
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_safe
+from drf_spectacular.generators import SchemaGenerator
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+
+SCHEMA_FORMATS = {
+    'yaml': ('openapi.yaml', 'application/vnd.oai.openapi'),
+    'json': ('openapi.json', 'application/vnd.oai.openapi+json'),
+}
+
+# Schemas change with deployments only; clients revalidate with the ETag.
+SCHEMA_MAX_AGE = 300  # seconds
+
+_lock = threading.Lock()
+_artifacts = {}
+
+
+class SchemaArtifact:
+    """
+    One rendering of the schema, ready to be served.
+
+    Attributes:
+        content (bytes): The rendered schema.
+        compressed (bytes): ``content`` compressed with gzip.
+        etag (str): Quoted ETag of ``content``.
+        compressed_etag (str): Quoted ETag of ``compressed``, a different
+            representation of the same schema.
+    """
+
+    def __init__(self, content, compressed=None):
+        self.content = content
+        self.compressed = compressed or gzip.compress(content, mtime=0)
+        digest = hashlib.sha1(content).hexdigest()
+        self.etag = quote_etag(digest)
+        self.compressed_etag = quote_etag(digest + '-gzip')
+
+
+def render_schema():
+    """Generate the schema and return its renderings by format."""
+    schema = SchemaGenerator().get_schema(request=None, public=True)
+    return {
+        'yaml': OpenApiYamlRenderer().render(schema, renderer_context={}),
+        'json': OpenApiJsonRenderer().render(schema, renderer_context={}),
+    }
+
+
+def write_schema(directory):
+    """Generate the schema and write every rendering, plain and gzipped, to ``directory``."""
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for schema_format, content in render_schema().items():
+        path = directory / SCHEMA_FORMATS[schema_format][0]
+        path.write_bytes(content)
+        path.with_name(path.name + '.gz').write_bytes(gzip.compress(content, mtime=0))
+        paths.append(path)
+    return paths
+
+
+def _load_artifacts():
+    paths = {
+        schema_format: settings.SCHEMA_DIR / filename
+        for schema_format, (filename, _) in SCHEMA_FORMATS.items()
+    }
+    if not all(path.exists() for path in paths.values()):
+        # Not built ahead of time, so generate it once for this process
+        return {
+            schema_format: SchemaArtifact(content)
+            for schema_format, content in render_schema().items()
+        }
+
+    artifacts = {}
+    for schema_format, path in paths.items():
+        compressed = path.with_name(path.name + '.gz')
+        artifacts[schema_format] = SchemaArtifact(
+            path.read_bytes(),
+            compressed.read_bytes() if compressed.exists() else None,
+        )
+    return artifacts
+
+
+def get_schema_artifact(schema_format):
+    """Return the ``SchemaArtifact`` of ``schema_format``, loading it on first use."""
+    if not _artifacts:
+        with _lock:
+            if not _artifacts:
+                _artifacts.update(_load_artifacts())
+    return _artifacts[schema_format]
+
+
+def clear_schema_cache():
+    """Forget the loaded schema, e.g. after ``build_schema`` ran in-process."""
+    with _lock:
+        _artifacts.clear()
+
+
+def _negotiate_format(request):
+    requested = request.GET.get('format')
+    if requested in SCHEMA_FORMATS:
+        return requested
+    if 'json' in request.headers.get('Accept', ''):
+        return 'json'
+    return 'yaml'
+
+
+@require_safe
+def schema_view(request):
+    """
+    Serve the OpenAPI schema as YAML, or as JSON with ``?format=json`` or a
+    JSON ``Accept`` header.
+    """
+    schema_format = _negotiate_format(request)
+    artifact = get_schema_artifact(schema_format)
+    compress = 'gzip' in request.headers.get('Accept-Encoding', '')
+    etag = artifact.compressed_etag if compress else artifact.etag
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(
+            artifact.compressed if compress else artifact.content,
+            content_type=SCHEMA_FORMATS[schema_format][1],
+        )
+        if compress:
+            response['Content-Encoding'] = 'gzip'
+
+    response['ETag'] = etag
+    response['Cache-Control'] = f'public, max-age={SCHEMA_MAX_AGE}'
+    patch_vary_headers(response, ['Accept', 'Accept-Encoding'])
+    return response
@@ -0,0 +1,26 @@
+"""
+Test runner of the project.
+
+Like Django's runner swaps in the locmem email backend, it keeps the throttle
+counters in the cache during tests, whatever ``settings.THROTTLE_STORE`` says,
+so that tests reset them by clearing the cache instead of sharing a SQLite
+file between tests and runs.
+"""
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+from utils import throttling
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._throttle_store = settings.THROTTLE_STORE
+        settings.THROTTLE_STORE = 'utils.throttling.CacheCounterStore'
+        throttling._stores.clear()
+
+    def teardown_test_environment(self, **kwargs):
+        settings.THROTTLE_STORE = self._throttle_store
+        throttling._stores.clear()
+        super().teardown_test_environment(**kwargs)
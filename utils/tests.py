@@ -0,0 +1,720 @@
+import gzip
+import json
+import logging
+import multiprocessing
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from books.leaderboards import refresh_rankings
+from books.models import Book
+from books.views import BookViewSet
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from jwt_auth.authentication import user_cache
+from jwt_auth.views import CustomTokenObtainPairSerializer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+from reviews.models import Review
+from reviews.views import ReviewViewSet
+
+from utils import metrics, schema, throttling, timing
+from utils.db import pool, routers
+from utils.management.commands import benchmark
+from utils.query_budget import QueryBudgetMixin
+
+
+class SchemaViewTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.schema_dir = Path(directory.name)
+
+        settings_override = override_settings(SCHEMA_DIR=self.schema_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        schema.clear_schema_cache()
+        self.addCleanup(schema.clear_schema_cache)
+
+    def test_schema_is_generated_once_without_build(self):
+        """Test that without a build the schema is generated on first use only."""
+        response = self.client.get(reverse('schema'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/vnd.oai.openapi')
+        self.assertTrue(response.content.startswith(b'openapi: 3'))
+
+        with patch('utils.schema.render_schema', side_effect=AssertionError):
+            response = self.client.get(reverse('schema'), {'format': 'json'})
+        self.assertEqual(response.json()['openapi'], '3.0.3')
+
+    def test_serves_built_schema_with_etag_and_gzip(self):
+        """Test that the built files are served, compressed and revalidated."""
+        call_command('build_schema', stdout=StringIO())
+        (self.schema_dir / 'openapi.json').write_bytes(b'{"built": true}')
+        (self.schema_dir / 'openapi.json.gz').write_bytes(gzip.compress(b'{"built": true}'))
+        schema.clear_schema_cache()
+
+        response = self.client.get(
+            reverse('schema'), HTTP_ACCEPT='application/json', HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), b'{"built": true}')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        response = self.client.get(
+            reverse('schema'),
+            HTTP_ACCEPT='application/json',
+            HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+        # The uncompressed representation has its own ETag
+        response = self.client.get(reverse('schema'), {'format': 'json'})
+        self.assertEqual(response.content, b'{"built": true}')
+        self.assertNotIn('Content-Encoding', response)
+
+    def test_schema_is_read_only(self):
+        """Test that the schema endpoint only answers safe methods."""
+        self.assertEqual(self.client.post(reverse('schema')).status_code, 405)
+
+
+def _increment_shared_counter(path, times):
+    store = throttling.SQLiteCounterStore(path)
+    for _ in range(times):
+        store.incr('shared', ttl=60)
+
+
+class SlidingWindowThrottleTests(TestCase):
+
+    class ThreePerMinute(throttling.SlidingWindowAnonRateThrottle):
+        rate = '3/min'
+
+    def setUp(self):
+        cache.clear()
+        throttling._stores.clear()
+        self.addCleanup(throttling._stores.clear)
+        self.now = 600.0  # The start of a window
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.sqlite_path = Path(directory.name) / 'throttle.sqlite3'
+
+    def allow(self, address='10.0.0.1'):
+        throttle = self.ThreePerMinute()
+        throttle.timer = lambda: self.now
+        request = Request(APIRequestFactory().get('/', REMOTE_ADDR=address))
+        request.user = AnonymousUser()
+        allowed = throttle.allow_request(request, None)
+        return allowed, throttle
+
+    def check_sliding_window(self):
+        self.assertEqual([self.allow()[0] for _ in range(4)], [True, True, True, False])
+        self.assertTrue(self.allow('10.0.0.2')[0])
+
+        # Half way into the next window, half of the previous one still counts
+        self.now += 90
+        allowed, throttle = self.allow()
+        self.assertTrue(allowed)  # 3 * 0.5 + 1
+        allowed, throttle = self.allow()
+        self.assertFalse(allowed)  # 3 * 0.5 + 2 > 3
+        self.assertAlmostEqual(throttle.wait(), 10)
+
+        # Rejected requests were not counted
+        self.now += 10
+        self.assertTrue(self.allow()[0])
+
+    def test_cache_store(self):
+        """Test the sliding window over the default cache."""
+        with self.settings(THROTTLE_STORE='utils.throttling.CacheCounterStore'):
+            self.check_sliding_window()
+
+    def test_sqlite_store(self):
+        """Test the sliding window over a SQLite file."""
+        with self.settings(
+            THROTTLE_STORE='utils.throttling.SQLiteCounterStore',
+            THROTTLE_SQLITE_PATH=self.sqlite_path,
+        ):
+            self.check_sliding_window()
+
+    def test_sqlite_store_is_shared_between_processes(self):
+        """Test that concurrent processes never lose an increment."""
+        context = multiprocessing.get_context('fork')
+        processes = [
+            context.Process(target=_increment_shared_counter, args=(self.sqlite_path, 50))
+            for _ in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        self.assertEqual(throttling.SQLiteCounterStore(self.sqlite_path).get('shared'), 200)
+
+    def test_sqlite_counters_expire(self):
+        """Test that an expired counter starts again from zero."""
+        store = throttling.SQLiteCounterStore(self.sqlite_path)
+        store.incr('expiring', ttl=-1)
+        self.assertEqual(store.get('expiring'), 0)
+        self.assertEqual(store.incr('expiring', ttl=60), 1)
+
+
+@override_settings(DATABASE_REPLICAS=['default'])
+class ReplicaRoutingTests(APITestCase):
+    # 'default' stands in for a replica: reads routed to it are recorded as
+    # 'default', reads left on the primary as None.
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='writer', password='secret')
+        self.book = Book.objects.create(
+            title='Test Book',
+            author='Test Author',
+            publishing_date='2024-01-01',
+            category='Fiction',
+            url='http://test.com',
+        )
+
+    def read_databases(self, viewset, method, url, data=None):
+        """Return the response and the read database seen by ``get_queryset``."""
+        seen = []
+        original = viewset.get_queryset
+
+        def get_queryset(view):
+            seen.append(routers.get_read_database())
+            return original(view)
+
+        with patch.object(viewset, 'get_queryset', get_queryset):
+            response = getattr(self.client, method)(url, data, format='json')
+        self.assertIsNone(routers.get_read_database())
+        return response, set(seen)
+
+    def test_safe_requests_read_from_replica(self):
+        """Test that safe requests are routed to a replica, others to the primary."""
+        _, databases = self.read_databases(BookViewSet, 'get', reverse('book-list'))
+        self.assertEqual(databases, {'default'})
+
+        self.client.force_authenticate(self.user)
+        response, databases = self.read_databases(
+            ReviewViewSet, 'delete', reverse('review-detail', args=[999])
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(databases, {None})
+
+        with self.settings(DATABASE_REPLICAS=[]):
+            _, databases = self.read_databases(BookViewSet, 'get', reverse('book-list'))
+        self.assertEqual(databases, {None})
+
+    def test_writers_stick_to_primary(self):
+        """Test that a user reads from the primary for a while after writing."""
+        self.client.force_authenticate(self.user)
+        self.client.post(
+            reverse('review-list'),
+            {'book': self.book.id, 'rating': 4, 'comment': 'Good'},
+            format='json',
+        )
+
+        _, databases = self.read_databases(ReviewViewSet, 'get', reverse('review-list'))
+        self.assertEqual(databases, {None})
+
+        # Other users still read from replicas
+        self.client.force_authenticate(None)
+        _, databases = self.read_databases(ReviewViewSet, 'get', reverse('review-list'))
+        self.assertEqual(databases, {'default'})
+
+        # Once the sticky window is over, so does the writer
+        self.client.force_authenticate(self.user)
+        cache.delete(routers._sticky_key(self.user))
+        _, databases = self.read_databases(ReviewViewSet, 'get', reverse('review-list'))
+        self.assertEqual(databases, {'default'})
+
+    def test_failed_writes_do_not_stick(self):
+        """Test that rejected writes do not start a sticky window."""
+        self.client.force_authenticate(self.user)
+        response = self.client.post(reverse('review-list'), {'rating': 9}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(routers.is_sticky(self.user))
+
+    def test_replicas_are_not_migrated(self):
+        """Test that migrations only run on the primary."""
+        router = routers.ReplicaRouter()
+        with self.settings(DATABASE_REPLICAS=['replica1']):
+            self.assertFalse(router.allow_migrate('replica1', 'books'))
+            self.assertTrue(router.allow_migrate('default', 'books'))
+
+
+class ConnectionPoolTests(APITestCase):
+    def tearDown(self):
+        pool.close_pools()
+
+    def test_pool_options(self):
+        """Test that pools take their options from the database settings."""
+        conn_params = {'dbname': 'books', 'host': 'db.invalid'}
+        # min_size=0 so that nothing connects
+        settings_dict = {'POOL': {'min_size': 0, 'max_size': 3}}
+        db_pool = pool.get_pool('default', settings_dict, conn_params)
+        self.assertIs(pool.get_pool('default', settings_dict, conn_params), db_pool)
+        self.assertEqual((db_pool.min_size, db_pool.max_size), (0, 3))
+        self.assertEqual(db_pool.max_lifetime, pool.POOL_DEFAULTS['max_lifetime'])
+        self.assertIsNotNone(db_pool._check)
+
+        # Another database name, as in tests, is another pool
+        other = pool.get_pool('default', settings_dict, {**conn_params, 'dbname': 'test_books'})
+        self.assertIsNot(other, db_pool)
+
+        pool.close_pool('default', conn_params)
+        self.assertTrue(db_pool.closed)
+        self.assertFalse(other.closed)
+
+    def test_summarize_pool_stats(self):
+        """Test the utilization and wait times derived from the pool counters."""
+        stats = pool.summarize_pool_stats({
+            'pool_min': 2,
+            'pool_max': 10,
+            'pool_size': 6,
+            'pool_available': 2,
+            'requests_num': 40,
+            'requests_queued': 5,
+            'requests_wait_ms': 100,
+            'connections_num': 7,
+        })
+        self.assertEqual(stats['in_use'], 4)
+        self.assertEqual(stats['idle'], 2)
+        self.assertEqual(stats['utilization'], 0.4)
+        self.assertEqual(stats['wait_ms_avg'], 2.5)
+        self.assertEqual(stats['requests_queued'], 5)
+        self.assertEqual(stats['connections_lost'], 0)
+
+    def test_pool_stats_view(self):
+        """Test that pool metrics are served to admins only."""
+        pool.get_pool('default', {'POOL': {'min_size': 0, 'max_size': 4}}, {'dbname': 'books'})
+        url = reverse('db-pool-stats')
+
+        self.client.force_authenticate(User.objects.create_user('reader', password='secret'))
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_authenticate(User.objects.create_superuser('admin', password='secret'))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['default']['max_size'], 4)
+        self.assertEqual(response.data['default']['utilization'], 0.0)
+
+
+@override_settings(REQUEST_TIMING_SAMPLE_RATE=0, SERVER_TIMING='all')
+class RequestTimingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        Book.objects.create(
+            title='Test Book',
+            author='Test Author',
+            publishing_date='2024-01-01',
+            category='Fiction',
+            url='http://test.com',
+        )
+
+    def get_timed(self, url, **headers):
+        with self.assertLogs('utils.timing', 'INFO') as logs:
+            response = self.client.get(url, HTTP_X_REQUEST_TIMING='1', **headers)
+        self.assertEqual(len(logs.records), 1)
+        return response, logs.records[0]
+
+    def test_unsampled_requests_are_not_timed(self):
+        """Test that requests outside the sample get no timings."""
+        response = self.client.get(reverse('book-list'))
+        self.assertNotIn('Server-Timing', response)
+
+    def test_server_timing_header(self):
+        """Test the query count and phase durations of the Server-Timing header."""
+        response, _ = self.get_timed(reverse('book-list'))
+        metrics = {
+            metric.split(';')[0]: metric for metric in response['Server-Timing'].split(', ')
+        }
+        self.assertEqual(set(metrics), {'db', 'serialize', 'view', 'total'})
+        # The page, the count and the cache generation
+        self.assertRegex(metrics['db'], r'^db;dur=[\d.]+;desc="\d+ queries"$')
+        self.assertNotIn('desc="0 queries"', metrics['db'])
+
+    def test_structured_log(self):
+        """Test that timed requests are logged as JSON."""
+        response, record = self.get_timed(reverse('book-detail', args=[1]))
+        fields = json.loads(record.getMessage())
+        self.assertEqual(fields, record.timing)
+        self.assertEqual(fields['path'], reverse('book-detail', args=[1]))
+        self.assertEqual(fields['status'], 200)
+        self.assertGreater(fields['queries'], 0)
+        self.assertLessEqual(fields['view_ms'], fields['total_ms'])
+
+    def test_server_timing_for_staff_only(self):
+        """Test that only staff get the header when SERVER_TIMING is 'staff'."""
+        with self.settings(SERVER_TIMING='staff'):
+            response, _ = self.get_timed(reverse('book-list'))
+            self.assertNotIn('Server-Timing', response)
+
+            self.client.force_authenticate(User.objects.create_user('staff', is_staff=True))
+            response, _ = self.get_timed(reverse('book-list'))
+            self.assertIn('Server-Timing', response)
+
+        with self.settings(SERVER_TIMING='off'):
+            response, _ = self.get_timed(reverse('book-list'))
+            self.assertNotIn('Server-Timing', response)
+
+    def test_rejected_user_gets_no_server_timing(self):
+        """Test that a token of a deleted user gets a 401 on timed writes, not a 500."""
+        user = User.objects.create_user('deleted', password='secret')
+        token = CustomTokenObtainPairSerializer.get_token(user).access_token
+        user.delete()
+        user_cache.clear()
+
+        with self.settings(SERVER_TIMING='staff'), self.assertLogs('utils.timing', 'INFO'):
+            response = self.client.post(
+                reverse('review-list'),
+                {'book': 1, 'rating': 5, 'comment': 'Good'},
+                HTTP_AUTHORIZATION='Bearer {}'.format(token),
+                HTTP_X_REQUEST_TIMING='1',
+            )
+        self.assertEqual(response.status_code, 401)
+        self.assertNotIn('Server-Timing', response)
+
+    def test_async_requests_are_not_adapted(self):
+        """Test that the async handler runs the middleware without a thread."""
+        # Adaptations are only logged in DEBUG
+        with self.settings(DEBUG=True), self.assertLogs('django.request', 'DEBUG') as logs:
+            logging.getLogger('django.request').debug('Loading the middleware')
+            ASGIHandler()
+        self.assertNotIn('RequestTimingMiddleware', '\n'.join(logs.output))
+
+    async def test_async_view_timings(self):
+        """Test that the queries of async views are counted."""
+        with self.assertLogs('utils.timing', 'INFO'):
+            response = await self.async_client.get(
+                reverse('async-book-list'), headers={'X-Request-Timing': '1'}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('view;dur=', response['Server-Timing'])
+        self.assertNotIn('desc="0 queries"', response['Server-Timing'])
+
+    def test_timed_outside_requests(self):
+        """Test that timed() blocks are no-ops when nothing is measured."""
+        with timing.timed('serialize'):
+            pass
+        self.assertIsNone(timing._current.get())
+
+
+def _observe_in_child(count):
+    for _ in range(count):
+        metrics.observe_request('book-list', 'GET', 200, 0.02)
+
+
+class MetricsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        settings = override_settings(METRICS_DIR=self.directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_values_file(self):
+        """Test that values survive reopening and growing the file."""
+        path = self.directory / 'values.db'
+        values = metrics.MmapValues(path)
+        values.incr('a')
+        values.incr('a', 2.5)
+        for index in range(3000):
+            values.incr('key-{}'.format(index))
+        values.close()
+
+        values = metrics.MmapValues(path)
+        values.incr('a')
+        self.assertGreater(path.stat().st_size, metrics.MmapValues.INITIAL_SIZE)
+        read = dict(metrics.read_values(path))
+        self.assertEqual(read['a'], 4.5)
+        self.assertEqual(read['key-2999'], 1.0)
+        self.assertEqual(len(read), 3001)
+
+    def test_processes_are_aggregated(self):
+        """Test that the scrape sums the values of every worker process."""
+        metrics.observe_request('book-list', 'GET', 200, 0.02)
+        context = multiprocessing.get_context('fork')
+        processes = [context.Process(target=_observe_in_child, args=(5,)) for _ in range(3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        self.assertEqual(len(list(self.directory.glob('metrics_*.db'))), 4)
+        totals = metrics.collect()
+        self.assertEqual(totals['requests|book-list|GET|2xx'], 16)
+        self.assertAlmostEqual(totals['latency_sum|book-list|GET'], 0.32)
+
+    def test_scrape_endpoint(self):
+        """Test the per-route counters and histograms served at /metrics."""
+        self.client.get(reverse('book-list'))
+        self.client.get(reverse('book-detail', args=[999]))
+
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        lines = response.content.decode().splitlines()
+        self.assertIn('http_requests_total{route="book-list",method="GET",status="2xx"} 1.0', lines)
+        self.assertIn('http_requests_total{route="book-detail",method="GET",status="4xx"} 1.0', lines)
+        self.assertIn('# TYPE http_request_duration_seconds histogram', lines)
+        self.assertIn(
+            'http_request_duration_seconds_bucket{route="book-list",method="GET",le="+Inf"} 1.0',
+            lines,
+        )
+        self.assertIn('http_request_duration_seconds_count{route="book-list",method="GET"} 1.0', lines)
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that each bucket counts the requests at most as slow as its bound."""
+        for seconds in (0.001, 0.03, 0.03, 20):
+            metrics.observe_request('review-list', 'POST', 201, seconds)
+        text = metrics.render_metrics(metrics.collect())
+        self.assertIn('_bucket{route="review-list",method="POST",le="0.005"} 1.0', text)
+        self.assertIn('_bucket{route="review-list",method="POST",le="0.025"} 1.0', text)
+        self.assertIn('_bucket{route="review-list",method="POST",le="0.05"} 3.0', text)
+        self.assertIn('_bucket{route="review-list",method="POST",le="10.0"} 3.0', text)
+        self.assertIn('_bucket{route="review-list",method="POST",le="+Inf"} 4.0', text)
+
+    def test_async_requests_are_not_adapted(self):
+        """Test that the async handler runs the middleware without a thread."""
+        # First in MIDDLEWARE: the chain is the middleware itself, only wrapped
+        # by convert_exception_to_response, rather than a sync_to_async adapter
+        chain = ASGIHandler()._middleware_chain
+        self.assertIsInstance(getattr(chain, '__wrapped__', None), metrics.MetricsMiddleware)
+
+    async def test_async_requests_are_observed(self):
+        """Test that requests served by the async handler are counted."""
+        response = await self.async_client.get(reverse('async-book-list'))
+        self.assertEqual(response.status_code, 200)
+        totals = metrics.collect()
+        self.assertEqual(totals['requests|async-book-list|GET|2xx'], 1)
+
+    def test_scrape_token(self):
+        """Test that a configured token is required to scrape."""
+        with self.settings(METRICS_TOKEN='s3cret'):
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+            response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer s3cret')
+            self.assertEqual(response.status_code, 200)
+
+
+class BenchmarkCommandTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.baseline = Path(directory.name) / 'baseline.json'
+
+    def benchmark(self, **options):
+        out = StringIO()
+        call_command(
+            'benchmark',
+            books=30,
+            reviews=60,
+            requests=3,
+            login_requests=1,
+            warmup=0,
+            no_test_database=True,
+            stdout=out,
+            **options,
+        )
+        return out.getvalue()
+
+    def test_routes_and_baseline(self):
+        """Test that every route is measured and saved as a baseline."""
+        output = self.benchmark(save_baseline=self.baseline)
+
+        results = json.loads(self.baseline.read_text())
+        self.assertEqual(results['dataset'], {'books': 30, 'reviews': 60})
+        self.assertEqual(
+            list(results['routes']),
+            ['book-list', 'book-detail', 'book-reviews', 'review-create',
+             'review-update', 'review-delete', 'login'],
+        )
+        for route, result in results['routes'].items():
+            self.assertEqual(result['errors'], 0, route)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertGreater(result['queries_per_request'], 0)
+            self.assertIn(route, output)
+
+        # The dataset was seeded and the benchmark's reviews were deleted
+        self.assertEqual(Book.objects.count(), 30)
+        self.assertEqual(Review.objects.count(), 60)
+
+    def test_regressions_fail(self):
+        """Test that results worse than the baseline are reported as errors."""
+        self.benchmark(save_baseline=self.baseline)
+        results = json.loads(self.baseline.read_text())
+        results['routes']['book-detail']['p95_ms'] = 0.0
+        results['routes']['review-update']['queries_per_request'] = 1
+        self.baseline.write_text(json.dumps(results))
+
+        # Only the doctored routes, whatever the noise of so few requests
+        with self.assertRaisesMessage(CommandError, '2 regression(s)'):
+            self.benchmark(baseline=self.baseline, tolerance=1000)
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles."""
+        values = list(range(1, 101))
+        self.assertEqual(benchmark.percentile(values, 0.5), 50)
+        self.assertEqual(benchmark.percentile(values, 0.99), 99)
+        self.assertEqual(benchmark.percentile([7], 0.95), 7)
+
+
+class QueryBudgetTests(QueryBudgetMixin, APITestCase):
+    """Every route of the book, review and auth views within its query budget."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='budget', password='secret')
+        self.book = self.new_book()
+        token = CustomTokenObtainPairSerializer.get_token(self.user)
+        self.authorization = 'Bearer {}'.format(token.access_token)
+
+    def clear_caches(self):
+        super().clear_caches()
+        user_cache.clear()
+
+    def new_book(self):
+        return Book.objects.create(
+            title='Budget Book',
+            author='Budget Author',
+            publishing_date='2024-01-01',
+            category='Fiction',
+            url='http://test.com',
+        )
+
+    def grow_dataset(self, size):
+        # size books, and size reviews of self.book by distinct reviewers
+        for _ in range(size - Book.objects.count()):
+            self.new_book()
+        missing = size - Review.objects.filter(book=self.book).count()
+        offset = User.objects.count()
+        reviewers = User.objects.bulk_create(
+            User(username='reviewer-{}'.format(offset + index)) for index in range(missing)
+        )
+        Review.objects.bulk_create(
+            Review(book=self.book, reviewer=reviewer, rating=4, comment='Fine')
+            for reviewer in reviewers
+        )
+
+    def refresh_rankings(self):
+        refresh_rankings()
+        return ()
+
+    def ranked_books(self, count):
+        # Books reach the leaderboards by the periodic refresh, if not before
+        books = [self.new_book() for _ in range(count)]
+        refresh_rankings()
+        return books
+
+    def own_review(self):
+        return (Review.objects.create(book=self.new_book(), reviewer=self.user, rating=3),)
+
+    def write(self, method, url, data=None):
+        return getattr(self.client, method)(
+            url, data, format='json', HTTP_AUTHORIZATION=self.authorization
+        )
+
+    def test_book_views(self):
+        self.assertQueryBudget('book-list', 'GET', lambda: self.client.get(reverse('book-list')))
+        self.assertQueryBudget(
+            'book-detail',
+            'GET',
+            lambda: self.client.get(reverse('book-detail', args=[self.book.id])),
+        )
+        for route in ['book-top-rated', 'book-trending']:
+            self.assertQueryBudget(
+                route,
+                'GET',
+                lambda: self.client.get(reverse(route), {'limit': 100}),
+                setup=self.refresh_rankings,
+            )
+
+    def test_reviews_for_book(self):
+        url = reverse('book-reviews', args=[self.book.id])
+        self.assertQueryBudget('book-reviews', 'GET', lambda: self.client.get(url))
+        self.assertQueryBudget('book-reviews', 'GET', lambda: self.client.get(url + '?stream=ndjson'))
+
+    def test_review_reads(self):
+        self.assertQueryBudget(
+            'review-list', 'GET', lambda: self.client.get(reverse('review-list'))
+        )
+        self.assertQueryBudget(
+            'review-detail',
+            'GET',
+            lambda review: self.client.get(reverse('review-detail', args=[review.id])),
+            setup=self.own_review,
+        )
+
+    def test_review_writes(self):
+        self.assertQueryBudget(
+            'review-list',
+            'POST',
+            lambda book: self.write(
+                'post', reverse('review-list'), {'book': book.id, 'rating': 5, 'comment': 'Good'}
+            ),
+            setup=lambda: self.ranked_books(1),
+        )
+        self.assertQueryBudget(
+            'review-bulk-create',
+            'POST',
+            lambda *books: self.write(
+                'post',
+                reverse('review-bulk-create'),
+                [{'book': book.id, 'rating': 4, 'comment': 'Good'} for book in books],
+            ),
+            setup=lambda: self.ranked_books(3),
+        )
+        for method in ('put', 'patch'):
+            self.assertQueryBudget(
+                'review-detail',
+                method.upper(),
+                lambda review: self.write(
+                    method,
+                    reverse('review-detail', args=[review.id]),
+                    {'book': review.book_id, 'rating': 1, 'comment': 'Changed'},
+                ),
+                setup=self.own_review,
+            )
+        self.assertQueryBudget(
+            'review-detail',
+            'DELETE',
+            lambda review: self.write('delete', reverse('review-detail', args=[review.id])),
+            setup=self.own_review,
+        )
+
+    def test_auth_views(self):
+        usernames = ('new-user-{}'.format(index) for index in range(len(self.dataset_sizes)))
+        self.assertQueryBudget(
+            'register',
+            'POST',
+            lambda: self.client.post(
+                reverse('register'),
+                {
+                    'username': next(usernames),
+                    'password': 'a-long-passphrase',
+                    'email': 'new-user@example.com',
+                },
+            ),
+        )
+        self.assertQueryBudget(
+            'token_obtain_pair',
+            'POST',
+            lambda: self.client.post(
+                reverse('token_obtain_pair'), {'username': 'budget', 'password': 'secret'}
+            ),
+        )
+        self.assertQueryBudget(
+            'token_refresh',
+            'POST',
+            lambda refresh: self.client.post(reverse('token_refresh'), {'refresh': refresh}),
+            setup=lambda: (str(CustomTokenObtainPairSerializer.get_token(self.user)),),
+        )
@@ -0,0 +1,179 @@
+"""
+Sliding-window rate limiting over a shared counter store.
+
+DRF's ``SimpleRateThrottle`` keeps the timestamp of every request in the
+history list of each client, an O(n) check, in a cache that is private to the
+worker when it is LocMem. The throttles here keep two integer counters per
+client instead: the number of requests in the current and in the previous
+fixed window. The request rate over the sliding window is estimated as
+
+    previous * (share of the previous window still in the sliding window) + current
+
+Counters are incremented atomically in a store shared by every worker,
+selected with ``settings.THROTTLE_STORE``:
+
+- ``CacheCounterStore``: the default cache, the default store when
+  ``CACHE_URL`` is a Redis or Memcached cache shared between hosts. With the
+  LocMem cache its counters would be per process.
+- ``SQLiteCounterStore``: a SQLite file (``settings.THROTTLE_SQLITE_PATH``)
+  shared by the processes of one host, the default store otherwise.
+"""
+
+import random
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+
+
+class CacheCounterStore:
+    """Counters in a Django cache, using its atomic ``add`` and ``incr``."""
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def incr(self, key, delta=1, ttl=None):
+        """Add ``delta`` to the counter ``key``, created with ``ttl``, and return it."""
+        for _ in range(2):
+            # No-op if the counter exists
+            self.cache.add(key, 0, ttl)
+            try:
+                return self.cache.incr(key, delta)
+            except ValueError:
+                # Expired between add and incr
+                continue
+        raise RuntimeError('Could not increment throttle counter {}'.format(key))
+
+    def get(self, key):
+        return self.cache.get(key, 0)
+
+
+class SQLiteCounterStore:
+    """
+    Counters in a SQLite database file, shared by every process of a host.
+
+    Each increment is an UPSERT in an immediate transaction, so concurrent
+    processes never lose an update. Expired counters are purged now and then.
+    """
+
+    PURGE_PROBABILITY = 0.01
+
+    def __init__(self, path=None):
+        self.path = str(path or settings.THROTTLE_SQLITE_PATH)
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # Autocommit mode, transactions are explicit
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS throttle_counters ('
+                'key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires REAL NOT NULL)'
+            )
+            self._local.connection = connection
+        return connection
+
+    def incr(self, key, delta=1, ttl=None):
+        now = time.time()
+        expires = now + ttl if ttl is not None else float('inf')
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute(
+                'INSERT INTO throttle_counters (key, count, expires) VALUES (?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET '
+                'count = CASE WHEN expires < ? THEN excluded.count ELSE count + excluded.count END, '
+                'expires = CASE WHEN expires < ? THEN excluded.expires ELSE expires END',
+                (key, delta, expires, now, now),
+            )
+            (count,) = connection.execute(
+                'SELECT count FROM throttle_counters WHERE key = ?', (key,)
+            ).fetchone()
+            if random.random() < self.PURGE_PROBABILITY:
+                connection.execute('DELETE FROM throttle_counters WHERE expires < ?', (now,))
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return count
+
+    def get(self, key):
+        row = self.connection.execute(
+            'SELECT count FROM throttle_counters WHERE key = ? AND expires >= ?',
+            (key, time.time()),
+        ).fetchone()
+        return row[0] if row else 0
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store():
+    """Return the counter store configured by ``settings.THROTTLE_STORE``."""
+    path = settings.THROTTLE_STORE
+    store = _stores.get(path)
+    if store is None:
+        with _stores_lock:
+            store = _stores.setdefault(path, import_string(path)())
+    return store
+
+
+class SlidingWindowThrottleMixin:
+    """
+    Replaces the request history of a ``SimpleRateThrottle`` with sliding
+    window counters, see the module docstring. Rejected requests are not
+    counted.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        store = get_store()
+        now = self.timer()
+        window = int(now // self.duration)
+        # Counters live for two windows: the current one, then as the previous
+        ttl = 2 * self.duration
+        current = store.incr('{}:{}'.format(self.key, window), ttl=ttl)
+        self.previous = store.get('{}:{}'.format(self.key, window - 1))
+        self.elapsed = now - window * self.duration
+        self.current = current - 1
+
+        if self.estimate(self.current + 1) > self.num_requests:
+            store.incr('{}:{}'.format(self.key, window), delta=-1, ttl=ttl)
+            return False
+        return True
+
+    def estimate(self, current):
+        weight = 1 - self.elapsed / self.duration
+        return self.previous * weight + current
+
+    def wait(self):
+        """Seconds until the sliding window has room for one more request."""
+        remaining = self.duration - self.elapsed
+        if self.current + 1 > self.num_requests or not self.previous:
+            # Only the next window can make room
+            return remaining
+        excess = self.estimate(self.current + 1) - self.num_requests
+        # The previous window's share decreases by previous / duration per second
+        return min(remaining, excess * self.duration / self.previous)
+
+
+class SlidingWindowAnonRateThrottle(SlidingWindowThrottleMixin, AnonRateThrottle):
+    """``AnonRateThrottle`` (scope ``anon``) with sliding window counters."""
+
+
+class SlidingWindowUserRateThrottle(SlidingWindowThrottleMixin, UserRateThrottle):
+    """``UserRateThrottle`` (scope ``user``) with sliding window counters."""
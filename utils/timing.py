@@ -0,0 +1,219 @@
+"""
+Per-request timings: SQL queries, database time, serialization and view time.
+
+``RequestTimingMiddleware`` instruments a sample of the requests
+(``settings.REQUEST_TIMING_SAMPLE_RATE``), plus those sent with an
+``X-Request-Timing: 1`` header. For these it
+
+- counts the queries run on every database connection and adds up their
+  duration, through ``connection.execute_wrapper``;
+- adds up the time spent in ``timed()`` blocks, e.g. ``timed('serialize')``
+  around serializers (including the queries they trigger);
+- measures the view, from the end of the request middleware to the response;
+- logs a JSON line on the ``utils.timing`` logger and, depending on
+  ``settings.SERVER_TIMING``, adds a ``Server-Timing`` response header.
+
+Other requests only pay for a random draw, and ``timed()`` blocks for a
+context variable lookup. The middleware runs natively under both WSGI and
+ASGI, so async views are not handed to a thread because of it.
+"""
+
+import json
+import logging
+import random
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from rest_framework.exceptions import AuthenticationFailed
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """
+    Timings of one request, also usable as a ``connection.execute_wrapper``.
+
+    Attributes:
+        queries (int): Number of queries run.
+        db (float): Seconds spent in them.
+        phases (dict): Seconds spent in each ``timed()`` phase, by name.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.phases = {}
+        self.view_start = None
+        self._open = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += perf_counter() - start
+            self.queries += 1
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+
+@contextmanager
+def timed(name):
+    """Add the time spent in the block to the ``name`` phase of the current request."""
+    timings = _current.get()
+    # Nested blocks of the same phase are counted once, by the outermost
+    if timings is None or name in timings._open:
+        yield
+        return
+    timings._open.add(name)
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings._open.discard(name)
+        timings.add(name, perf_counter() - start)
+
+
+class TimedSerializerMixin:
+    """Serializer mixin counting validation and representation as ``serialize`` time."""
+
+    def run_validation(self, *args, **kwargs):
+        with timed('serialize'):
+            return super().run_validation(*args, **kwargs)
+
+    def to_representation(self, instance):
+        with timed('serialize'):
+            return super().to_representation(instance)
+
+
+def _milliseconds(seconds):
+    return round(seconds * 1000, 2)
+
+
+class RequestTimingMiddleware:
+    """
+    Instruments sampled requests, see the module docstring. Best placed at the
+    top of ``MIDDLEWARE``, so that ``total`` covers the other middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Awaited as is by the async handler, instead of in a thread
+            self.process_view = self.aprocess_view
+
+    def should_time(self, request):
+        return (
+            request.headers.get('X-Request-Timing') == '1'
+            or random.random() < settings.REQUEST_TIMING_SAMPLE_RATE
+        )
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.should_time(request):
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = perf_counter()
+        try:
+            with ExitStack() as stack:
+                self.wrap_connections(stack, timings)
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, timings, start)
+        if self.show_server_timing(request):
+            response['Server-Timing'] = self.server_timing(timings)
+        return response
+
+    async def __acall__(self, request):
+        if not self.should_time(request):
+            return await self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = perf_counter()
+        try:
+            with ExitStack() as stack:
+                # Connections are per thread: the queries of async views run
+                # in the thread of the request's thread-sensitive calls
+                await sync_to_async(self.wrap_connections)(stack, timings)
+                response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, timings, start)
+        # Reading a lazily loaded user may query the database
+        if await sync_to_async(self.show_server_timing)(request):
+            response['Server-Timing'] = self.server_timing(timings)
+        return response
+
+    def wrap_connections(self, stack, timings):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timings))
+
+    def finish(self, request, response, timings, start):
+        end = perf_counter()
+        if timings.view_start is not None:
+            timings.add('view', end - timings.view_start)
+        timings.add('total', end - start)
+        self.log(request, response, timings)
+
+    def start_view(self):
+        timings = _current.get()
+        if timings is not None:
+            timings.view_start = perf_counter()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.start_view()
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        self.start_view()
+
+    def show_server_timing(self, request):
+        mode = settings.SERVER_TIMING
+        if mode == 'all':
+            return True
+        if mode != 'staff':
+            return False
+        # The user set by the view's authentication, e.g. from a JWT
+        user = getattr(request, 'user', None)
+        try:
+            return bool(user and user.is_staff)
+        except AuthenticationFailed:
+            # A lazily loaded user that the view already rejected with a 401
+            return False
+
+    def server_timing(self, timings):
+        metrics = ['db;dur={};desc="{} queries"'.format(_milliseconds(timings.db), timings.queries)]
+        metrics += [
+            '{};dur={}'.format(name, _milliseconds(seconds))
+            for name, seconds in timings.phases.items()
+        ]
+        return ', '.join(metrics)
+
+    def log(self, request, response, timings):
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': timings.queries,
+            'db_ms': _milliseconds(timings.db),
+        }
+        fields.update(
+            ('{}_ms'.format(name), _milliseconds(seconds))
+            for name, seconds in timings.phases.items()
+        )
+        logger.info(json.dumps(fields), extra={'timing': fields})